@@ -0,0 +1,59 @@
+"""
+Benchmark for ``CocoData.correct``.
+
+Measures the time of a single ``correct`` call for growing numbers of
+annotations. The time per annotation should stay roughly constant, which
+shows that ``correct`` scales linearly with the dataset size.
+
+Usage::
+
+    python -m benchmarks.bench_correct --sizes 10000 100000 1000000 10000000
+"""
+
+import argparse
+import time
+
+from benchmarks.synthetic import make_dataset
+from pycocoedit.objectdetection.data import CocoData
+
+
+def bench(num_annotations: int) -> float:
+    """
+    Time ``CocoData.correct`` on a synthetic dataset.
+
+    A tenth of the categories is removed beforehand so that ``correct`` has
+    orphaned annotations and empty images to clean up.
+
+    Parameters
+    ----------
+    num_annotations : int
+        Number of annotations in the synthetic dataset.
+
+    Returns
+    -------
+    float
+        Elapsed time in seconds.
+    """
+    dataset = make_dataset(num_annotations)
+    dataset["categories"] = dataset["categories"][: len(dataset["categories"]) * 9 // 10]
+    coco_data = CocoData(dataset)
+    coco_data.filter_applied = True
+    start = time.perf_counter()
+    coco_data.correct(correct_image=True, correct_category=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark and print one line per dataset size."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    print(f"{'annotations':>12} {'seconds':>10} {'ns/annotation':>14}")
+    for size in args.sizes:
+        elapsed = bench(size)
+        print(f"{size:>12} {elapsed:>10.3f} {elapsed / size * 1e9:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark for ``ImageFileNameFilter``.
+
+Measures the cost per image of filtering a fixed number of images against
+allowlists of growing size. The cost per image should not depend on the size
+of the allowlist.
+
+Usage::
+
+    python -m benchmarks.bench_name_filter --images 300000 --names 10 1000 100000
+"""
+
+import argparse
+import time
+
+from pycocoedit.objectdetection.filter import FilterType, ImageFileNameFilter
+
+
+def bench(images: list[dict], num_names: int) -> float:
+    """
+    Time ``ImageFileNameFilter.apply_batch``.
+
+    Parameters
+    ----------
+    images : list[dict]
+        Images to filter.
+    num_names : int
+        Number of file names in the allowlist, every other image matches.
+
+    Returns
+    -------
+    float
+        Elapsed time in seconds.
+    """
+    file_names = [images[i]["file_name"] for i in range(0, min(len(images), num_names * 2), 2)]
+    image_filter = ImageFileNameFilter(FilterType.INCLUSION, file_names)
+    start = time.perf_counter()
+    image_filter.apply_batch(images)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark and print one line per allowlist size."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=300_000)
+    parser.add_argument("--names", type=int, nargs="+", default=[10, 1_000, 100_000])
+    args = parser.parse_args()
+
+    images = [{"id": i, "file_name": f"{i:012d}.jpg", "width": 640, "height": 480} for i in range(args.images)]
+    print(f"{'names':>10} {'seconds':>10} {'ns/image':>10}")
+    for num_names in args.names:
+        elapsed = bench(images, num_names)
+        print(f"{num_names:>10} {elapsed:>10.3f} {elapsed / len(images) * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark for ``CocoData.save``.
+
+Compares the throughput of ``json.dump`` with the chunked writer used by
+``CocoData.save`` for each installed encoder backend, in MB/s of written JSON.
+
+Usage::
+
+    python -m benchmarks.bench_save --annotations 1000000
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable
+
+from benchmarks.synthetic import make_dataset
+from pycocoedit.objectdetection.data import CocoData
+from pycocoedit.objectdetection.stream import ENCODERS
+
+
+def measure(write: Callable[[str], None], path: str) -> tuple[float, float]:
+    """
+    Time a write function.
+
+    Parameters
+    ----------
+    write : Callable[[str], None]
+        Function writing a JSON file to the given path.
+    path : str
+        Output path.
+
+    Returns
+    -------
+    tuple[float, float]
+        Elapsed time in seconds and throughput in MB/s.
+    """
+    start = time.perf_counter()
+    write(path)
+    elapsed = time.perf_counter() - start
+    return elapsed, os.path.getsize(path) / elapsed / 1e6
+
+
+def main() -> None:
+    """Run the benchmark and print one line per writer."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--annotations", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    coco_data = CocoData(make_dataset(args.annotations))
+    coco_data.filter_applied = True
+
+    def json_dump(path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(coco_data.get_dataset(), f)
+
+    writers: dict[str, Callable[[str], None]] = {"json.dump": json_dump}
+    for encoder in ENCODERS:
+        if encoder == "json" or importlib.util.find_spec(encoder) is not None:
+            writers[f"save(encoder={encoder!r})"] = lambda path, encoder=encoder: coco_data.save(
+                path, correct_image=False, chunk_size=args.chunk_size, encoder=encoder
+            )
+
+    print(f"{'writer':>24} {'seconds':>10} {'MB/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "out.json")
+        for name, write in writers.items():
+            elapsed, throughput = measure(write, path)
+            print(f"{name:>24} {elapsed:>10.3f} {throughput:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Synthetic COCO datasets for benchmarks.
+
+The generated datasets are deterministic for a given seed so that the numbers
+reported by the benchmark scripts are comparable between runs.
+"""
+
+import random
+from typing import Any
+
+
+def make_dataset(
+    num_annotations: int,
+    annotations_per_image: int = 7,
+    num_categories: int = 80,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """
+    Create a synthetic COCO dataset.
+
+    Parameters
+    ----------
+    num_annotations : int
+        Number of annotations to generate.
+    annotations_per_image : int, optional
+        Average number of annotations per image, default is 7 (close to COCO 2017).
+    num_categories : int, optional
+        Number of categories, default is 80.
+    seed : int, optional
+        Random seed, default is 0.
+
+    Returns
+    -------
+    dict
+        Dataset including info, licenses, images, categories and annotations.
+    """
+    rng = random.Random(seed)
+    num_images = max(1, num_annotations // annotations_per_image)
+    images = [{"id": i, "file_name": f"{i:012d}.jpg", "width": 640, "height": 480} for i in range(1, num_images + 1)]
+    categories = [{"id": i, "name": f"category{i}", "supercategory": "category"} for i in range(1, num_categories + 1)]
+    annotations = []
+    for i in range(1, num_annotations + 1):
+        w = rng.randint(1, 320)
+        h = rng.randint(1, 240)
+        x = rng.randint(0, 640 - w)
+        y = rng.randint(0, 480 - h)
+        annotations.append(
+            {
+                "id": i,
+                "image_id": rng.randint(1, num_images),
+                "category_id": rng.randint(1, num_categories),
+                "segmentation": [[x, y, x + w, y, x + w, y + h, x, y + h]],
+                "area": w * h,
+                "bbox": [x, y, w, h],
+                "iscrowd": 0,
+            }
+        )
+    return {"info": {}, "licenses": [], "images": images, "categories": categories, "annotations": annotations}
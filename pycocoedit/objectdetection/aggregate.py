@@ -0,0 +1,118 @@
+"""
+Per-image statistics of annotations.
+
+``ImageAnnotationStats`` summarizes the annotations of each image in a single
+pass: the number of annotations per category, the smallest and largest area and
+whether the image has a crowd annotation. The aggregation filters of
+``pycocoedit.objectdetection.filter`` use it to filter images by their annotations.
+"""
+
+from collections import defaultdict
+from collections.abc import Sequence
+
+from pycocoedit.objectdetection.columnar import AnnotationColumns, np
+
+
+class ImageAnnotationStats:
+    """
+    Statistics of the annotations of each image.
+
+    Columnar annotations are aggregated with NumPy, annotation dictionaries in one loop.
+
+    Parameters
+    ----------
+    annotations : Sequence[dict]
+        Annotation dictionaries or ``AnnotationColumns``.
+
+    Attributes
+    ----------
+    category_counts : dict[int, dict[int, int]]
+        Mapping from image ID to the number of annotations of each category ID.
+    min_area : dict[int, float]
+        Mapping from image ID to the smallest ``area`` of its annotations.
+    max_area : dict[int, float]
+        Mapping from image ID to the largest ``area`` of its annotations.
+    crowd_image_ids : frozenset[int]
+        IDs of the images with an annotation with ``iscrowd`` set to 1.
+
+    Notes
+    -----
+    Images without annotations do not appear in the mappings.
+    """
+
+    def __init__(self, annotations: Sequence[dict]):
+        if isinstance(annotations, AnnotationColumns):
+            self._aggregate_columns(annotations)
+            return
+        category_counts: defaultdict[int, defaultdict[int, int]] = defaultdict(lambda: defaultdict(int))
+        min_area: dict[int, float] = {}
+        max_area: dict[int, float] = {}
+        crowd_image_ids: set[int] = set()
+        for ann in annotations:
+            image_id = ann["image_id"]
+            area = ann["area"]
+            category_counts[image_id][ann["category_id"]] += 1
+            if image_id not in min_area:
+                min_area[image_id] = max_area[image_id] = area
+            elif area < min_area[image_id]:
+                min_area[image_id] = area
+            elif area > max_area[image_id]:
+                max_area[image_id] = area
+            if ann.get("iscrowd") == 1:
+                crowd_image_ids.add(image_id)
+        self.category_counts: dict[int, dict[int, int]] = {
+            image_id: dict(counts) for image_id, counts in category_counts.items()
+        }
+        self.min_area = min_area
+        self.max_area = max_area
+        self.crowd_image_ids = frozenset(crowd_image_ids)
+
+    def _aggregate_columns(self, columns: AnnotationColumns) -> None:
+        """Aggregate columnar annotations with NumPy."""
+        self.category_counts = {}
+        self.min_area = {}
+        self.max_area = {}
+        self.crowd_image_ids = frozenset(np.unique(columns.image_id[columns.iscrowd == 1]).tolist())
+        if len(columns) == 0:
+            return
+        order = np.lexsort((columns.category_id, columns.image_id))
+        image_ids = columns.image_id[order]
+        category_ids = columns.category_id[order]
+        areas = columns.area[order]
+
+        # runs of equal (image, category) and of equal image in the sorted annotations
+        pair_starts = np.flatnonzero(
+            np.concatenate([[True], (image_ids[1:] != image_ids[:-1]) | (category_ids[1:] != category_ids[:-1])])
+        )
+        pair_counts = np.diff(np.append(pair_starts, len(order)))
+        for image_id, category_id, count in zip(
+            image_ids[pair_starts].tolist(), category_ids[pair_starts].tolist(), pair_counts.tolist()
+        ):
+            self.category_counts.setdefault(image_id, {})[category_id] = count
+        image_starts = np.flatnonzero(np.concatenate([[True], image_ids[1:] != image_ids[:-1]]))
+        starts = image_ids[image_starts].tolist()
+        self.min_area = dict(zip(starts, np.minimum.reduceat(areas, image_starts).tolist()))
+        self.max_area = dict(zip(starts, np.maximum.reduceat(areas, image_starts).tolist()))
+
+    def count(self, image_id: int, category_ids: frozenset[int] | None = None) -> int:
+        """
+        Return the number of annotations of an image.
+
+        Parameters
+        ----------
+        image_id : int
+            The image ID.
+        category_ids : frozenset[int] or None, optional
+            Only count annotations of these categories, default is None (all categories).
+
+        Returns
+        -------
+        int
+            The number of annotations, 0 for an image without annotations.
+        """
+        counts = self.category_counts.get(image_id)
+        if not counts:
+            return 0
+        if category_ids is None:
+            return sum(counts.values())
+        return sum(count for category_id, count in counts.items() if category_id in category_ids)
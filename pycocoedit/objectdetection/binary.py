@@ -0,0 +1,214 @@
+"""
+Binary on-disk format for COCO datasets.
+
+A binary file holds a dataset with columnar annotations (see ``AnnotationColumns``)
+in a form that loads without parsing:
+
+- an 8 byte magic string and the length of the header as a little-endian uint64,
+- a JSON header with the info, licenses, images and categories and the layout of the arrays,
+- the annotation columns as raw NumPy arrays, each aligned to 64 bytes,
+- ``segmentation`` and the extra keys of each annotation, encoded as JSON one element
+  at a time, with an array of offsets.
+
+``read_binary`` memory-maps the file: the arrays are views of the mapped pages, so
+opening a file costs time proportional to the images and categories only, and
+processes opening the same file share its pages. Segmentations are decoded on access.
+Requires NumPy.
+"""
+
+import json
+import mmap
+import struct
+from collections.abc import Iterator, Sequence
+from typing import IO, Any, overload
+
+from pycocoedit.objectdetection.columnar import AnnotationColumns, np, require_numpy
+from pycocoedit.objectdetection.stream import get_encoder
+
+MAGIC = b"PCOCOB1\0"
+"""First bytes of a binary file."""
+
+_ALIGNMENT = 64
+_ARRAY_NAMES = ("id", "image_id", "category_id", "area", "iscrowd", "bbox")
+
+
+class EncodedList(Sequence[Any]):
+    """
+    Read-only sequence of values stored as JSON, decoded when accessed.
+
+    Parameters
+    ----------
+    buffer : bytes-like
+        Concatenated JSON encodings of the values.
+    offsets : np.ndarray
+        Start of each value in ``buffer`` and end of the last one, shape (N + 1,).
+    """
+
+    def __init__(self, buffer: Any, offsets: "np.ndarray"):
+        self.buffer = memoryview(buffer)
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        """Return the number of values."""
+        return len(self.offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "EncodedList": ...
+
+    def __getitem__(self, index: int | slice) -> Any:
+        """Decode a value, or return a slice of the values without decoding them."""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return EncodedList(self.buffer, self.offsets[start : max(start, stop) + 1])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("EncodedList index out of range")
+        return json.loads(self.buffer[int(self.offsets[index]) : int(self.offsets[index + 1])].tobytes())
+
+    def __iter__(self) -> Iterator[Any]:
+        """Decode the values one by one."""
+        for i in range(len(self)):
+            yield self[i]
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        """Pickle the encodings of the values, a memoryview of a mapped file cannot be pickled."""
+        return EncodedList, _encode_list(self, None)
+
+
+def _encode_list(values: Sequence[Any], encode: Any) -> tuple[bytes, "np.ndarray"]:
+    """Encode values one by one, returning the concatenated encodings and their offsets."""
+    if isinstance(values, EncodedList):
+        start, stop = int(values.offsets[0]), int(values.offsets[-1])
+        return values.buffer[start:stop].tobytes(), values.offsets - start
+    encoded = [encode(value) for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+def write_binary(dataset: dict[str, Any], f: IO[bytes]) -> None:
+    """
+    Write a dataset in the binary format.
+
+    Parameters
+    ----------
+    dataset : dict[str, Any]
+        The dataset. Its annotations must be ``AnnotationColumns``.
+    f : IO[bytes]
+        File object opened in binary mode.
+    """
+    require_numpy()
+    columns: AnnotationColumns = dataset["annotations"]
+    encode = get_encoder("auto")
+    segmentation, segmentation_offsets = _encode_list(columns.segmentation, encode)
+    extras, extras_offsets = _encode_list(columns.extras, encode)
+    arrays: dict[str, Any] = {name: np.ascontiguousarray(getattr(columns, name)) for name in _ARRAY_NAMES}
+    arrays["segmentation_offsets"] = segmentation_offsets
+    arrays["extras_offsets"] = extras_offsets
+    # present only when needed to restore the exact values and key order, see AnnotationColumns
+    if columns.int_mask is not None:
+        arrays["int_mask"] = np.ascontiguousarray(columns.int_mask)
+    if columns.layout is not None:
+        arrays["layout"] = np.ascontiguousarray(columns.layout)
+    blobs = {
+        "segmentation": np.frombuffer(segmentation, dtype=np.uint8),
+        "extras": np.frombuffer(extras, dtype=np.uint8),
+    }
+
+    # the offsets in the header are relative to the start of the data section
+    layout: dict[str, dict[str, Any]] = {}
+    position = 0
+    for name, array in {**arrays, **blobs}.items():
+        position = -(-position // _ALIGNMENT) * _ALIGNMENT
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position += array.nbytes
+    header = {
+        "version": 1,
+        "info": dataset.get("info", {}),
+        "licenses": dataset.get("licenses", []),
+        "images": dataset["images"],
+        "categories": dataset["categories"],
+        "arrays": layout,
+        "layouts": columns.layouts,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    f.write(MAGIC)
+    f.write(struct.pack("<Q", len(header_bytes)))
+    f.write(header_bytes)
+    start = len(MAGIC) + 8 + len(header_bytes)
+    padding = -start % _ALIGNMENT
+    f.write(b"\0" * padding)
+    written = 0
+    for name, array in {**arrays, **blobs}.items():
+        f.write(b"\0" * (layout[name]["offset"] - written))
+        f.write(array.tobytes())
+        written = layout[name]["offset"] + array.nbytes
+
+
+def read_binary(path: str, use_mmap: bool = True) -> dict[str, Any]:
+    """
+    Read a dataset written by ``write_binary``.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+    use_mmap : bool, optional
+        Whether to memory-map the file, default is True. Otherwise the file is read into memory.
+
+    Returns
+    -------
+    dict[str, Any]
+        The dataset, with the annotations as ``AnnotationColumns``. The arrays are read-only.
+
+    Raises
+    ------
+    ValueError
+        If the file is not in the binary format.
+    """
+    require_numpy()
+    with open(path, "rb") as f:
+        if use_mmap:
+            buffer: Any = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+    view = memoryview(buffer)
+    if len(view) < len(MAGIC) + 8 or view[: len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError(f"Not a pycocoedit binary file: {path}")
+    (header_size,) = struct.unpack("<Q", view[len(MAGIC) : len(MAGIC) + 8])
+    header_end = len(MAGIC) + 8 + header_size
+    header = json.loads(view[len(MAGIC) + 8 : header_end].tobytes())
+    data_start = header_end + (-header_end % _ALIGNMENT)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + spec["offset"])
+        arrays[name] = array.reshape(spec["shape"])
+    columns = AnnotationColumns(
+        id=arrays["id"],
+        image_id=arrays["image_id"],
+        category_id=arrays["category_id"],
+        area=arrays["area"],
+        iscrowd=arrays["iscrowd"],
+        bbox=arrays["bbox"],
+        segmentation=EncodedList(arrays["segmentation"], arrays["segmentation_offsets"]),
+        extras=EncodedList(arrays["extras"], arrays["extras_offsets"]),
+        int_mask=arrays.get("int_mask"),
+        layout=arrays.get("layout"),
+        layouts=[tuple(keys) for keys in header.get("layouts", [])],
+    )
+    return {
+        "info": header["info"],
+        "licenses": header["licenses"],
+        "images": header["images"],
+        "categories": header["categories"],
+        "annotations": columns,
+    }
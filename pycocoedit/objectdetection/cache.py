@@ -0,0 +1,179 @@
+"""
+On-disk cache of parsed datasets.
+
+``DatasetCache`` stores datasets loaded from JSON files in the binary format
+(see ``pycocoedit.objectdetection.binary``), keyed by the source file. Loading
+an unchanged file again with ``CocoData(path, cache=...)`` maps the cached
+binary file instead of parsing and validating the JSON. Requires NumPy.
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Any
+
+from pycocoedit.objectdetection.binary import read_binary, write_binary
+from pycocoedit.objectdetection.columnar import require_numpy
+from pycocoedit.objectdetection.merge import file_digest
+
+CACHE_KEYS: tuple[str, ...] = ("stat", "content")
+"""Supported values of the ``key`` argument of ``DatasetCache``."""
+
+_SUFFIX = ".pcoco"
+
+
+class DatasetCache:
+    """
+    Directory of cached datasets with a size cap and least recently used eviction.
+
+    Parameters
+    ----------
+    directory : str
+        Cache directory, created if it does not exist. It can be shared by processes.
+    max_bytes : int, optional
+        Maximum total size of the cached files, default is 10G. When a new entry
+        exceeds it, the least recently used entries are removed.
+    key : str, optional
+        How a source file is identified, default is ``"stat"``.
+
+        - ``"stat"``: absolute path, modification time and size; cheap, but a file
+          rewritten with the same size within the timestamp resolution is not detected.
+        - ``"content"``: hash of the file contents; reads the whole file on every lookup.
+
+    Raises
+    ------
+    ValueError
+        If ``key`` is not supported or ``max_bytes`` is not positive.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 10 << 30, key: str = "stat"):
+        if key not in CACHE_KEYS:
+            raise ValueError(f"Unknown cache key: {key}. Use one of {CACHE_KEYS}.")
+        if max_bytes < 1:
+            raise ValueError(f"max_bytes must be positive. max_bytes: {max_bytes}")
+        require_numpy()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.key = key
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_path(self, source: str, variant: str = "") -> str:
+        """
+        Return the path of the cache entry of a source file.
+
+        Parameters
+        ----------
+        source : str
+            Path to the source file.
+        variant : str, optional
+            Distinguishes entries of the same file loaded differently, e.g. the validation mode.
+
+        Returns
+        -------
+        str
+            Path of the entry, which may not exist.
+        """
+        if self.key == "content":
+            identity = f"content:{file_digest(source)}"
+        else:
+            stat = os.stat(source)
+            identity = f"stat:{os.path.abspath(source)}:{stat.st_mtime_ns}:{stat.st_size}"
+        digest = hashlib.blake2b(f"{identity}:{variant}".encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, digest + _SUFFIX)
+
+    def get(self, source: str, variant: str = "") -> dict[str, Any] | None:
+        """
+        Load the cached dataset of a source file.
+
+        Parameters
+        ----------
+        source : str
+            Path to the source file.
+        variant : str, optional
+            See ``entry_path``.
+
+        Returns
+        -------
+        dict[str, Any] or None
+            The dataset with columnar annotations (see ``read_binary``), or None if it is not cached.
+        """
+        path = self.entry_path(source, variant)
+        try:
+            dataset = read_binary(path)
+        except (OSError, ValueError):
+            # missing, or removed or truncated by another process
+            return None
+        try:
+            # the modification time of an entry is its last use
+            os.utime(path)
+        except OSError:  # pragma: no cover - evicted concurrently
+            pass
+        return dataset
+
+    def put(self, source: str, dataset: dict[str, Any], variant: str = "") -> str:
+        """
+        Store a dataset and evict the least recently used entries if the cache is too large.
+
+        Parameters
+        ----------
+        source : str
+            Path to the source file the dataset was loaded from.
+        dataset : dict[str, Any]
+            The dataset, with columnar annotations.
+        variant : str, optional
+            See ``entry_path``.
+
+        Returns
+        -------
+        str
+            Path of the entry.
+        """
+        path = self.entry_path(source, variant)
+        # write to a temporary file so that readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write_binary(dataset, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: str | None = None) -> None:
+        """
+        Remove the least recently used entries until the cache fits in ``max_bytes``.
+
+        Parameters
+        ----------
+        keep : str or None, optional
+            Entry that is never removed, e.g. the one just written.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # pragma: no cover - evicted concurrently
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:  # pragma: no cover - evicted concurrently
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for name in os.listdir(self.directory):
+            if name.endswith(_SUFFIX):
+                os.unlink(os.path.join(self.directory, name))
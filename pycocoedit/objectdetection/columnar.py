@@ -0,0 +1,440 @@
+"""
+Columnar storage for COCO annotations.
+
+This module provides a struct-of-arrays representation of annotations.
+The numeric fields are stored in NumPy arrays, which takes a fraction of the
+memory of a list of dictionaries and allows vectorized operations.
+NumPy is an optional dependency, install it with ``pip install pycocoedit[numpy]``.
+"""
+
+from collections.abc import Iterator, Sequence
+from typing import Any, overload
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None  # type: ignore[assignment]
+
+_COLUMN_KEYS = frozenset(["id", "image_id", "category_id", "segmentation", "area", "bbox", "iscrowd"])
+# order of the keys of the dictionaries built by ``to_records``, followed by the extra keys
+_RECORD_KEYS = ("id", "image_id", "category_id", "segmentation", "area", "bbox", "iscrowd")
+
+
+def _default_layout(keys: tuple[str, ...]) -> bool:
+    """Return whether ``to_records`` rebuilds a dictionary with these keys in this order."""
+    present = [key for key in _RECORD_KEYS if key in keys]
+    return list(keys[: len(present)]) == present and all(key not in _COLUMN_KEYS for key in keys[len(present) :])
+
+
+def require_numpy() -> None:
+    """
+    Check that NumPy is installed.
+
+    Raises
+    ------
+    ImportError
+        If NumPy is not installed.
+    """
+    if np is None:  # pragma: no cover
+        raise ImportError("This feature requires numpy. Install it with `pip install pycocoedit[numpy]`.")
+
+
+class AnnotationColumns(Sequence[dict]):
+    """
+    Struct-of-arrays storage of COCO annotations.
+
+    ``id``, ``image_id``, ``category_id``, ``area``, ``iscrowd`` and ``bbox``
+    are stored in NumPy arrays. ``segmentation`` and any other key are kept in
+    side stores. Indexing with an integer returns the annotation as a new
+    dictionary, indexing with a slice, an index array or a boolean mask
+    returns a new ``AnnotationColumns``.
+
+    Parameters
+    ----------
+    id : np.ndarray
+        Annotation IDs, shape (N,).
+    image_id : np.ndarray
+        Image IDs, shape (N,).
+    category_id : np.ndarray
+        Category IDs, shape (N,).
+    area : np.ndarray
+        Areas, shape (N,).
+    iscrowd : np.ndarray
+        ``iscrowd`` flags, shape (N,). -1 means the key is absent.
+    bbox : np.ndarray
+        Bounding boxes as ``[x, y, width, height]``, shape (N, 4).
+    segmentation : Sequence
+        Segmentations.
+    extras : Sequence[dict or None]
+        Other keys of each annotation, None if there are none.
+    int_mask : np.ndarray or None, optional
+        Whether ``area`` and each ``bbox`` value of each annotation is an integer, shape (N, 5).
+        Only read for float64 columns, so that integers stored in them are restored as
+        integers. None if no value of a float64 column is an integer.
+    layout : np.ndarray or None, optional
+        Index in ``layouts`` of the key order of each annotation, -1 for the order of
+        ``to_records``, shape (N,). None if all annotations use the order of ``to_records``.
+    layouts : Sequence[tuple[str, ...]], optional
+        Key orders referenced by ``layout``.
+
+    Raises
+    ------
+    ValueError
+        If the columns do not have the same length.
+    """
+
+    def __init__(
+        self,
+        id: "np.ndarray",
+        image_id: "np.ndarray",
+        category_id: "np.ndarray",
+        area: "np.ndarray",
+        iscrowd: "np.ndarray",
+        bbox: "np.ndarray",
+        segmentation: Sequence,
+        extras: Sequence[dict | None],
+        int_mask: "np.ndarray | None" = None,
+        layout: "np.ndarray | None" = None,
+        layouts: Sequence[tuple[str, ...]] = (),
+    ):
+        require_numpy()
+        n = len(id)
+        lengths = [len(image_id), len(category_id), len(area), len(iscrowd), len(bbox), len(segmentation), len(extras)]
+        if any(length != n for length in lengths) or bbox.shape[1:] != (4,):
+            raise ValueError("All columns must have the same length and bbox must have shape (N, 4).")
+        self.id = id
+        self.image_id = image_id
+        self.category_id = category_id
+        self.area = area
+        self.iscrowd = iscrowd
+        self.bbox = bbox
+        self.segmentation = segmentation
+        self.extras = extras
+        self.int_mask = int_mask
+        self.layout = layout
+        self.layouts: list[tuple[str, ...]] = list(layouts)
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict]) -> "AnnotationColumns":
+        """
+        Build columns from annotation dictionaries.
+
+        ``area`` and ``bbox`` are stored as int64 when all values are integers and
+        as float64 otherwise; integers stored as float64 are recorded in ``int_mask``.
+        ``to_records`` restores the values and the order of the keys exactly.
+
+        Parameters
+        ----------
+        records : Sequence[dict]
+            Annotation dictionaries.
+
+        Returns
+        -------
+        AnnotationColumns
+            The columns.
+
+        Raises
+        ------
+        ValueError
+            If a bbox does not have 4 elements.
+        """
+        require_numpy()
+        n = len(records)
+        bbox = np.array([r["bbox"] for r in records]).reshape(-1, 4) if n else np.zeros((0, 4), dtype=np.int64)
+        if bbox.dtype == object or len(bbox) != n:
+            raise ValueError("Every bbox must have 4 elements.")
+        area = np.array([r["area"] for r in records]) if n else np.zeros(0, dtype=np.int64)
+        int_mask = None
+        if area.dtype.kind == "f" or bbox.dtype.kind == "f":
+            int_mask = np.empty((n, 5), dtype=bool)
+            int_mask[:, 0] = np.fromiter((isinstance(r["area"], int) for r in records), dtype=bool, count=n)
+            int_mask[:, 1:] = np.fromiter(
+                (isinstance(v, int) for r in records for v in r["bbox"]), dtype=bool, count=4 * n
+            ).reshape(n, 4)
+            if not (area.dtype.kind == "f" and int_mask[:, 0].any()) and not (
+                bbox.dtype.kind == "f" and int_mask[:, 1:].any()
+            ):
+                int_mask = None
+        extras: list[dict | None] = []
+        layouts: list[tuple[str, ...]] = []
+        codes: dict[tuple[str, ...], int] = {}
+        layout = np.empty(n, dtype=np.int32)
+        for i, r in enumerate(records):
+            extra = {k: v for k, v in r.items() if k not in _COLUMN_KEYS}
+            extras.append(extra or None)
+            keys = tuple(r)
+            code = codes.get(keys)
+            if code is None:
+                if _default_layout(keys):
+                    code = -1
+                else:
+                    code = len(layouts)
+                    layouts.append(keys)
+                codes[keys] = code
+            layout[i] = code
+        return cls(
+            id=np.fromiter((r["id"] for r in records), dtype=np.int64, count=n),
+            image_id=np.fromiter((r["image_id"] for r in records), dtype=np.int64, count=n),
+            category_id=np.fromiter((r["category_id"] for r in records), dtype=np.int64, count=n),
+            area=area,
+            iscrowd=np.fromiter((r.get("iscrowd", -1) for r in records), dtype=np.int8, count=n),
+            bbox=bbox,
+            segmentation=[r["segmentation"] for r in records],
+            extras=extras,
+            int_mask=int_mask,
+            layout=layout if layouts else None,
+            layouts=layouts,
+        )
+
+    @classmethod
+    def concatenate(cls, columns: Sequence["AnnotationColumns"]) -> "AnnotationColumns":
+        """
+        Concatenate columns.
+
+        Parameters
+        ----------
+        columns : Sequence[AnnotationColumns]
+            The columns to concatenate, at least one.
+
+        Returns
+        -------
+        AnnotationColumns
+            The annotations of all columns, in order.
+        """
+        require_numpy()
+        area = np.concatenate([c.area for c in columns])
+        bbox = np.concatenate([c.bbox for c in columns])
+        int_mask = None
+        if any(c.int_mask is not None or c.area.dtype != area.dtype or c.bbox.dtype != bbox.dtype for c in columns):
+            int_mask = np.concatenate([c._int_mask() for c in columns])
+        layout = None
+        layouts: dict[tuple[str, ...], int] = {}
+        if any(c.layout is not None for c in columns):
+            parts = []
+            for c in columns:
+                if c.layout is None:
+                    parts.append(np.full(len(c), -1, dtype=np.int32))
+                    continue
+                remap = np.array([layouts.setdefault(keys, len(layouts)) for keys in c.layouts] + [-1], dtype=np.int32)
+                parts.append(remap[c.layout])
+            layout = np.concatenate(parts)
+        return cls(
+            id=np.concatenate([c.id for c in columns]),
+            image_id=np.concatenate([c.image_id for c in columns]),
+            category_id=np.concatenate([c.category_id for c in columns]),
+            area=area,
+            iscrowd=np.concatenate([c.iscrowd for c in columns]),
+            bbox=bbox,
+            segmentation=[s for c in columns for s in c.segmentation],
+            extras=[e for c in columns for e in c.extras],
+            int_mask=int_mask,
+            layout=layout,
+            layouts=list(layouts),
+        )
+
+    def _int_mask(self) -> "np.ndarray":
+        """Return whether ``area`` and each ``bbox`` value is an integer, shape (N, 5)."""
+        if self.int_mask is not None:
+            mask = self.int_mask.copy()
+        else:
+            mask = np.zeros((len(self), 5), dtype=bool)
+        if self.area.dtype.kind in "iu":
+            mask[:, 0] = True
+        if self.bbox.dtype.kind in "iu":
+            mask[:, 1:] = True
+        return mask
+
+    def to_records(self) -> list[dict]:
+        """
+        Convert the columns to annotation dictionaries.
+
+        Returns
+        -------
+        list[dict]
+            New annotation dictionaries.
+        """
+        records = []
+        areas = self.area.tolist()
+        bboxes = self.bbox.tolist()
+        if self.int_mask is not None:
+            # integers stored in float64 columns
+            if self.area.dtype.kind == "f":
+                for i in np.flatnonzero(self.int_mask[:, 0]).tolist():
+                    areas[i] = int(areas[i])
+            if self.bbox.dtype.kind == "f":
+                for i, j in np.argwhere(self.int_mask[:, 1:]).tolist():
+                    bboxes[i][j] = int(bboxes[i][j])
+        columns = zip(
+            self.id.tolist(),
+            self.image_id.tolist(),
+            self.category_id.tolist(),
+            self.segmentation,
+            areas,
+            bboxes,
+            self.iscrowd.tolist(),
+            self.extras,
+        )
+        for id_, image_id, category_id, segmentation, area, bbox, iscrowd, extra in columns:
+            record = {
+                "id": id_,
+                "image_id": image_id,
+                "category_id": category_id,
+                "segmentation": segmentation,
+                "area": area,
+                "bbox": bbox,
+            }
+            if iscrowd >= 0:
+                record["iscrowd"] = iscrowd
+            if extra:
+                record.update(extra)
+            records.append(record)
+        if self.layout is not None:
+            layouts = self.layouts
+            for i in np.flatnonzero(self.layout >= 0).tolist():
+                record = records[i]
+                records[i] = {key: record[key] for key in layouts[self.layout[i]]}
+        return records
+
+    def take(self, indices: Any) -> "AnnotationColumns":
+        """
+        Select annotations.
+
+        Parameters
+        ----------
+        indices : array-like of int or bool, or slice
+            Positions to select or a boolean mask.
+
+        Returns
+        -------
+        AnnotationColumns
+            The selected annotations, in the order of ``indices``.
+        """
+        segmentation: Sequence
+        extras: Sequence[dict | None]
+        if not isinstance(indices, slice):
+            indices = np.asarray(indices)
+            if indices.dtype == bool:
+                indices = np.flatnonzero(indices)
+            positions = indices.tolist()
+            segmentation = [self.segmentation[i] for i in positions]
+            extras = [self.extras[i] for i in positions]
+        else:
+            segmentation = self.segmentation[indices]
+            extras = self.extras[indices]
+        return AnnotationColumns(
+            id=self.id[indices],
+            image_id=self.image_id[indices],
+            category_id=self.category_id[indices],
+            area=self.area[indices],
+            iscrowd=self.iscrowd[indices],
+            bbox=self.bbox[indices],
+            segmentation=segmentation,
+            extras=extras,
+            int_mask=None if self.int_mask is None else self.int_mask[indices],
+            layout=None if self.layout is None else self.layout[indices],
+            layouts=self.layouts,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes used by the NumPy arrays."""
+        arrays = [
+            self.id,
+            self.image_id,
+            self.category_id,
+            self.area,
+            self.iscrowd,
+            self.bbox,
+            self.int_mask,
+            self.layout,
+        ]
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def __len__(self) -> int:
+        """Return the number of annotations."""
+        return len(self.id)
+
+    @overload
+    def __getitem__(self, index: int) -> dict: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "AnnotationColumns": ...
+
+    def __getitem__(self, index: int | slice) -> "dict | AnnotationColumns":
+        """Return an annotation as a dictionary, or a slice of the annotations as columns."""
+        if isinstance(index, slice):
+            return self.take(index)
+        return self.take([index]).to_records()[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        """Iterate over the annotations as dictionaries."""
+        # convert block by block to bound the number of live dictionaries
+        for start in range(0, len(self), 4096):
+            yield from self.take(slice(start, start + 4096)).to_records()
+
+
+def annotation_array(annotations: Sequence[dict], key: str) -> "np.ndarray":
+    """
+    Return a field of annotations as a NumPy array.
+
+    Parameters
+    ----------
+    annotations : Sequence[dict]
+        Annotation dictionaries or ``AnnotationColumns``.
+    key : str
+        ``"bbox"``, returned as float64 with shape (N, 4), or an integer field such as
+        ``"image_id"`` or ``"category_id"``, returned as an array of shape (N,).
+
+    Returns
+    -------
+    np.ndarray
+        The field of each annotation.
+    """
+    require_numpy()
+    if key == "bbox":
+        if isinstance(annotations, AnnotationColumns):
+            return np.asarray(annotations.bbox, dtype=np.float64)
+        return np.array([d["bbox"] for d in annotations], dtype=np.float64).reshape(-1, 4)
+    if isinstance(annotations, AnnotationColumns):
+        return np.asarray(getattr(annotations, key))
+    return np.fromiter((d[key] for d in annotations), dtype=np.int64, count=len(annotations))
+
+
+class ImageSizes:
+    """
+    Lookup table from image ID to image width and height.
+
+    Parameters
+    ----------
+    images : Sequence[dict]
+        Image dictionaries with ``id``, ``width`` and ``height``.
+    """
+
+    def __init__(self, images: Sequence[dict]):
+        require_numpy()
+        ids = np.fromiter((img["id"] for img in images), dtype=np.int64, count=len(images))
+        sizes = np.array([(img["width"], img["height"]) for img in images], dtype=np.float64).reshape(-1, 2)
+        order = np.argsort(ids, kind="stable")
+        self.ids = ids[order]
+        self.widths = sizes[order, 0]
+        self.heights = sizes[order, 1]
+
+    def lookup(self, image_ids: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+        """
+        Return the width and height of images.
+
+        Parameters
+        ----------
+        image_ids : np.ndarray
+            Image IDs.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Widths and heights as float64, NaN for unknown images.
+        """
+        if len(self.ids) == 0:
+            return np.full(len(image_ids), np.nan), np.full(len(image_ids), np.nan)
+        positions = np.minimum(np.searchsorted(self.ids, image_ids), len(self.ids) - 1)
+        found = self.ids[positions] == image_ids
+        return np.where(found, self.widths[positions], np.nan), np.where(found, self.heights[positions], np.nan)
@@ -5,12 +5,36 @@ This module provides functions and classes for managing and editing
 COCO format datasets for object detection tasks.
 """
 
-import copy
+import hashlib
 import json
+import os
 import random
-from typing import Any
+import tempfile
+from array import array
+from collections import defaultdict
+from collections.abc import Collection, Hashable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from copy import deepcopy
+from typing import IO, Any, Callable, cast
 
-from pycocoedit.objectdetection.filter import BaseFilter, Filters, TargetType
+from pycocoedit.objectdetection.aggregate import ImageAnnotationStats
+from pycocoedit.objectdetection.binary import read_binary, write_binary
+from pycocoedit.objectdetection.cache import DatasetCache
+from pycocoedit.objectdetection.columnar import AnnotationColumns, np, require_numpy
+from pycocoedit.objectdetection.filter import BaseFilter, Filters, Mask, TargetType
+from pycocoedit.objectdetection.merge import CocoMerger
+from pycocoedit.objectdetection.spatial import SpatialIndex
+from pycocoedit.objectdetection.stream import (
+    STREAMED_KEYS,
+    dump_dataset,
+    infer_compression,
+    iter_dataset,
+    open_dataset,
+)
+
+_IMAGE_KEYS = ["id", "file_name", "width", "height"]
+_CATEGORY_KEYS = ["id", "name", "supercategory"]
+_ANNOTATION_KEYS = ["id", "image_id", "category_id", "bbox", "area", "segmentation"]
 
 
 def _validate_keys(data: list[dict], required_keys: list[str], target: str) -> None:
@@ -31,9 +55,11 @@ def _validate_keys(data: list[dict], required_keys: list[str], target: str) -> N
     KeyError
         If any dictionary is missing required keys.
     """
+    required = frozenset(required_keys)
     for d in data:
-        missing_keys = [key for key in required_keys if key not in d]
-        if missing_keys:
+        # set comparison on the keys view runs in C, the message is only built on failure
+        if not d.keys() >= required:
+            missing_keys = [key for key in required_keys if key not in d]
             raise KeyError(f"Missing keys {missing_keys} in {target} with ID: {d.get('id', 'Unknown')}")
 
 
@@ -51,8 +77,7 @@ def validate_images(images: list[dict]) -> None:
     KeyError
         If any image dictionary is missing required keys "id", "file_name", "width", or "height".
     """
-    required_keys = ["id", "file_name", "width", "height"]
-    _validate_keys(images, required_keys, "image")
+    _validate_keys(images, _IMAGE_KEYS, "image")
 
 
 def validate_categories(categories: list[dict]) -> None:
@@ -69,8 +94,7 @@ def validate_categories(categories: list[dict]) -> None:
     KeyError
         If any category dictionary is missing required keys "id", "name" or "supercategory".
     """
-    required_keys = ["id", "name", "supercategory"]
-    _validate_keys(categories, required_keys, "category")
+    _validate_keys(categories, _CATEGORY_KEYS, "category")
 
 
 def validate_annotations(annotations: list[dict]) -> None:
@@ -88,8 +112,344 @@ def validate_annotations(annotations: list[dict]) -> None:
         If any annotation dictionary is missing required keys "id",
         "image_id", "category_id", "bbox", "area" or "segmentation".
     """
-    required_keys = ["id", "image_id", "category_id", "bbox", "area", "segmentation"]
-    _validate_keys(annotations, required_keys, "annotation")
+    _validate_keys(annotations, _ANNOTATION_KEYS, "annotation")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_dataset(dataset: dict[str, Any]) -> list[str]:
+    """
+    Validate a COCO dataset thoroughly and collect all errors.
+
+    In addition to the required keys checked by ``validate_images``,
+    ``validate_categories`` and ``validate_annotations``, this checks
+
+    - the types of the required fields (integer IDs, string names, numeric sizes and areas),
+    - that each bbox is a list of 4 numbers with non-negative width and height,
+    - that segmentation is a list (polygons) or a dictionary (RLE),
+    - that IDs are unique within images, categories and annotations,
+    - that every annotation refers to an existing image and category.
+
+    Each list is traversed once.
+
+    Parameters
+    ----------
+    dataset : dict[str, Any]
+        The dataset to validate.
+
+    Returns
+    -------
+    list[str]
+        Error messages, empty if the dataset is valid.
+    """
+    errors: list[str] = []
+    lists = {}
+    for key in ("images", "categories", "annotations"):
+        value = dataset.get(key)
+        if not isinstance(value, list):
+            errors.append(f"'{key}' must be a list")
+            value = []
+        lists[key] = value
+
+    def check_record(d: Any, target: str, required: frozenset[str], required_keys: list[str], ids: set) -> bool:
+        if not isinstance(d, dict):
+            errors.append(f"{target} must be a dictionary: {d!r}")
+            return False
+        if not d.keys() >= required:
+            missing_keys = [key for key in required_keys if key not in d]
+            errors.append(f"Missing keys {missing_keys} in {target} with ID: {d.get('id', 'Unknown')}")
+            return False
+        if not _is_int(d["id"]):
+            errors.append(f"{target} ID must be an integer: {d['id']!r}")
+        elif d["id"] in ids:
+            errors.append(f"Duplicate {target} ID: {d['id']}")
+        else:
+            ids.add(d["id"])
+        return True
+
+    image_ids: set = set()
+    image_keys = frozenset(_IMAGE_KEYS)
+    for img in lists["images"]:
+        if not check_record(img, "image", image_keys, _IMAGE_KEYS, image_ids):
+            continue
+        if not isinstance(img["file_name"], str):
+            errors.append(f"image file_name must be a string in image with ID: {img['id']}")
+        if not _is_number(img["width"]) or not _is_number(img["height"]):
+            errors.append(f"image width and height must be numbers in image with ID: {img['id']}")
+
+    category_ids: set = set()
+    category_keys = frozenset(_CATEGORY_KEYS)
+    for cat in lists["categories"]:
+        if not check_record(cat, "category", category_keys, _CATEGORY_KEYS, category_ids):
+            continue
+        if not isinstance(cat["name"], str):
+            errors.append(f"category name must be a string in category with ID: {cat['id']}")
+
+    annotation_ids: set = set()
+    annotation_keys = frozenset(_ANNOTATION_KEYS)
+    for ann in lists["annotations"]:
+        if not check_record(ann, "annotation", annotation_keys, _ANNOTATION_KEYS, annotation_ids):
+            continue
+        ann_id = ann["id"]
+        if ann["image_id"] not in image_ids:
+            errors.append(f"annotation with ID: {ann_id} refers to a missing image ID: {ann['image_id']!r}")
+        if ann["category_id"] not in category_ids:
+            errors.append(f"annotation with ID: {ann_id} refers to a missing category ID: {ann['category_id']!r}")
+        if not _is_number(ann["area"]):
+            errors.append(f"annotation area must be a number in annotation with ID: {ann_id}")
+        bbox = ann["bbox"]
+        if not (isinstance(bbox, list) and len(bbox) == 4 and all(_is_number(v) for v in bbox)):
+            errors.append(f"annotation bbox must be a list of 4 numbers in annotation with ID: {ann_id}")
+        elif bbox[2] < 0 or bbox[3] < 0:
+            errors.append(f"annotation bbox width and height must not be negative in annotation with ID: {ann_id}")
+        if not isinstance(ann["segmentation"], (list, dict)):
+            errors.append(f"annotation segmentation must be a list or a dictionary in annotation with ID: {ann_id}")
+    return errors
+
+
+VALIDATION_MODES: tuple[str, ...] = ("keys", "lazy", "full", "none")
+"""Supported values of the ``validate`` argument of ``CocoData``."""
+
+
+COPY_POLICIES: tuple[str, ...] = ("deep", "shallow", "cow", "none")
+"""Supported values of the ``copy`` argument of ``CocoData``."""
+
+
+def _copy_dataset(dataset: dict[str, Any], policy: str) -> dict[str, Any]:
+    """
+    Copy a dataset dictionary according to a copy policy.
+
+    Parameters
+    ----------
+    dataset : dict[str, Any]
+        The dataset to copy.
+    policy : str
+        One of ``COPY_POLICIES``.
+
+    Returns
+    -------
+    dict[str, Any]
+        The copied dataset.
+
+    Raises
+    ------
+    ValueError
+        If the policy is not supported.
+    """
+    if policy == "deep":
+        return deepcopy(dataset)
+    if policy == "shallow":
+        copied: dict[str, Any] = {}
+        for key, value in dataset.items():
+            if key in STREAMED_KEYS:
+                copied[key] = [dict(d) for d in value]
+            elif isinstance(value, (dict, list)):
+                copied[key] = value.copy()
+            else:
+                copied[key] = value
+        return copied
+    if policy == "cow":
+        return {key: list(value) if key in STREAMED_KEYS else value for key, value in dataset.items()}
+    if policy == "none":
+        return dataset
+    raise ValueError(f"Unknown copy policy: {policy}. Use one of {list(COPY_POLICIES)}.")
+
+
+SAMPLING_MODES: tuple[str, ...] = ("uniform", "balanced", "proportional", "min_per_category")
+"""Supported values of the ``mode`` argument of ``CocoData.sample``."""
+
+
+def _random(seed: int | None) -> random.Random:
+    """Return a generator seeded with seed, or the global generator of ``random`` when seed is None."""
+    if seed is None:
+        # the module functions share one generator, so random.seed makes the draws reproducible
+        return cast(random.Random, random)
+    return random.Random(seed)
+
+
+def _lazy_shuffle(rng: random.Random, population: Sequence) -> Iterator:
+    """
+    Yield the elements of population in random order.
+
+    A Fisher-Yates shuffle that swaps lazily, so drawing k elements costs O(k)
+    regardless of the size of the population.
+    """
+    n = len(population)
+    swapped: dict[int, int] = {}
+    for i in range(n):
+        j = rng.randrange(i, n)
+        yield population[swapped.get(j, j)]
+        swapped[j] = swapped.get(i, i)
+
+
+def _largest_remainder(total: int, weights: dict[int, float], rng: random.Random) -> dict[int, int]:
+    """Split total into integer quotas proportional to weights, ties broken at random."""
+    weight_sum = sum(weights.values())
+    if not weight_sum:
+        return {key: 0 for key in weights}
+    exact = {key: total * weight / weight_sum for key, weight in weights.items()}
+    quotas = {key: int(value) for key, value in exact.items()}
+    keys = list(weights)
+    rng.shuffle(keys)
+    keys.sort(key=lambda key: quotas[key] - exact[key])
+    for key in keys[: total - sum(quotas.values())]:
+        quotas[key] += 1
+    return quotas
+
+
+_STREAM_SECTIONS: dict[str, tuple[TargetType, frozenset[str], list[str], str]] = {
+    "images": (TargetType.IMAGE, frozenset(_IMAGE_KEYS), _IMAGE_KEYS, "image"),
+    "categories": (TargetType.CATEGORY, frozenset(_CATEGORY_KEYS), _CATEGORY_KEYS, "category"),
+    "annotations": (TargetType.ANNOTATION, frozenset(_ANNOTATION_KEYS), _ANNOTATION_KEYS, "annotation"),
+}
+
+
+def _iter_filtered(
+    file_path: str, filters: list[BaseFilter], chunk_size: int, skip: Collection[str] = ()
+) -> Iterator[tuple[str, Any]]:
+    """
+    Stream a JSON dataset file, validating and filtering images, categories and annotations.
+
+    Yields (key, element) for the kept elements of the streamed arrays and
+    (key, value) for the other top-level keys, see ``iter_dataset``. The
+    elements of the arrays named in ``skip`` are decoded but neither validated
+    nor yielded. Raises ValueError for a filter that is not ``streamable``.
+    """
+    for filter_ in filters:
+        if not filter_.streamable:
+            raise ValueError(
+                f"{type(filter_).__name__} needs the whole dataset and cannot be applied while streaming. "
+                "Load the dataset and use apply_filter instead."
+            )
+    all_filters: dict[TargetType, Filters] = {target: Filters() for target in TargetType}
+    for filter_ in filters:
+        all_filters[filter_.target_type].add(filter_)
+    with open_dataset(file_path) as f:
+        for key, value in iter_dataset(f, chunk_size):
+            if key in skip:
+                continue
+            if key not in _STREAM_SECTIONS:
+                yield key, value
+                continue
+            target_type, required, required_keys, target = _STREAM_SECTIONS[key]
+            if not value.keys() >= required:
+                _validate_keys([value], required_keys, target)
+            if all_filters[target_type].passes(value):
+                yield key, value
+
+
+MANIFEST_NAME = "manifest.json"
+"""File name of the manifest written by ``CocoData.save_shards``."""
+
+MANIFEST_FORMAT = "pycocoedit-shards/1"
+"""Format identifier stored in the manifest."""
+
+
+def _write_shard(path: str, dataset: dict[str, Any], chunk_size: int, encoder: str) -> int:
+    """Write a shard and return its size in bytes; a module-level function so that it can run in a process pool."""
+    with open(path, "wb", buffering=1 << 20) as f:
+        dump_dataset(dataset, f, chunk_size=chunk_size, encoder=encoder)
+        return f.tell()
+
+
+def _open_output(file_path: str, buffer_size: int, compression: str | None, threads: int) -> IO[bytes]:
+    """Open a JSON output file, compressed according to ``compression``, see ``open_dataset``."""
+    if compression == "infer":
+        compression = infer_compression(file_path)
+    if compression is None:
+        return open(file_path, "wb", buffering=buffer_size)
+    return open_dataset(file_path, "wb", compression=compression, threads=threads)
+
+
+def _load_shard(path: str, validate: bool, columnar: bool) -> dict[str, Any]:
+    """Load and validate a shard, a module-level function so that it can run in a process pool."""
+    with open_dataset(path) as f:
+        dataset = json.load(f)
+    if validate:
+        validate_images(dataset["images"])
+        validate_categories(dataset["categories"])
+        validate_annotations(dataset["annotations"])
+    if columnar:
+        dataset["annotations"] = AnnotationColumns.from_records(dataset["annotations"])
+    return dataset
+
+
+def _hash_unit(seed: int, key: Hashable) -> float:
+    """Map a key to a float in [0, 1) that depends only on the seed and the key."""
+    digest = hashlib.blake2b(repr((seed, key)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+def _all(mask: Mask) -> bool:
+    """Return whether all elements of a mask are True."""
+    return all(mask) if isinstance(mask, list) else bool(mask.all())
+
+
+def _select(data: Sequence[dict], mask: Mask) -> list[dict] | AnnotationColumns:
+    """
+    Select the elements of data where the mask is True.
+
+    Parameters
+    ----------
+    data : Sequence[dict]
+        A list of dictionaries or ``AnnotationColumns``.
+    mask : Mask
+        Boolean mask with one element per element of data.
+
+    Returns
+    -------
+    list[dict] or AnnotationColumns
+        The selected elements, columns if data are columns.
+    """
+    if isinstance(data, AnnotationColumns):
+        return data.take(np.asarray(mask, dtype=bool))
+    return [d for d, keep in zip(data, mask) if keep]
+
+
+def _referenced_annotations(
+    annotations: Sequence[dict], image_ids: Collection, category_ids: Collection
+) -> tuple[Mask, set, set]:
+    """
+    Find the annotations whose image and category exist.
+
+    Parameters
+    ----------
+    annotations : Sequence[dict]
+        A list of annotation dictionaries or ``AnnotationColumns``.
+    image_ids : Collection
+        IDs of the existing images.
+    category_ids : Collection
+        IDs of the existing categories.
+
+    Returns
+    -------
+    tuple[Mask, set, set]
+        Mask of the annotations to keep, and the image IDs and category IDs
+        referenced by the kept annotations.
+    """
+    if isinstance(annotations, AnnotationColumns):
+        mask = np.isin(annotations.category_id, list(category_ids)) & np.isin(annotations.image_id, list(image_ids))
+        used_image_ids = set(np.unique(annotations.image_id[mask]).tolist())
+        used_category_ids = set(np.unique(annotations.category_id[mask]).tolist())
+        return mask, used_image_ids, used_category_ids
+    keep = []
+    used_image_ids = set()
+    used_category_ids = set()
+    for ann in annotations:
+        img_id = ann["image_id"]
+        cat_id = ann["category_id"]
+        referenced = cat_id in category_ids and img_id in image_ids
+        keep.append(referenced)
+        if referenced:
+            used_image_ids.add(img_id)
+            used_category_ids.add(cat_id)
+    return keep, used_image_ids, used_category_ids
 
 
 class CocoData:
@@ -104,29 +464,117 @@ class CocoData:
     annotation : str or dict[str, Any]
         Either a file path to a JSON COCO dataset file or
         a dictionary containing the dataset.
+    copy : str, optional
+        How a dictionary passed as ``annotation`` is copied, default is ``"deep"``.
+        Ignored when ``annotation`` is a file path.
+
+        - ``"deep"``: deep copy of the whole dataset.
+        - ``"shallow"``: copy of the lists and of each image, category and annotation
+          dictionary; nested values such as ``bbox`` and ``segmentation`` are shared.
+        - ``"cow"``: copy of the lists only; the dictionaries are shared (copy-on-write).
+        - ``"none"``: no copy, the lists are taken over as they are.
+
+        CocoData never modifies an image, category or annotation dictionary in place:
+        operations that change one replace it with a modified copy. With ``"cow"`` the
+        passed dataset is therefore left unchanged while only the replaced records are
+        copied. With ``"none"`` the passed lists may be modified.
+    validate : str, optional
+        How the dataset is validated, default is ``"keys"``.
+
+        - ``"keys"``: check that images, categories and annotations have the required keys.
+        - ``"lazy"``: the same check, deferred to the first operation on the data
+          (filtering, correcting, sampling, saving, building an index or a view).
+        - ``"full"``: check keys, types, bboxes, duplicate IDs and references between
+          annotations and images/categories, see ``validate_dataset``.
+        - ``"none"``: no validation, for trusted input.
+    cache : DatasetCache or None, optional
+        Cache of parsed datasets, default is None. Ignored when ``annotation`` is a
+        dictionary. If the file is cached, the cached binary file is memory-mapped
+        instead of parsing and validating the JSON; otherwise the parsed and validated
+        dataset is added to the cache. A dataset loaded through the cache stores its
+        annotations in columnar form (see ``to_columnar``). Requires NumPy.
 
     Raises
     ------
     KeyError
         If the dataset is missing required keys or entries with required fields.
+    ValueError
+        If ``copy`` or ``validate`` is not supported, or if ``validate="full"``
+        and the dataset is invalid.
     """
 
-    def __init__(self, annotation: str | dict[str, Any]):
+    def __init__(
+        self,
+        annotation: str | dict[str, Any],
+        copy: str = "deep",
+        validate: str = "keys",
+        cache: DatasetCache | None = None,
+    ):
         """Initialize a CocoData object from a file path or dictionary."""
+        if validate not in VALIDATION_MODES:
+            raise ValueError(f"Unknown validation mode: {validate}. Use one of {VALIDATION_MODES}.")
         if isinstance(annotation, dict):
-            dataset = copy.deepcopy(annotation)
+            dataset = _copy_dataset(annotation, copy)
+        elif cache is not None:
+            self._load_cached(annotation, validate, cache)
+            return
         else:
-            with open(annotation) as f:
+            with open_dataset(annotation) as f:
                 dataset = json.load(f)
-        self.images: list[dict] = dataset["images"]
-        self.annotations: list[dict] = dataset["annotations"]
-        self.categories: list[dict] = dataset["categories"]
+        self._setup(dataset, validate)
+
+    def _load_cached(self, file_path: str, validate: str, cache: DatasetCache) -> None:
+        """Initialize from the cache entry of a file, parsing and caching the file if there is none."""
+        # entries are validated before they are stored, a lazy validation runs at once
+        variant = "keys" if validate == "lazy" else validate
+        dataset = cache.get(file_path, variant)
+        if dataset is None:
+            with open_dataset(file_path) as f:
+                parsed = json.load(f)
+            self._setup(parsed, variant)
+            columns = AnnotationColumns.from_records(self._annotations)
+            cache.put(file_path, {**self.get_dataset(), "annotations": columns}, variant)
+            self._set_annotation_columns(columns)
+            return
+        self._setup({**dataset, "annotations": []}, validate="none")
+        self._set_annotation_columns(dataset["annotations"])
+
+    def _setup(self, dataset: dict[str, Any], validate: str = "keys") -> None:
+        """
+        Initialize the attributes from a dataset dictionary.
+
+        Parameters
+        ----------
+        dataset : dict[str, Any]
+            The dataset. Its lists are used as is, without copying.
+        validate : str, optional
+            Validation mode, see ``CocoData``, default is ``"keys"``.
+        """
+        # lazily built indexes, see ``_get_index``
+        self._indexes: dict[str, tuple[tuple, Any]] = {}
+        self._generations: dict[str, int] = {"images": 0, "annotations": 0, "categories": 0}
+        # lists replaced through the properties since the filters were last applied
+        self._reassigned: set[TargetType] = set()
+        # columnar storage of the annotations, see ``to_columnar``
+        self._annotation_columns: AnnotationColumns | None = None
+
+        self._images: list[dict]
+        self._annotations: list[dict]
+        self._categories: list[dict]
+        self._set_target(TargetType.IMAGE, dataset["images"])
+        self._set_target(TargetType.ANNOTATION, dataset["annotations"])
+        self._set_target(TargetType.CATEGORY, dataset["categories"])
         self.licenses: list[dict] = dataset.get("licenses", [])
         self.info: dict[str, Any] = dataset.get("info", {})
 
-        validate_images(self.images)
-        validate_categories(self.categories)
-        validate_annotations(self.annotations)
+        self._pending_validation = validate == "lazy"
+        if validate == "keys":
+            self._validate_keys()
+        elif validate == "full":
+            errors = validate_dataset(dataset)
+            if errors:
+                shown = "; ".join(errors[:5])
+                raise ValueError(f"Invalid dataset, {len(errors)} error(s): {shown}")
 
         self.image_filters: Filters = Filters()
         self.category_filters: Filters = Filters()
@@ -134,224 +582,1815 @@ class CocoData:
 
         self.filter_applied = False
 
-    def add_filter(self, filter_: BaseFilter) -> "CocoData":
+    def _validate_keys(self) -> None:
+        """Check the required keys of the images, categories and annotations."""
+        validate_images(self.images)
+        validate_categories(self.categories)
+        validate_annotations(self._annotations)
+
+    def _ensure_validated(self) -> None:
+        """Run the validation deferred by ``validate="lazy"``, if it has not run yet."""
+        if self._pending_validation:
+            self._validate_keys()
+            self._pending_validation = False
+
+    @classmethod
+    def from_stream(cls, file_path: str, filters: Iterable[BaseFilter] = (), chunk_size: int = 1 << 20) -> "CocoData":
         """
-        Add a filter.
+        Load a dataset from a JSON file incrementally, applying filters while reading.
+
+        The ``images``, ``annotations`` and ``categories`` arrays are decoded one
+        element at a time and each element is validated and passed through the
+        filters of its target type. Rejected elements are discarded immediately,
+        so peak memory is bounded by the size of the kept data rather than the
+        size of the file.
+
+        The filters are registered on the returned object as already applied.
 
         Parameters
         ----------
-        filter_ : BaseFilter
-            The filter to add.
+        file_path : str
+            Path to a JSON COCO dataset file.
+        filters : Iterable[BaseFilter], optional
+            Filters to apply while reading, default is no filter.
+        chunk_size : int, optional
+            Number of characters read from the file at a time, default is 1M.
 
         Returns
         -------
         CocoData
-            Self reference for method chaining.
-        """
-        if filter_.target_type == TargetType.IMAGE:
-            self.image_filters.add(filter_)
-        if filter_.target_type == TargetType.CATEGORY:
-            self.category_filters.add(filter_)
-        if filter_.target_type == TargetType.ANNOTATION:
-            self.annotation_filters.add(filter_)
+            The loaded dataset.
 
-        # a new filter means filters need to be reapplied
-        self.filter_applied = False
-        return self
+        Raises
+        ------
+        KeyError
+            If an image, category or annotation is missing required fields.
+        ValueError
+            If the file is not valid JSON or a filter is not ``streamable`` (see ``BaseFilter``).
+        """
+        filters = list(filters)
+        dataset: dict[str, Any] = {"images": [], "annotations": [], "categories": []}
+        for key, value in _iter_filtered(file_path, filters, chunk_size):
+            if key in STREAMED_KEYS:
+                dataset[key].append(value)
+            else:
+                dataset[key] = value
+        return cls._from_filtered(dataset, filters)
 
-    def apply_filter(self) -> "CocoData":
+    @classmethod
+    def sample_stream(
+        cls,
+        file_path: str,
+        n: int,
+        seed: int | None = None,
+        filters: Iterable[BaseFilter] = (),
+        correct_image: bool = True,
+        correct_category: bool = False,
+        chunk_size: int = 1 << 20,
+    ) -> "CocoData":
         """
-        Apply all added filters to the dataset.
+        Sample n images from a JSON file without loading the whole dataset.
 
-        This method processes all filters, both inclusion and exclusion,
-        across all data types (images, categories, annotations).
+        The file is streamed twice. The first pass draws the images by reservoir
+        sampling and keeps the categories; the second pass keeps only the
+        annotations of the sampled images. Peak memory is bounded by the size of
+        the sample, so a small subset can be drawn from a file much larger than
+        memory. As in ``from_stream``, the filters are applied while reading.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to a JSON COCO dataset file.
+        n : int
+            Number of images to sample.
+        seed : int or None, optional
+            Random seed, default is None (the global generator of ``random``, see ``random.seed``).
+        filters : Iterable[BaseFilter], optional
+            Filters to apply while reading, default is no filter.
+        correct_image : bool, optional
+            Whether to remove images with no annotations, default is True.
+        correct_category : bool, optional
+            Whether to remove categories with no annotations, default is False.
+        chunk_size : int, optional
+            Number of characters read from the file at a time, default is 1M.
 
         Returns
         -------
         CocoData
-            Self reference for method chaining.
+            The sampled dataset, in file order.
+
+        Raises
+        ------
+        KeyError
+            If an image, category or annotation is missing required fields.
+        ValueError
+            If the file is not valid JSON, a filter is not ``streamable`` (see ``BaseFilter``)
+            or n is greater than the number of (filtered) images.
         """
-        targets: list[list[dict]] = [
-            self.images,
-            self.categories,
-            self.annotations,
-        ]
-        all_filters: list[Filters] = [
-            self.image_filters,
-            self.category_filters,
-            self.annotation_filters,
-        ]
+        filters = list(filters)
+        rng = _random(seed)
+        dataset: dict[str, Any] = {"images": [], "annotations": [], "categories": []}
+        # reservoir of (position in the file, image), Algorithm R
+        reservoir: list[tuple[int, dict]] = []
+        num_images = 0
+        for key, value in _iter_filtered(file_path, filters, chunk_size, skip=("annotations",)):
+            if key == "images":
+                if num_images < n:
+                    reservoir.append((num_images, value))
+                else:
+                    j = rng.randrange(num_images + 1)
+                    if j < n:
+                        reservoir[j] = (num_images, value)
+                num_images += 1
+            elif key == "categories":
+                dataset[key].append(value)
+            else:
+                dataset[key] = value
+        if n > num_images:
+            raise ValueError(
+                f"Number of images to sample is greater than the number of images in the dataset. n: {n}, number of images: {num_images}"
+            )
+        dataset["images"] = [img for _, img in sorted(reservoir, key=lambda item: item[0])]
 
-        def update(index: int, new_data: list[dict]):
-            """
-            Update the appropriate data list based on index.
-
-            Parameters
-            ----------
-            index : int
-                Index indicating which data list to update.
-            new_data : list[dict]
-                New data to replace the current list.
-            """
-            if index == 0:
-                self.images = new_data
-            if index == 1:
-                self.categories = new_data
-            if index == 2:
-                self.annotations = new_data
-
-        for i in range(len(targets)):
-            filters: Filters = all_filters[i]
-            include_filters: list[BaseFilter] = filters.include_filters
-            exclude_filters: list[BaseFilter] = filters.exclude_filters
-            if len(include_filters) != 0:
-                new_dicts = []
-                for d in targets[i]:
-                    for include_filter in include_filters:
-                        if include_filter.apply(d):
-                            new_dicts.append(d)
-                            break
-                update(i, new_dicts)
-            if len(exclude_filters) != 0:
-                new_dicts = []
-                for d in targets[i]:
-                    should_exclude = any(ex_f.apply(d) for ex_f in exclude_filters)
-                    if not should_exclude:
-                        new_dicts.append(d)
-                update(i, new_dicts)
+        image_ids = {img["id"] for img in dataset["images"]}
+        for key, value in _iter_filtered(file_path, filters, chunk_size, skip=("images", "categories")):
+            if key == "annotations" and value["image_id"] in image_ids:
+                dataset[key].append(value)
 
-        self.filter_applied = True
-        return self
+        coco_data = cls._from_filtered(dataset, filters)
+        return coco_data.correct(correct_image, correct_category)
 
-    def correct(self, correct_image: bool = True, correct_category: bool = False) -> "CocoData":
+    @classmethod
+    def _from_filtered(cls, dataset: dict[str, Any], filters: list[BaseFilter]) -> "CocoData":
+        """Create a CocoData from already filtered data, registering the filters as applied."""
+        coco_data = cls.__new__(cls)
+        coco_data._setup(dataset, validate="none")
+        for filter_ in filters:
+            coco_data.add_filter(filter_)
+        for target_filters in [coco_data.image_filters, coco_data.category_filters, coco_data.annotation_filters]:
+            target_filters.mark_applied()
+        coco_data.filter_applied = True
+        return coco_data
+
+    @classmethod
+    def load_shards(
+        cls,
+        paths_or_manifest: str | Sequence[str],
+        workers: int = 1,
+        columnar: bool = False,
+        validate: str = "keys",
+    ) -> "CocoData":
         """
-        Ensure dataset consistency after filtering.
+        Load a dataset saved as several JSON files, parsing the files in parallel.
 
-        This method removes annotations with category IDs not in categories,
-        annotations with image IDs not in images, and optionally removes
-        images with no annotations and categories with no annotations.
+        The shards are parsed, and validated, in a process pool, so the loading time
+        decreases with the number of cores instead of being bound by a single
+        ``json.load``. With ``columnar=True`` the annotations are converted to columns
+        in the workers (see ``to_columnar``), which also makes passing them back to the
+        main process much cheaper.
+
+        The shards are concatenated in order; their image and annotation IDs must not
+        collide, as is the case for shards written by ``save_shards``. To combine
+        independent datasets use ``merge``. The info and licenses are those of the
+        first shard.
 
         Parameters
         ----------
-        correct_image : bool, optional
-            Whether to remove images that have no annotations, default is True.
-        correct_category : bool, optional
-            Whether to remove categories that have no annotations, default is False.
+        paths_or_manifest : str or Sequence[str]
+            Path of a manifest written by ``save_shards``, or paths of the shards.
+        workers : int, optional
+            Number of processes parsing the shards, default is 1 (in the calling process).
+        columnar : bool, optional
+            Whether to store the annotations in columnar form, default is False. Requires NumPy.
+        validate : str, optional
+            ``"keys"`` to check the required keys in the workers or ``"none"``, default is ``"keys"``.
 
         Returns
         -------
         CocoData
-            Self reference for method chaining.
-        """
-        if not self.filter_applied:
-            self.apply_filter()
+            The loaded dataset.
 
-        # Remove annotations with category_id not in categories
-        cat_ids = [cat["id"] for cat in self.categories]
-        _annotations = []
-        for i in range(len(self.annotations)):
-            ann = self.annotations[i]
-            _cat_id = ann["category_id"]
-            if ann["category_id"] in cat_ids:
-                _annotations.append(ann)
-        self.annotations = _annotations
-
-        # Remove annotations with no images
-        img_ids = [img["id"] for img in self.images]
-        _annotations = []
-        for i in range(len(self.annotations)):
-            ann = self.annotations[i]
-            _img_id = ann["image_id"]
-            if ann["image_id"] in img_ids:
-                _annotations.append(ann)
-        self.annotations = _annotations
+        Raises
+        ------
+        KeyError
+            If an image, category or annotation is missing required fields.
+        ValueError
+            If ``validate`` is not supported, or if the shards have different categories with the same ID.
+        """
+        if validate not in ("keys", "none"):
+            raise ValueError(f"Unsupported validation mode for shards: {validate}. Use 'keys' or 'none'.")
+        if columnar:
+            require_numpy()
+        if isinstance(paths_or_manifest, str):
+            with open(paths_or_manifest) as f:
+                manifest = json.load(f)
+            base_dir = os.path.dirname(paths_or_manifest)
+            paths = [os.path.join(base_dir, shard["path"]) for shard in manifest["shards"]]
+        else:
+            paths = list(paths_or_manifest)
 
-        if correct_image:
-            # Remove images with no annotations
-            img_ids = [ann["image_id"] for ann in self.annotations]
-            _images = []
-            for img in self.images:
-                if img["id"] in img_ids:
-                    _images.append(img)
-            self.images = _images
+        args = [(path, validate == "keys", columnar) for path in paths]
+        if workers <= 1 or len(paths) <= 1:
+            shards = [_load_shard(*arg) for arg in args]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+                shards = list(pool.map(_load_shard, *zip(*args)))
 
-        if correct_category:
-            # Remove categories with no annotations
-            cat_ids = [ann["category_id"] for ann in self.annotations]
-            _categories = []
-            for cat in self.categories:
-                if cat["id"] in cat_ids:
-                    _categories.append(cat)
-            self.categories = _categories
+        category_by_id: dict[int, dict] = {}
+        images: list[dict] = []
+        for shard in shards:
+            for cat in shard["categories"]:
+                known = category_by_id.setdefault(cat["id"], cat)
+                if known is not cat and known != cat:
+                    raise ValueError(f"Shards have different categories with ID: {cat['id']}")
+            images.extend(shard["images"])
 
-        return self
+        first = shards[0] if shards else {}
+        coco_data = cls.__new__(cls)
+        coco_data._setup(
+            {
+                "info": first.get("info", {}),
+                "licenses": first.get("licenses", []),
+                "images": images,
+                "categories": list(category_by_id.values()),
+                "annotations": [],
+            },
+            validate="none",
+        )
+        if columnar:
+            columns = [shard["annotations"] for shard in shards]
+            coco_data._set_annotation_columns(
+                AnnotationColumns.concatenate(columns) if columns else AnnotationColumns.from_records([])
+            )
+        else:
+            coco_data._set_annotations([ann for shard in shards for ann in shard["annotations"]])
+        return coco_data
 
-    def get_dataset(self) -> dict[str, Any]:
+    @classmethod
+    def merge(
+        cls,
+        datasets: Iterable["CocoData | str | dict[str, Any]"],
+        dedupe: str | Callable[[dict], Hashable] | None = "file_name",
+        image_dirs: Sequence[str] | None = None,
+    ) -> "CocoData":
         """
-        Get the dataset as a dictionary.
+        Merge several datasets into one.
+
+        Categories with the same name are unified, and images, categories and
+        annotations get new consecutive IDs, so the IDs of the inputs may collide.
+        Duplicate images are merged into the first one and keep the annotations of
+        all of them. See ``CocoMerger``. Only the data kept by the pending filters of
+        the inputs is merged; the filters are evaluated on views of the inputs.
+
+        Parameters
+        ----------
+        datasets : Iterable[CocoData, str or dict[str, Any]]
+            The datasets, as CocoData objects, file paths or dictionaries.
+        dedupe : str, Callable[[dict], Hashable] or None, optional
+            How duplicate images are detected: ``"file_name"``, ``"content"`` (hash of the
+            image file, requires ``image_dirs``), a function returning a key, or None to keep
+            all images, default is ``"file_name"``.
+        image_dirs : Sequence[str] or None, optional
+            Image directory of each dataset, used with ``dedupe="content"``.
 
         Returns
         -------
-        dict
-            Dataset including info, licenses, images, categories and annotations.
+        CocoData
+            The merged dataset. The inputs are not modified.
+
+        Raises
+        ------
+        ValueError
+            If ``dedupe`` is not supported, or is ``"content"`` without ``image_dirs``.
         """
-        return {
-            "info": self.info,
-            "licenses": self.licenses,
-            "images": self.images,
-            "categories": self.categories,
-            "annotations": self.annotations,
-        }
+        merger = CocoMerger(dedupe)
+        annotations: list[dict] = []
+        for i, dataset in enumerate(datasets):
+            coco_data = dataset if isinstance(dataset, CocoData) else CocoData(dataset, copy="none")
+            coco_data._ensure_validated()
+            kept = coco_data._pending_view()
+            source = merger.add_source(
+                kept.images,
+                kept.categories,
+                coco_data.licenses,
+                coco_data.info,
+                image_dirs[i] if image_dirs is not None else None,
+            )
+            for ann in kept._annotation_store():
+                remapped = merger.remap_annotation(source, ann)
+                if remapped is not None:
+                    annotations.append(remapped)
+        merged = cls.__new__(cls)
+        merged._setup(
+            {
+                "info": merger.info or {},
+                "licenses": merger.licenses,
+                "images": merger.images,
+                "categories": merger.categories,
+                "annotations": annotations,
+            },
+            validate="none",
+        )
+        return merged
 
-    def save(self, file_path: str, correct_image: bool = True, correct_category: bool = False) -> None:
+    @staticmethod
+    def merge_files(
+        file_paths: Sequence[str],
+        output_path: str,
+        dedupe: str | Callable[[dict], Hashable] | None = "file_name",
+        image_dirs: Sequence[str] | None = None,
+        chunk_size: int = 1 << 20,
+        encoder: str = "json",
+    ) -> None:
         """
-        Save the dataset to a JSON file.
+        Merge several JSON files into one without loading their annotations.
+
+        Each input is streamed twice: the first pass reads the images, categories
+        and licenses to build the ID mappings, the second pass remaps the
+        annotations and writes them to the output as they are read. Peak memory is
+        bounded by the images and categories, not by the annotations. The result is
+        the same as ``CocoData.merge(file_paths, ...).save(output_path, correct_image=False)``.
 
         Parameters
         ----------
-        file_path : str
-            Path where the JSON file will be saved.
-        correct_image : bool, optional
-            Whether to remove images with no annotations before saving, default is True.
-        correct_category : bool, optional
-            Whether to remove categories with no annotations before saving, default is False.
+        file_paths : Sequence[str]
+            Paths to the JSON COCO dataset files.
+        output_path : str
+            Path of the merged JSON file.
+        dedupe : str, Callable[[dict], Hashable] or None, optional
+            How duplicate images are detected, see ``merge``, default is ``"file_name"``.
+        image_dirs : Sequence[str] or None, optional
+            Image directory of each dataset, used with ``dedupe="content"``.
+        chunk_size : int, optional
+            Number of characters read from a file at a time, default is 1M.
+        encoder : str, optional
+            JSON encoder backend, see ``save``, default is ``"json"``.
+
+        Raises
+        ------
+        KeyError
+            If an image, category or annotation is missing required fields.
+        ValueError
+            If a file is not valid JSON, or ``dedupe`` is not supported.
         """
-        self.correct(correct_image=correct_image, correct_category=correct_category)
-        dataset = self.get_dataset()
-        with open(file_path, "w") as f:
-            json.dump(dataset, f)
+        merger = CocoMerger(dedupe)
+        for i, file_path in enumerate(file_paths):
+            dataset: dict[str, Any] = {"images": [], "categories": []}
+            for key, value in _iter_filtered(file_path, [], chunk_size, skip=("annotations",)):
+                if key in STREAMED_KEYS:
+                    dataset[key].append(value)
+                else:
+                    dataset[key] = value
+            merger.add_source(
+                dataset["images"],
+                dataset["categories"],
+                dataset.get("licenses", []),
+                dataset.get("info"),
+                image_dirs[i] if image_dirs is not None else None,
+            )
+
+        def annotations() -> Iterator[dict]:
+            for source, file_path in enumerate(file_paths):
+                for key, ann in _iter_filtered(file_path, [], chunk_size, skip=("images", "categories")):
+                    if key == "annotations":
+                        remapped = merger.remap_annotation(source, ann)
+                        if remapped is not None:
+                            yield remapped
+
+        merged = {
+            "info": merger.info or {},
+            "licenses": merger.licenses,
+            "images": merger.images,
+            "categories": merger.categories,
+            "annotations": annotations(),
+        }
+        with open_dataset(output_path, "wb") as f:
+            dump_dataset(merged, f, encoder=encoder)
+
+    @property
+    def images(self) -> list[dict]:
+        """List of image dictionaries."""
+        return self._images
+
+    @images.setter
+    def images(self, images: list[dict]) -> None:
+        self._set_target(TargetType.IMAGE, images)
+        self._reassign(TargetType.IMAGE)
 
-    def sample(self, n: int, correct_image: bool = True, correct_category: bool = False) -> dict[str, Any]:
+    @property
+    def annotations(self) -> list[dict]:
         """
-        Create a random sample of the dataset with n images.
+        List of annotation dictionaries.
 
-        Parameters
-        ----------
-        n : int
-            Number of images to sample.
-        correct_image : bool, optional
-            Whether to remove images with no annotations, default is True.
-        correct_category : bool, optional
-            Whether to remove categories with no annotations, default is False.
+        If the annotations are stored in columnar form (see ``to_columnar``),
+        this is a conversion of the columns to dictionaries, cached until the
+        annotations change. The columns stay the storage: modifying the list
+        does not modify them, assign a list to ``annotations`` to replace them.
+        """
+        return self._annotation_records()
+
+    @annotations.setter
+    def annotations(self, annotations: list[dict]) -> None:
+        self._set_target(TargetType.ANNOTATION, annotations)
+        self._reassign(TargetType.ANNOTATION)
+
+    def _annotation_records(self) -> list[dict]:
+        """Return the annotations as dictionaries without changing how they are stored."""
+        columns = self._annotation_columns
+        if columns is None:
+            return self._annotations
+        return self._get_index("annotation_records", ("annotations",), columns.to_records)
+
+    @property
+    def is_columnar(self) -> bool:
+        """Whether the annotations are stored in columnar form."""
+        return self._annotation_columns is not None
+
+    def to_columnar(self) -> "CocoData":
+        """
+        Store the annotations in columnar form.
+
+        ``id``, ``image_id``, ``category_id``, ``area``, ``iscrowd`` and ``bbox``
+        are moved to NumPy arrays (see ``AnnotationColumns``) and the annotation
+        dictionaries are released, which reduces memory usage considerably for
+        large datasets. ``correct``, ``sample`` and ``save`` work on the columns
+        directly; ``annotations`` returns a conversion to dictionaries.
+
+        Requires NumPy.
 
         Returns
         -------
-        dict
-            A new sampled dataset as a dictionary.
+        CocoData
+            Self reference for method chaining.
+        """
+        self._ensure_validated()
+        if self._annotation_columns is None:
+            columns = AnnotationColumns.from_records(self._annotations)
+            self._set_annotation_columns(columns)
+        return self
 
-        Raises
-        ------
-        ValueError
-            If n is greater than the number of images in the dataset.
+    def _set_annotation_columns(self, columns: AnnotationColumns) -> None:
+        """Replace the annotations with columns."""
+        self._annotations = []
+        self._annotation_columns = columns
+        self._generations["annotations"] += 1
+
+    def _set_annotations(self, annotations: list[dict] | AnnotationColumns) -> None:
+        """Replace the annotations with a list of dictionaries or columns."""
+        if isinstance(annotations, AnnotationColumns):
+            self._set_annotation_columns(annotations)
+        else:
+            self._set_target(TargetType.ANNOTATION, annotations)
+
+    @property
+    def annotation_columns(self) -> AnnotationColumns:
         """
-        if not self.filter_applied:
-            self.apply_filter()
+        Annotations in columnar form.
 
-        if n > len(self.images):
-            raise ValueError(
-                f"Number of images to sample is greater than the number of images in the dataset. n: {n}, number of images: {len(self.images)}"
-            )
+        If the annotations are stored as dictionaries, the columns are built
+        on first access and cached like the other indexes. Requires NumPy.
+        """
+        if self._annotation_columns is not None:
+            return self._annotation_columns
+        return self._get_index(
+            "annotation_columns", ("annotations",), lambda: AnnotationColumns.from_records(self._annotations)
+        )
 
-        self.images = random.sample(self.images, n)
-        self.correct(correct_image, correct_category)
-        return self.get_dataset()
+    def _annotation_store(self) -> list[dict] | AnnotationColumns:
+        """Return the annotations as they are stored, without converting them."""
+        if self._annotation_columns is not None:
+            return self._annotation_columns
+        return self._annotations
+
+    @property
+    def categories(self) -> list[dict]:
+        """List of category dictionaries."""
+        return self._categories
+
+    @categories.setter
+    def categories(self, categories: list[dict]) -> None:
+        self._set_target(TargetType.CATEGORY, categories)
+        self._reassign(TargetType.CATEGORY)
+
+    def _reassign(self, target_type: TargetType) -> None:
+        """Record that a list was replaced from outside, so that its filters are applied to it again."""
+        self._reassigned.add(target_type)
+        self.filter_applied = False
+
+    def _get_index(self, name: str, sources: tuple[str, ...], build: Callable[[], Any]) -> Any:
+        """
+        Return a cached index, building it if the source lists have changed.
+
+        An index is rebuilt when one of its source lists has been reassigned or
+        its length has changed since the index was built.
+
+        Parameters
+        ----------
+        name : str
+            Name of the index.
+        sources : tuple[str, ...]
+            Names of the lists the index is built from ("images", "annotations" or "categories").
+        build : Callable[[], Any]
+            Function that builds the index.
+
+        Returns
+        -------
+        Any
+            The index.
+        """
+        self._ensure_validated()
+        signature = self._signature(sources)
+        cached = self._indexes.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        index = build()
+        self._indexes[name] = (signature, index)
+        return index
+
+    def _signature(self, sources: tuple[str, ...] = ("images", "annotations", "categories")) -> tuple:
+        """Return a value that changes when one of the source lists is reassigned or changes in length."""
+        stores = {"images": self._images, "annotations": self._annotation_store(), "categories": self._categories}
+        return tuple((self._generations[source], len(stores[source])) for source in sources)
+
+    def invalidate_indexes(self) -> None:
+        """
+        Drop all cached indexes.
+
+        Indexes are rebuilt automatically when ``images``, ``annotations`` or
+        ``categories`` are reassigned or change in length. Call this method after
+        modifying the dictionaries themselves (e.g. changing an ``image_id``).
+        """
+        self._indexes.clear()
+
+    @property
+    def image_by_id(self) -> dict[int, dict]:
+        """Mapping from image ID to image dictionary."""
+        return self._get_index("image_by_id", ("images",), lambda: {img["id"]: img for img in self.images})
+
+    @property
+    def image_by_file_name(self) -> dict[str, dict]:
+        """Mapping from file name to image dictionary."""
+        return self._get_index(
+            "image_by_file_name", ("images",), lambda: {img["file_name"]: img for img in self.images}
+        )
+
+    @property
+    def category_by_id(self) -> dict[int, dict]:
+        """Mapping from category ID to category dictionary."""
+        return self._get_index("category_by_id", ("categories",), lambda: {cat["id"]: cat for cat in self.categories})
+
+    @property
+    def annotations_by_image(self) -> dict[int, list[dict]]:
+        """
+        Mapping from image ID to the annotations of the image.
+
+        Images without annotations are not included.
+        """
+
+        def build() -> dict[int, list[dict]]:
+            index: defaultdict[int, list[dict]] = defaultdict(list)
+            for ann in self._annotation_records():
+                index[ann["image_id"]].append(ann)
+            return dict(index)
+
+        return self._get_index("annotations_by_image", ("annotations",), build)
+
+    @property
+    def annotations_by_category(self) -> dict[int, list[dict]]:
+        """
+        Mapping from category ID to the annotations of the category.
+
+        Categories without annotations are not included.
+        """
+
+        def build() -> dict[int, list[dict]]:
+            index: defaultdict[int, list[dict]] = defaultdict(list)
+            for ann in self._annotation_records():
+                index[ann["category_id"]].append(ann)
+            return dict(index)
+
+        return self._get_index("annotations_by_category", ("annotations",), build)
+
+    @property
+    def image_ids_by_category(self) -> dict[int, list[int]]:
+        """
+        Mapping from category ID to the IDs of the images with an annotation of the category.
+
+        The image IDs are unique and in order of first appearance. Columnar
+        annotations are indexed without converting them.
+        """
+
+        def build() -> dict[int, list[int]]:
+            index: defaultdict[int, dict[int, None]] = defaultdict(dict)
+            for image_id, category_id in self._image_category_pairs():
+                index[category_id][image_id] = None
+            return {category_id: list(image_ids) for category_id, image_ids in index.items()}
+
+        return self._get_index("image_ids_by_category", ("annotations",), build)
+
+    def _category_ids_by_image(self) -> dict[int, list[int]]:
+        """Return a mapping from image ID to the category ID of each annotation of the image."""
+
+        def build() -> dict[int, list[int]]:
+            index: defaultdict[int, list[int]] = defaultdict(list)
+            for image_id, category_id in self._image_category_pairs():
+                index[image_id].append(category_id)
+            return dict(index)
+
+        return self._get_index("category_ids_by_image", ("annotations",), build)
+
+    def _image_category_pairs(self) -> Iterable[tuple[int, int]]:
+        """Return the (image ID, category ID) pair of each annotation without converting columns."""
+        annotations = self._annotation_store()
+        if isinstance(annotations, AnnotationColumns):
+            return zip(annotations.image_id.tolist(), annotations.category_id.tolist())
+        return ((ann["image_id"], ann["category_id"]) for ann in annotations)
+
+    def image_annotation_stats(self) -> ImageAnnotationStats:
+        """
+        Return the statistics of the annotations of each image, see ``ImageAnnotationStats``.
+
+        The statistics are computed in one pass over the annotations on first use
+        and cached like the other indexes.
+
+        Returns
+        -------
+        ImageAnnotationStats
+            The statistics.
+        """
+        return self._get_index(
+            "image_annotation_stats", ("annotations",), lambda: ImageAnnotationStats(self._annotation_store())
+        )
+
+    def spatial_index(self, normalized: bool = False, grid_size: int | None = None) -> SpatialIndex:
+        """
+        Return a spatial index of the bounding boxes of the annotations, see ``SpatialIndex``.
+
+        The index is built on first use and cached like the other indexes. Requires NumPy.
+
+        Parameters
+        ----------
+        normalized : bool, optional
+            Whether the boxes are indexed in coordinates normalized by the image size, default is False.
+        grid_size : int or None, optional
+            Number of cells along each axis, default is None (chosen from the median box size).
+
+        Returns
+        -------
+        SpatialIndex
+            The index. Its positions refer to ``annotations``.
+        """
+        sources = ("images", "annotations") if normalized else ("annotations",)
+        return self._get_index(
+            f"spatial_index:{normalized}:{grid_size}",
+            sources,
+            lambda: SpatialIndex(self._annotation_store(), self.images if normalized else None, grid_size),
+        )
+
+    def query_region(
+        self,
+        region: Sequence[float],
+        image_ids: Iterable[int] | None = None,
+        normalized: bool = False,
+        mode: str = "intersects",
+    ) -> list[dict]:
+        """
+        Find the annotations whose bounding box intersects or lies within a region.
+
+        Only the annotations in the cells of the spatial index covered by the region
+        are tested, see ``spatial_index``. Requires NumPy.
+
+        Parameters
+        ----------
+        region : Sequence[float]
+            The region as ``[x, y, width, height]``, e.g. ``[0, 0, 0.5, 0.5]`` with
+            ``normalized=True`` for the top-left quadrant of every image.
+        image_ids : Iterable[int] or None, optional
+            Only find annotations of these images, default is None (all images).
+        normalized : bool, optional
+            Whether the region is in coordinates normalized by the image size, default is False.
+        mode : str, optional
+            ``"intersects"`` or ``"within"``, see ``SpatialIndex.query``. Default is ``"intersects"``.
+
+        Returns
+        -------
+        list[dict]
+            The annotations found, in dataset order.
+        """
+        positions = self.spatial_index(normalized).query(region, image_ids, mode)
+        annotations = self._annotation_store()
+        if isinstance(annotations, AnnotationColumns):
+            return annotations.take(positions).to_records()
+        return [annotations[p] for p in positions.tolist()]
+
+    def view(self) -> "CocoView":
+        """
+        Create a view selecting the whole dataset.
+
+        Filtering, correcting or sampling the view creates new views and leaves
+        this object unchanged. See ``CocoView``.
+
+        Returns
+        -------
+        CocoView
+            A view of all images, categories and annotations.
+        """
+        self._ensure_validated()
+        return CocoView(self)
+
+    def add_filter(self, filter_: BaseFilter) -> "CocoData":
+        """
+        Add a filter.
+
+        Parameters
+        ----------
+        filter_ : BaseFilter
+            The filter to add.
+
+        Returns
+        -------
+        CocoData
+            Self reference for method chaining.
+        """
+        if filter_.target_type == TargetType.IMAGE:
+            self.image_filters.add(filter_)
+        if filter_.target_type == TargetType.CATEGORY:
+            self.category_filters.add(filter_)
+        if filter_.target_type == TargetType.ANNOTATION:
+            self.annotation_filters.add(filter_)
+
+        # a new filter means filters need to be reapplied
+        self.filter_applied = False
+        return self
+
+    def apply_filter(self, reapply: bool = False, workers: int = 1, executor: str = "process") -> "CocoData":
+        """
+        Apply all added filters to the dataset.
+
+        This method processes all filters, both inclusion and exclusion,
+        across all data types (images, categories, annotations).
+        Each data type is filtered in a single pass, see ``Filters.passes_batch``.
+
+        Filters are applied incrementally: a filter that has already been applied
+        is not evaluated again, so adding one more filter and calling this method
+        only evaluates the new filter on the remaining data. After ``images``,
+        ``categories`` or ``annotations`` has been replaced, all the filters of
+        that data type are evaluated again on the new list.
+
+        Parameters
+        ----------
+        reapply : bool, optional
+            Whether to evaluate all filters again, default is False.
+        workers : int, optional
+            Number of parallel workers evaluating the filters, default is 1 (serial).
+            Worthwhile for expensive filters, e.g. ones that read image files.
+        executor : str, optional
+            ``"process"`` to evaluate the filters in a process pool or ``"thread"`` for a
+            thread pool, default is ``"process"``. With processes the filters must be
+            picklable; a filter that is not is evaluated in the main process with a
+            ``RuntimeWarning``.
+
+        Returns
+        -------
+        CocoData
+            Self reference for method chaining.
+
+        Raises
+        ------
+        ValueError
+            If executor is not "process" or "thread".
+        """
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unknown executor: {executor}. Use 'process' or 'thread'.")
+        self._ensure_validated()
+        if workers <= 1:
+            return self._apply_filter(reapply, None, 1)
+        pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_class(max_workers=workers) as pool:
+            return self._apply_filter(reapply, pool, workers)
+
+    def _apply_filter(self, reapply: bool, pool: Executor | None, workers: int) -> "CocoData":
+        """Apply the filters, see ``apply_filter``."""
+        all_filters: list[tuple[TargetType, Filters]] = [
+            (TargetType.IMAGE, self.image_filters),
+            (TargetType.CATEGORY, self.category_filters),
+            (TargetType.ANNOTATION, self.annotation_filters),
+        ]
+        for target_type, target_filters in all_filters:
+            filters = target_filters if reapply or target_type in self._reassigned else target_filters.pending()
+            if filters.include_filters or filters.exclude_filters:
+                filters.prepare(self)
+                target = self._annotation_store() if target_type == TargetType.ANNOTATION else self._target(target_type)
+                mask = filters.passes_batch(target, executor=pool, workers=workers)
+                if target_type == TargetType.ANNOTATION and not all(mask):
+                    # columnar annotations are filtered without converting them to dictionaries
+                    self._set_annotations(_select(target, mask))
+                elif not all(mask):
+                    self._set_target(target_type, [d for d, keep in zip(target, mask) if keep])
+            # only once the data is filtered, so that filters interrupted by an error are applied again
+            target_filters.mark_applied()
+            self._reassigned.discard(target_type)
+
+        self.filter_applied = True
+        return self
+
+    def _pending_view(self) -> "CocoData | CocoView":
+        """Return the data kept by the pending filters without modifying self: self if no filter is pending."""
+        all_filters = [
+            (TargetType.IMAGE, self.image_filters),
+            (TargetType.CATEGORY, self.category_filters),
+            (TargetType.ANNOTATION, self.annotation_filters),
+        ]
+        pending = [
+            target_filters if target_type in self._reassigned else target_filters.pending()
+            for target_type, target_filters in all_filters
+        ]
+        if not any(filters.include_filters or filters.exclude_filters for filters in pending):
+            return self
+        view = self.view()
+        # one target at a time, in the order of apply_filter
+        for filters in pending:
+            view = view.filter(*filters.include_filters, *filters.exclude_filters)
+        return view
+
+    def _target(self, target_type: TargetType) -> list[dict]:
+        """Return the list of images, categories or annotations."""
+        if target_type == TargetType.IMAGE:
+            return self.images
+        if target_type == TargetType.CATEGORY:
+            return self.categories
+        return self.annotations
+
+    def _set_target(self, target_type: TargetType, data: list[dict]) -> None:
+        """Replace the list of images, categories or annotations, without marking it as reassigned."""
+        if target_type == TargetType.IMAGE:
+            self._images = data
+            self._generations["images"] += 1
+        if target_type == TargetType.CATEGORY:
+            self._categories = data
+            self._generations["categories"] += 1
+        if target_type == TargetType.ANNOTATION:
+            self._annotations = data
+            self._annotation_columns = None
+            self._generations["annotations"] += 1
+
+    def filter_report(self) -> list[dict]:
+        """
+        Report the statistics of the filters observed by ``apply_filter``.
+
+        Returns
+        -------
+        list[dict]
+            One dictionary per filter with the keys ``target``, ``filter`` (class name),
+            ``filter_type``, ``evaluated``, ``matched``, ``match_rate`` and ``seconds``.
+        """
+        all_filters: list[tuple[TargetType, Filters]] = [
+            (TargetType.IMAGE, self.image_filters),
+            (TargetType.CATEGORY, self.category_filters),
+            (TargetType.ANNOTATION, self.annotation_filters),
+        ]
+        return [
+            {"target": target_type.value, **row} for target_type, filters in all_filters for row in filters.report()
+        ]
+
+    def correct(self, correct_image: bool = True, correct_category: bool = False) -> "CocoData":
+        """
+        Ensure dataset consistency after filtering.
+
+        This method removes annotations with category IDs not in categories,
+        annotations with image IDs not in images, and optionally removes
+        images with no annotations and categories with no annotations.
+
+        Parameters
+        ----------
+        correct_image : bool, optional
+            Whether to remove images that have no annotations, default is True.
+        correct_category : bool, optional
+            Whether to remove categories that have no annotations, default is False.
+
+        Returns
+        -------
+        CocoData
+            Self reference for method chaining.
+        """
+        if not self.filter_applied:
+            self.apply_filter()
+
+        # Remove annotations whose category or image does not exist, collecting
+        # the ids that are still referenced in the same pass. The id sets are built
+        # here rather than taken from the cached indexes, which do not see elements
+        # replaced in place.
+        cat_ids = {cat["id"] for cat in self.categories}
+        img_ids = {img["id"] for img in self.images}
+        annotations = self._annotation_store()
+        mask, used_img_ids, used_cat_ids = _referenced_annotations(annotations, img_ids, cat_ids)
+        if not _all(mask):
+            self._set_annotations(_select(annotations, mask))
+
+        if correct_image:
+            # Remove images with no annotations
+            if len(used_img_ids) != len(img_ids):
+                self._set_target(TargetType.IMAGE, [img for img in self.images if img["id"] in used_img_ids])
+
+        if correct_category:
+            # Remove categories with no annotations
+            if len(used_cat_ids) != len(cat_ids):
+                self._set_target(TargetType.CATEGORY, [cat for cat in self.categories if cat["id"] in used_cat_ids])
+
+        return self
+
+    def get_dataset(self) -> dict[str, Any]:
+        """
+        Get the dataset as a dictionary.
+
+        Returns
+        -------
+        dict
+            Dataset including info, licenses, images, categories and annotations.
+        """
+        self._ensure_validated()
+        return {
+            "info": self.info,
+            "licenses": self.licenses,
+            "images": self.images,
+            "categories": self.categories,
+            "annotations": self.annotations,
+        }
+
+    def save(
+        self,
+        file_path: str,
+        correct_image: bool = True,
+        correct_category: bool = False,
+        chunk_size: int = 1000,
+        encoder: str = "json",
+        buffer_size: int = 1 << 20,
+        compression: str | None = "infer",
+        threads: int = 1,
+    ) -> None:
+        """
+        Save the dataset to a JSON file.
+
+        The images, categories and annotations are encoded ``chunk_size``
+        elements at a time and written through a buffered file, so the encoded
+        JSON document is never held in memory as a whole.
+
+        Parameters
+        ----------
+        file_path : str
+            Path where the JSON file will be saved.
+        correct_image : bool, optional
+            Whether to remove images with no annotations before saving, default is True.
+        correct_category : bool, optional
+            Whether to remove categories with no annotations before saving, default is False.
+        chunk_size : int, optional
+            Number of elements encoded at a time, default is 1000.
+        encoder : str, optional
+            JSON encoder backend, one of ``"json"``, ``"orjson"``, ``"ujson"`` or ``"auto"``
+            (the fastest one installed), default is ``"json"``.
+        buffer_size : int, optional
+            Size of the file write buffer in bytes, default is 1M. Only used without compression.
+        compression : str or None, optional
+            ``"gzip"``, ``"bz2"``, ``"xz"``, ``"zstd"``, None, or ``"infer"`` to use the extension
+            of ``file_path`` (e.g. ``.json.gz``), default is ``"infer"``. See ``open_dataset``.
+        threads : int, optional
+            Number of threads compressing the output, default is 1.
+        """
+        self.correct(correct_image=correct_image, correct_category=correct_category)
+        # columnar annotations are written without converting them all at once
+        dataset = {
+            "info": self.info,
+            "licenses": self.licenses,
+            "images": self.images,
+            "categories": self.categories,
+            "annotations": self._annotation_store(),
+        }
+        with _open_output(file_path, buffer_size, compression, threads) as f:
+            dump_dataset(dataset, f, chunk_size=chunk_size, encoder=encoder)
+
+    def save_shards(
+        self,
+        output_dir: str,
+        num_shards: int | None = None,
+        max_images: int | None = None,
+        max_bytes: int | None = None,
+        workers: int = 1,
+        executor: str = "thread",
+        correct_image: bool = True,
+        correct_category: bool = False,
+        chunk_size: int = 1000,
+        encoder: str = "json",
+    ) -> str:
+        """
+        Save the dataset as several JSON files (shards) and a manifest.
+
+        The images are cut into contiguous runs, either into ``num_shards`` runs of
+        about the same size or into runs of at most ``max_images`` images and about
+        ``max_bytes`` bytes. Each shard is a complete COCO file with the images of its
+        run, their annotations and all categories. Sizes are estimated from a sample
+        of the encoded images and annotations, so ``max_bytes`` is approximate.
+
+        The shards are written concurrently by ``workers`` threads or processes. The
+        manifest ``MANIFEST_NAME`` lists the shards with their number of images and
+        annotations and their size; it can be passed to ``load_shards``.
+
+        Parameters
+        ----------
+        output_dir : str
+            Directory of the shards and of the manifest, created if it does not exist.
+        num_shards : int or None, optional
+            Number of shards. Cannot be combined with ``max_images`` or ``max_bytes``.
+            Shards that would have no image are not written, so there may be fewer,
+            e.g. when there are fewer images than ``num_shards``.
+        max_images : int or None, optional
+            Maximum number of images per shard.
+        max_bytes : int or None, optional
+            Approximate maximum size of a shard in bytes. A single image with its
+            annotations larger than this gets a shard of its own.
+        workers : int, optional
+            Number of shards written in parallel, default is 1.
+        executor : str, optional
+            ``"thread"`` or ``"process"``, see ``apply_filter``, default is ``"thread"``.
+        correct_image : bool, optional
+            Whether to remove images with no annotations before saving, default is True.
+        correct_category : bool, optional
+            Whether to remove categories with no annotations before saving, default is False.
+        chunk_size : int, optional
+            Number of elements encoded at a time, default is 1000.
+        encoder : str, optional
+            JSON encoder backend, see ``save``, default is ``"json"``.
+
+        Returns
+        -------
+        str
+            Path of the manifest.
+
+        Raises
+        ------
+        ValueError
+            If no or conflicting size limits are given, a limit is not positive,
+            or executor is not "process" or "thread".
+        """
+        if num_shards is None and max_images is None and max_bytes is None:
+            raise ValueError("One of num_shards, max_images or max_bytes is required.")
+        if num_shards is not None and (max_images is not None or max_bytes is not None):
+            raise ValueError("num_shards cannot be combined with max_images or max_bytes.")
+        if any(limit is not None and limit < 1 for limit in (num_shards, max_images, max_bytes)):
+            raise ValueError("num_shards, max_images and max_bytes must be positive.")
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unknown executor: {executor}. Use 'process' or 'thread'.")
+        self.correct(correct_image=correct_image, correct_category=correct_category)
+
+        header = {"info": self.info, "licenses": self.licenses, "categories": self.categories}
+        header_size = len(json.dumps(header))
+        image_size, annotation_size = self._estimate_record_sizes()
+        category_ids_by_image = self._category_ids_by_image()
+        sizes = [image_size + annotation_size * len(category_ids_by_image.get(img["id"], ())) for img in self.images]
+
+        image_buckets: dict[int, int] = {}
+        if num_shards is not None:
+            # cut at equal fractions of the cumulative size, using the middle of each image
+            total = sum(sizes) or 1.0
+            num_shards = min(num_shards, max(len(self.images), 1))
+            cumulative = 0.0
+            for img, size in zip(self.images, sizes):
+                image_buckets[img["id"]] = min(num_shards - 1, int((cumulative + size / 2) / total * num_shards))
+                cumulative += size
+            count = num_shards
+        else:
+            count, shard_images, shard_size = 0, 0, float(header_size)
+            for img, size in zip(self.images, sizes):
+                full = max_images is not None and shard_images >= max_images
+                full |= max_bytes is not None and shard_size + size > max_bytes
+                if count == 0 or (shard_images and full):
+                    count, shard_images, shard_size = count + 1, 0, float(header_size)
+                image_buckets[img["id"]] = count - 1
+                shard_images += 1
+                shard_size += size
+            count = max(count, 1)
+
+        os.makedirs(output_dir, exist_ok=True)
+        # an image larger than a shard can leave a bucket empty, only an empty dataset gets an empty shard
+        parts = self._partition(image_buckets, count)
+        parts = [part for part in parts if part[0]] or parts[:1]
+        shards = []
+        for i, (images, annotations) in enumerate(parts):
+            dataset = {
+                "info": self.info,
+                "licenses": self.licenses,
+                "images": images,
+                "categories": self.categories,
+                "annotations": annotations,
+            }
+            shards.append((os.path.join(output_dir, f"shard-{i:05d}.json"), dataset))
+
+        if workers <= 1:
+            written = [_write_shard(path, dataset, chunk_size, encoder) for path, dataset in shards]
+        else:
+            pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+            with pool_class(max_workers=workers) as pool:
+                futures = [pool.submit(_write_shard, path, dataset, chunk_size, encoder) for path, dataset in shards]
+                written = [future.result() for future in futures]
+
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "images": len(self.images),
+            "annotations": len(self._annotation_store()),
+            "categories": len(self.categories),
+            "shards": [
+                {
+                    "path": os.path.basename(path),
+                    "images": len(dataset["images"]),
+                    "annotations": len(dataset["annotations"]),
+                    "bytes": size,
+                }
+                for (path, dataset), size in zip(shards, written)
+            ],
+        }
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest_path
+
+    def _estimate_record_sizes(self, sample_size: int = 1000) -> tuple[float, float]:
+        """Estimate the encoded size of an image and of an annotation from an evenly spaced sample."""
+
+        def estimate(records: Sequence[dict]) -> float:
+            if not len(records):
+                return 0.0
+            step = max(1, len(records) // sample_size)
+            sample = [records[i] for i in range(0, len(records), step)]
+            # + 2 for the separator between elements
+            return len(json.dumps(sample)) / len(sample) + 2
+
+        return estimate(self.images), estimate(self._annotation_store())
+
+    def save_binary(self, file_path: str) -> None:
+        """
+        Save the dataset in the binary format, see ``pycocoedit.objectdetection.binary``.
+
+        The annotations are stored in columnar form and the file is loaded with
+        ``load_binary`` without parsing JSON. Unlike ``save``, the dataset is stored
+        as it is, without applying filters or correcting it. Requires NumPy.
+
+        Parameters
+        ----------
+        file_path : str
+            Path where the file will be saved. The file is replaced atomically, so it
+            can be the file the dataset was loaded from.
+        """
+        self._ensure_validated()
+        dataset = {
+            "info": self.info,
+            "licenses": self.licenses,
+            "images": self.images,
+            "categories": self.categories,
+            "annotations": self.annotation_columns,
+        }
+        # a dataset loaded with load_binary maps its file, so never truncate the target in place
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb", buffering=1 << 20) as f:
+                write_binary(dataset, f)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load_binary(cls, file_path: str, use_mmap: bool = True) -> "CocoData":
+        """
+        Load a dataset saved with ``save_binary``.
+
+        The file is memory-mapped: the annotation columns are views of the file,
+        so loading takes time proportional to the number of images and categories,
+        and processes loading the same file share its pages. Segmentations are decoded
+        when accessed. The loaded dataset is in columnar form (see ``to_columnar``)
+        and is not validated again. Requires NumPy.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the file.
+        use_mmap : bool, optional
+            Whether to memory-map the file, default is True. Otherwise the file is read into memory.
+
+        Returns
+        -------
+        CocoData
+            The loaded dataset.
+
+        Raises
+        ------
+        ValueError
+            If the file is not in the binary format.
+        """
+        dataset = read_binary(file_path, use_mmap=use_mmap)
+        coco_data = cls.__new__(cls)
+        coco_data._setup({**dataset, "annotations": []}, validate="none")
+        coco_data._set_annotation_columns(dataset["annotations"])
+        return coco_data
+
+    def sample(
+        self,
+        n: int,
+        correct_image: bool = True,
+        correct_category: bool = False,
+        seed: int | None = None,
+        mode: str = "uniform",
+        min_per_category: int = 1,
+    ) -> dict[str, Any]:
+        """
+        Create a random sample of the dataset with n images.
+
+        Besides uniform sampling, images can be sampled stratified by category:
+
+        - ``"uniform"``: every image is equally likely.
+        - ``"balanced"``: the same number of images is drawn for each category.
+        - ``"proportional"``: the number of images drawn for each category is proportional
+          to the number of images of the category.
+        - ``"min_per_category"``: images are drawn for each category until it has at least
+          ``min_per_category`` annotations, then the remaining images are drawn uniformly.
+
+        Images are drawn among the images of each category using the ``image_ids_by_category``
+        index, so once the indexes are built drawing costs time proportional to the sample
+        size rather than to the dataset size. An image counts for every category it contains.
+        Images that a category cannot provide are drawn uniformly. In ``"min_per_category"``
+        mode, a category may get fewer than ``min_per_category`` annotations if n is too small.
+
+        Parameters
+        ----------
+        n : int
+            Number of images to sample.
+        correct_image : bool, optional
+            Whether to remove images with no annotations, default is True.
+        correct_category : bool, optional
+            Whether to remove categories with no annotations, default is False.
+        seed : int or None, optional
+            Random seed, default is None (the global generator of ``random``, see ``random.seed``).
+        mode : str, optional
+            Sampling mode, one of ``SAMPLING_MODES``, default is ``"uniform"``.
+        min_per_category : int, optional
+            Minimum number of annotations per category in ``"min_per_category"`` mode, default is 1.
+
+        Returns
+        -------
+        dict
+            A new sampled dataset as a dictionary.
+
+        Raises
+        ------
+        ValueError
+            If n is greater than the number of images in the dataset or mode is not supported.
+        """
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}. Use one of {SAMPLING_MODES}.")
+        self._ensure_validated()
+        if not self.filter_applied:
+            self.apply_filter()
+
+        if n > len(self.images):
+            raise ValueError(
+                f"Number of images to sample is greater than the number of images in the dataset. n: {n}, number of images: {len(self.images)}"
+            )
+
+        rng = _random(seed)
+        if mode == "uniform":
+            self._set_target(TargetType.IMAGE, rng.sample(self.images, n))
+        else:
+            image_ids = self._sample_stratified(n, rng, mode, min_per_category)
+            image_by_id = self.image_by_id
+            self._set_target(TargetType.IMAGE, [image_by_id[image_id] for image_id in image_ids])
+        self.correct(correct_image, correct_category)
+        return self.get_dataset()
+
+    def split(
+        self,
+        ratios: Sequence[float],
+        seed: int = 0,
+        group_by: str | Callable[[dict], Hashable] | None = None,
+        stratify: bool = False,
+    ) -> list["CocoData"]:
+        """
+        Split the dataset into disjoint subsets, e.g. train, validation and test sets.
+
+        Each image is assigned to a subset by hashing its ID (or its group key) with
+        the seed, so the result does not depend on the order of the images and an
+        image stays in the same subset when other images are added or removed.
+        The annotations are distributed in a single pass; each subset gets the
+        annotations of its images and all categories.
+
+        Parameters
+        ----------
+        ratios : Sequence[float]
+            Relative size of each subset, e.g. ``(0.8, 0.1, 0.1)``. They are normalized.
+        seed : int, optional
+            Seed of the hash, default is 0.
+        group_by : str, Callable[[dict], Hashable] or None, optional
+            Images with the same group key are put in the same subset, e.g. the frames
+            of a video. Either the name of an image key (images without the key form
+            their own group) or a function returning the key of an image.
+            Default is None, each image is its own group.
+        stratify : bool, optional
+            Whether to split each category separately so that every subset has about the
+            same category distribution, default is False. A group is assigned to the stratum
+            of its rarest category. Stratified assignment depends on the other groups of the
+            stratum, so it is reproducible for the same dataset but not stable when groups
+            are added.
+
+        Returns
+        -------
+        list[CocoData]
+            One dataset per ratio, in the order of ``ratios``.
+
+        Raises
+        ------
+        ValueError
+            If a ratio is negative or all ratios are zero.
+        """
+        if not ratios or any(r < 0 for r in ratios) or sum(ratios) <= 0:
+            raise ValueError(f"Ratios must be non-negative with a positive sum: {ratios}")
+        self._ensure_validated()
+        if not self.filter_applied:
+            self.apply_filter()
+
+        total = sum(ratios)
+        bounds = []
+        cumulative = 0.0
+        for ratio in ratios:
+            cumulative += ratio / total
+            bounds.append(cumulative)
+
+        def bucket(u: float) -> int:
+            for i, bound in enumerate(bounds):
+                if u < bound:
+                    return i
+            return len(bounds) - 1
+
+        if group_by is None:
+            group_keys = [img["id"] for img in self.images]
+        elif isinstance(group_by, str):
+            group_keys = [(group_by, img[group_by]) if group_by in img else ("id", img["id"]) for img in self.images]
+        else:
+            group_keys = [group_by(img) for img in self.images]
+
+        group_buckets: dict[Hashable, int] = {}
+        if not stratify:
+            for key in group_keys:
+                if key not in group_buckets:
+                    group_buckets[key] = bucket(_hash_unit(seed, key))
+        else:
+            # stratum of a group: its rarest category, None for groups without annotations
+            frequency = {cid: len(ids) for cid, ids in self.image_ids_by_category.items()}
+            category_ids_by_image = self._category_ids_by_image()
+            group_stratum: dict[Hashable, Any] = {}
+            for img, key in zip(self.images, group_keys):
+                rarest = group_stratum.get(key)
+                for category_id in category_ids_by_image.get(img["id"], ()):
+                    if rarest is None or (frequency[category_id], category_id) < (frequency[rarest], rarest):
+                        rarest = category_id
+                group_stratum[key] = rarest
+            strata: defaultdict[Any, list[Hashable]] = defaultdict(list)
+            for key, stratum in group_stratum.items():
+                strata[stratum].append(key)
+            for keys in strata.values():
+                # rank the groups of a stratum by hash and cut the ranking by the ratios
+                keys.sort(key=lambda key: (_hash_unit(seed, key), repr(key)))
+                for rank, key in enumerate(keys):
+                    group_buckets[key] = bucket((rank + 0.5) / len(keys))
+
+        image_buckets = {img["id"]: group_buckets[key] for img, key in zip(self.images, group_keys)}
+        subsets = []
+        for subset_images, subset_annotations in self._partition(image_buckets, len(ratios)):
+            coco_data = CocoData.__new__(CocoData)
+            coco_data._setup(
+                {
+                    "info": self.info,
+                    "licenses": self.licenses,
+                    "images": subset_images,
+                    "categories": list(self.categories),
+                    "annotations": [],
+                },
+                validate="none",
+            )
+            coco_data._set_annotations(subset_annotations)
+            subsets.append(coco_data)
+        return subsets
+
+    def _partition(
+        self, image_buckets: dict[int, int], count: int
+    ) -> list[tuple[list[dict], list[dict] | AnnotationColumns]]:
+        """
+        Distribute the images and their annotations into buckets in one pass.
+
+        Parameters
+        ----------
+        image_buckets : dict[int, int]
+            Bucket of each image ID, from 0 to count - 1.
+        count : int
+            Number of buckets.
+
+        Returns
+        -------
+        list[tuple[list[dict], list[dict] | AnnotationColumns]]
+            The images and the annotations of each bucket, in their original order.
+            Annotations of images without a bucket are dropped.
+        """
+        images: list[list[dict]] = [[] for _ in range(count)]
+        for img in self.images:
+            images[image_buckets[img["id"]]].append(img)
+
+        annotations = self._annotation_store()
+        if isinstance(annotations, AnnotationColumns):
+            buckets = np.array([image_buckets.get(i, -1) for i in annotations.image_id.tolist()], dtype=np.int64)
+            # one stable sort by bucket keeps the original order within each bucket
+            order = np.argsort(buckets, kind="stable")
+            bounds = np.searchsorted(buckets[order], np.arange(count + 1)).tolist()
+            bucket_annotations: list[list[dict] | AnnotationColumns] = [
+                annotations.take(order[bounds[i] : bounds[i + 1]]) for i in range(count)
+            ]
+        else:
+            annotation_lists: list[list[dict]] = [[] for _ in range(count)]
+            for ann in annotations:
+                i = image_buckets.get(ann["image_id"])
+                if i is not None:
+                    annotation_lists[i].append(ann)
+            bucket_annotations = list(annotation_lists)
+        return list(zip(images, bucket_annotations))
+
+    def _sample_stratified(self, n: int, rng: random.Random, mode: str, min_per_category: int) -> list[int]:
+        """Draw n image IDs stratified by category, see ``sample``."""
+        image_by_id = self.image_by_id
+        # only categories that exist, in a random order so that ties do not favor low IDs
+        by_category = {cid: ids for cid, ids in self.image_ids_by_category.items() if cid in self.category_by_id}
+        category_ids = list(by_category)
+        rng.shuffle(category_ids)
+        draws = {cid: _lazy_shuffle(rng, by_category[cid]) for cid in category_ids}
+        selected: dict[int, None] = {}
+
+        def draw(category_id: int) -> int | None:
+            for image_id in draws[category_id]:
+                if image_id not in selected and image_id in image_by_id:
+                    selected[image_id] = None
+                    return image_id
+            return None
+
+        category_ids_by_image = self._category_ids_by_image()
+        if mode == "min_per_category":
+            counts: dict[int, int] = defaultdict(int)
+            for category_id in category_ids:
+                while counts[category_id] < min_per_category and len(selected) < n:
+                    image_id = draw(category_id)
+                    if image_id is None:
+                        break
+                    for image_category_id in category_ids_by_image.get(image_id, ()):
+                        counts[image_category_id] += 1
+        else:
+            if mode == "balanced":
+                weights = {cid: 1.0 for cid in category_ids}
+            else:
+                weights = {cid: float(len(by_category[cid])) for cid in category_ids}
+            quotas = _largest_remainder(n, weights, rng)
+            # round robin over the categories, a drawn image counts for all of its categories
+            progressed = True
+            while progressed and len(selected) < n:
+                progressed = False
+                for category_id in category_ids:
+                    if quotas[category_id] <= 0 or len(selected) >= n:
+                        continue
+                    image_id = draw(category_id)
+                    if image_id is None:
+                        quotas[category_id] = 0
+                        continue
+                    progressed = True
+                    for image_category_id in set(category_ids_by_image.get(image_id, ())):
+                        if image_category_id in quotas:
+                            quotas[image_category_id] -= 1
+
+        if len(selected) < n:
+            for img in _lazy_shuffle(rng, self.images):
+                if img["id"] not in selected:
+                    selected[img["id"]] = None
+                    if len(selected) == n:
+                        break
+        return list(selected)
+
+
+class CocoView:
+    """
+    Non-destructive filtered view over a CocoData.
+
+    A view stores the positions of the selected images, categories and
+    annotations in a base CocoData instead of the data itself, so many
+    differently filtered subsets of one dataset can coexist at a cost
+    proportional to the number of selected elements. Filtering, correcting and
+    sampling a view return a new view; neither the base nor the original view
+    is modified. A view can be materialized with ``to_coco_data`` or saved with
+    ``save``.
+
+    The base is treated as immutable: using a view after its base has been
+    modified raises a RuntimeError.
+
+    Parameters
+    ----------
+    base : CocoData
+        The dataset to view.
+    image_indices : Iterable[int] or None, optional
+        Positions of the selected images in ``base.images``, default is all images.
+    category_indices : Iterable[int] or None, optional
+        Positions of the selected categories in ``base.categories``, default is all categories.
+    annotation_indices : Iterable[int] or None, optional
+        Positions of the selected annotations in ``base.annotations``, default is all annotations.
+    """
+
+    def __init__(
+        self,
+        base: CocoData,
+        image_indices: Iterable[int] | None = None,
+        category_indices: Iterable[int] | None = None,
+        annotation_indices: Iterable[int] | None = None,
+    ):
+        self.base = base
+        self._base_signature = base._signature()
+        self.image_indices = array("q", range(len(base.images)) if image_indices is None else image_indices)
+        self.category_indices = array(
+            "q", range(len(base.categories)) if category_indices is None else category_indices
+        )
+        self.annotation_indices = array(
+            "q", range(len(base._annotation_store())) if annotation_indices is None else annotation_indices
+        )
+
+    def _check_base(self) -> None:
+        """Raise a RuntimeError if the base has been modified since the view was created."""
+        if self.base._signature() != self._base_signature:
+            raise RuntimeError("The base CocoData has been modified after the view was created.")
+
+    def _derive(
+        self,
+        image_indices: Iterable[int] | None = None,
+        category_indices: Iterable[int] | None = None,
+        annotation_indices: Iterable[int] | None = None,
+    ) -> "CocoView":
+        """Create a view of the same base, keeping the current selection where no indices are given."""
+        return CocoView(
+            self.base,
+            self.image_indices if image_indices is None else image_indices,
+            self.category_indices if category_indices is None else category_indices,
+            self.annotation_indices if annotation_indices is None else annotation_indices,
+        )
+
+    @property
+    def images(self) -> list[dict]:
+        """Selected image dictionaries of the base."""
+        self._check_base()
+        images = self.base.images
+        return [images[i] for i in self.image_indices]
+
+    @property
+    def categories(self) -> list[dict]:
+        """Selected category dictionaries of the base."""
+        self._check_base()
+        categories = self.base.categories
+        return [categories[i] for i in self.category_indices]
+
+    @property
+    def annotations(self) -> list[dict]:
+        """Selected annotation dictionaries of the base."""
+        annotations = self._annotation_store()
+        return annotations.to_records() if isinstance(annotations, AnnotationColumns) else annotations
+
+    def _annotation_store(self) -> list[dict] | AnnotationColumns:
+        """Return the selected annotations, as columns if the base stores columns."""
+        self._check_base()
+        annotations = self.base._annotation_store()
+        if isinstance(annotations, AnnotationColumns):
+            return annotations.take(self.annotation_indices)
+        return [annotations[i] for i in self.annotation_indices]
+
+    def filter(self, *filters: BaseFilter) -> "CocoView":
+        """
+        Create a view with the filters applied.
+
+        Parameters
+        ----------
+        *filters : BaseFilter
+            The filters to apply.
+
+        Returns
+        -------
+        CocoView
+            A new view of the selected elements kept by the filters.
+        """
+        all_filters: dict[TargetType, Filters] = {target: Filters() for target in TargetType}
+        for filter_ in filters:
+            all_filters[filter_.target_type].add(filter_)
+
+        def keep(target_filters: Filters, indices: array, data: Sequence[dict]) -> array | None:
+            if not target_filters.include_filters and not target_filters.exclude_filters:
+                return None
+            target_filters.prepare(self)
+            mask = target_filters.passes_batch(data)
+            return array("q", (i for i, k in zip(indices, mask) if k))
+
+        return self._derive(
+            keep(all_filters[TargetType.IMAGE], self.image_indices, self.images),
+            keep(all_filters[TargetType.CATEGORY], self.category_indices, self.categories),
+            keep(all_filters[TargetType.ANNOTATION], self.annotation_indices, self._annotation_store()),
+        )
+
+    def spatial_index(self, normalized: bool = False, grid_size: int | None = None) -> SpatialIndex:
+        """
+        Return the spatial index of the base, see ``CocoData.spatial_index``.
+
+        Parameters
+        ----------
+        normalized : bool, optional
+            Whether the boxes are indexed in coordinates normalized by the image size, default is False.
+        grid_size : int or None, optional
+            Number of cells along each axis, default is None (chosen from the median box size).
+
+        Returns
+        -------
+        SpatialIndex
+            The index of all annotations of the base. Its positions refer to ``base.annotations``.
+        """
+        self._check_base()
+        return self.base.spatial_index(normalized, grid_size)
+
+    def image_annotation_stats(self) -> ImageAnnotationStats:
+        """
+        Return the statistics of the selected annotations of each image, see ``ImageAnnotationStats``.
+
+        Returns
+        -------
+        ImageAnnotationStats
+            The statistics.
+        """
+        return ImageAnnotationStats(self._annotation_store())
+
+    def query_region(
+        self,
+        region: Sequence[float],
+        image_ids: Iterable[int] | None = None,
+        normalized: bool = False,
+        mode: str = "intersects",
+    ) -> list[dict]:
+        """
+        Find the selected annotations whose bounding box intersects or lies within a region.
+
+        See ``CocoData.query_region`` for the parameters.
+
+        Returns
+        -------
+        list[dict]
+            The selected annotations found, in view order.
+        """
+        positions = self.spatial_index(normalized).query(region, image_ids, mode)
+        selected = np.asarray(self.annotation_indices, dtype=np.int64)
+        return self._derive(annotation_indices=selected[np.isin(selected, positions)].tolist()).annotations
+
+    def correct(self, correct_image: bool = True, correct_category: bool = False) -> "CocoView":
+        """
+        Create a consistent view, see ``CocoData.correct``.
+
+        Parameters
+        ----------
+        correct_image : bool, optional
+            Whether to remove images that have no annotations, default is True.
+        correct_category : bool, optional
+            Whether to remove categories that have no annotations, default is False.
+
+        Returns
+        -------
+        CocoView
+            A new view without orphaned annotations and, optionally, unused images and categories.
+        """
+        images = self.images
+        categories = self.categories
+        mask, used_img_ids, used_cat_ids = _referenced_annotations(
+            self._annotation_store(), {img["id"] for img in images}, {cat["id"] for cat in categories}
+        )
+        annotation_indices = array("q", (i for i, k in zip(self.annotation_indices, mask) if k))
+        image_indices = None
+        if correct_image:
+            image_indices = array("q", (i for i, img in zip(self.image_indices, images) if img["id"] in used_img_ids))
+        category_indices = None
+        if correct_category:
+            category_indices = array(
+                "q", (i for i, cat in zip(self.category_indices, categories) if cat["id"] in used_cat_ids)
+            )
+        return self._derive(image_indices, category_indices, annotation_indices)
+
+    def sample(
+        self, n: int, seed: int | None = None, correct_image: bool = True, correct_category: bool = False
+    ) -> "CocoView":
+        """
+        Create a view of n randomly sampled images.
+
+        Parameters
+        ----------
+        n : int
+            Number of images to sample.
+        seed : int or None, optional
+            Random seed, default is None (the global generator of ``random``, see ``random.seed``).
+        correct_image : bool, optional
+            Whether to remove images with no annotations, default is True.
+        correct_category : bool, optional
+            Whether to remove categories with no annotations, default is False.
+
+        Returns
+        -------
+        CocoView
+            A new corrected view of the sampled images.
+
+        Raises
+        ------
+        ValueError
+            If n is greater than the number of images in the view.
+        """
+        if n > len(self.image_indices):
+            raise ValueError(
+                f"Number of images to sample is greater than the number of images in the view. n: {n}, number of images: {len(self.image_indices)}"
+            )
+        sampled = sorted(_random(seed).sample(list(self.image_indices), n))
+        return self._derive(image_indices=sampled).correct(correct_image, correct_category)
+
+    def get_dataset(self) -> dict[str, Any]:
+        """
+        Get the selected data as a dictionary.
+
+        Returns
+        -------
+        dict
+            Dataset including info, licenses, images, categories and annotations.
+            The dictionaries are shared with the base.
+        """
+        dataset = self._dataset()
+        if isinstance(dataset["annotations"], AnnotationColumns):
+            dataset["annotations"] = dataset["annotations"].to_records()
+        return dataset
+
+    def _dataset(self) -> dict[str, Any]:
+        """Return the selected data as a dictionary, with the annotations as they are stored."""
+        return {
+            "info": self.base.info,
+            "licenses": self.base.licenses,
+            "images": self.images,
+            "categories": self.categories,
+            "annotations": self._annotation_store(),
+        }
+
+    def to_coco_data(self) -> CocoData:
+        """
+        Materialize the view as a new CocoData.
+
+        The new object has its own lists but shares the image, category and
+        annotation dictionaries with the base (see the ``"cow"`` copy policy).
+
+        Returns
+        -------
+        CocoData
+            The selected data.
+        """
+        coco_data = CocoData.__new__(CocoData)
+        coco_data._setup({**self._dataset(), "annotations": []}, validate="none")
+        coco_data._set_annotations(self._annotation_store())
+        return coco_data
+
+    def save(
+        self,
+        file_path: str,
+        correct_image: bool = True,
+        correct_category: bool = False,
+        chunk_size: int = 1000,
+        encoder: str = "json",
+        buffer_size: int = 1 << 20,
+        compression: str | None = "infer",
+        threads: int = 1,
+    ) -> None:
+        """
+        Save the selected data to a JSON file, see ``CocoData.save``.
+
+        Parameters
+        ----------
+        file_path : str
+            Path where the JSON file will be saved.
+        correct_image : bool, optional
+            Whether to remove images with no annotations before saving, default is True.
+        correct_category : bool, optional
+            Whether to remove categories with no annotations before saving, default is False.
+        chunk_size : int, optional
+            Number of elements encoded at a time, default is 1000.
+        encoder : str, optional
+            JSON encoder backend, default is ``"json"``.
+        buffer_size : int, optional
+            Size of the file write buffer in bytes, default is 1M. Only used without compression.
+        compression : str or None, optional
+            ``"gzip"``, ``"bz2"``, ``"xz"``, ``"zstd"``, None, or ``"infer"`` to use the extension
+            of ``file_path`` (e.g. ``.json.gz``), default is ``"infer"``. See ``open_dataset``.
+        threads : int, optional
+            Number of threads compressing the output, default is 1.
+        """
+        view = self.correct(correct_image=correct_image, correct_category=correct_category)
+        with _open_output(file_path, buffer_size, compression, threads) as f:
+            dump_dataset(view._dataset(), f, chunk_size=chunk_size, encoder=encoder)
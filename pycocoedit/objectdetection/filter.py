@@ -6,11 +6,48 @@ Filters can be used to include or exclude specific elements from the dataset
 based on various criteria.
 """
 
+import fnmatch
+import pickle
+import re
+import time
+import warnings
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
 from enum import Enum
+from typing import TYPE_CHECKING, Any, Union
 
 from typing_extensions import override
 
+from pycocoedit.objectdetection.aggregate import ImageAnnotationStats
+from pycocoedit.objectdetection.columnar import AnnotationColumns, ImageSizes, annotation_array, np, require_numpy
+from pycocoedit.objectdetection.spatial import QUERY_MODES
+
+if TYPE_CHECKING:
+    from pycocoedit.objectdetection.data import CocoData, CocoView
+
+Mask = Union[list[bool], "np.ndarray"]
+"""Boolean mask returned by ``BaseFilter.apply_batch``, a list or a NumPy array."""
+
+
+def _to_list(mask: Mask) -> list[bool]:
+    """Convert a mask to a list of booleans."""
+    return mask.tolist() if not isinstance(mask, list) else mask
+
+
+def _apply_batch(filter: "BaseFilter", data: Sequence[dict]) -> list[bool]:
+    """Apply a filter to a chunk of data, run in a worker of an executor."""
+    return _to_list(filter.apply_batch(data))
+
+
+def _is_picklable(obj: object) -> bool:
+    """Return whether an object can be sent to a worker process."""
+    try:
+        pickle.dumps(obj)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
+    return True
+
 
 class FilterType(Enum):
     """
@@ -65,8 +102,22 @@ class BaseFilter(ABC):
     ------
     ValueError
         If filter_type or target_type is None or not of the correct type.
+
+    Attributes
+    ----------
+    splittable : bool
+        Whether ``apply_batch`` can be applied to chunks of the data independently,
+        e.g. in parallel workers. Filters comparing elements with each other set it to False.
+        ``Filters.passes_batch`` evaluates these filters first, on all the data.
+    streamable : bool
+        Whether ``apply`` can decide on an element without the rest of the dataset, as
+        ``CocoData.from_stream`` and ``CocoData.sample_stream`` do. Filters that need
+        ``prepare`` set it to False.
     """
 
+    splittable: bool = True
+    streamable: bool = True
+
     def __init__(self, filter_type: FilterType, target_type: TargetType):
         if not isinstance(filter_type, FilterType) or filter_type is None:
             raise TypeError("filter_type must be a FilterType and not None.")
@@ -97,6 +148,83 @@ class BaseFilter(ABC):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        """Apply the filter to many data at once.
+
+        The default implementation calls ``apply`` for each element. Override this
+        method to evaluate the filter on the whole sequence at once, e.g. with
+        vectorized NumPy operations.
+
+        Parameters
+        ----------
+        data : Sequence[dict]
+            The data to filter. For annotations this may be ``AnnotationColumns``
+            when the dataset is stored in columnar form.
+
+        Returns
+        -------
+        Mask
+            List or NumPy array of booleans, the result of ``apply`` for each element.
+        """
+        return [self.apply(d) for d in data]
+
+    def prepare(self, dataset: "CocoData | CocoView") -> None:
+        """Look up what the filter needs from the dataset before it is applied.
+
+        Called by ``CocoData.apply_filter`` and ``CocoView.filter`` before the filter
+        is applied, after the images have been filtered. The default implementation
+        does nothing. Override this method for filters that depend on other elements
+        of the dataset, e.g. the image an annotation belongs to.
+
+        Parameters
+        ----------
+        dataset : CocoData or CocoView
+            The dataset being filtered.
+        """
+
+
+class FilterStats:
+    """
+    Statistics observed while applying a filter with ``Filters.passes_batch``.
+
+    Attributes
+    ----------
+    evaluated : int
+        Number of elements the filter was applied to.
+    matched : int
+        Number of elements for which the filter returned True.
+    seconds : float
+        Total time spent in the filter.
+    """
+
+    def __init__(self):
+        self.evaluated: int = 0
+        self.matched: int = 0
+        self.seconds: float = 0.0
+
+    @property
+    def match_rate(self) -> float:
+        """Fraction of evaluated elements matched by the filter, 0.5 before any evaluation."""
+        return self.matched / self.evaluated if self.evaluated else 0.5
+
+    @property
+    def cost(self) -> float:
+        """Average time in seconds per evaluated element."""
+        return self.seconds / self.evaluated if self.evaluated else 0.0
+
+    def rank(self) -> float:
+        """
+        Return the evaluation priority of the filter, lower is evaluated first.
+
+        A filter decides the elements it matches: an exclusion filter drops them
+        and an inclusion filter accepts them, so later filters do not need to
+        see them. Cheap filters that match many elements are evaluated first.
+        Filters without statistics yet are evaluated first, in insertion order.
+        """
+        if not self.evaluated:
+            return 0.0
+        return self.cost / max(self.match_rate, 1e-9)
+
 
 class Filters:
     """
@@ -110,6 +238,9 @@ class Filters:
         """Initialize an empty filters container."""
         self.include_filters: list[BaseFilter] = []
         self.exclude_filters: list[BaseFilter] = []
+        # keyed by id() since filters are not required to be hashable
+        self._stats: dict[int, FilterStats] = {}
+        self._applied: set[int] = set()
 
     def add(self, filter: BaseFilter) -> None:
         """
@@ -125,6 +256,336 @@ class Filters:
         if filter.filter_type == FilterType.EXCLUSION and isinstance(filter, BaseFilter):
             self.exclude_filters.append(filter)
 
+    def pending(self) -> "Filters":
+        """
+        Return the filters that still need to be applied to already filtered data.
+
+        Filters marked with ``mark_applied`` are left out. New inclusion filters are
+        also left out when an inclusion filter has already been applied, since the
+        remaining data already matches one of the inclusion filters.
+
+        Returns
+        -------
+        Filters
+            The pending filters, sharing the statistics of this container.
+        """
+        pending = Filters()
+        pending._stats = self._stats
+        if not any(id(f) in self._applied for f in self.include_filters):
+            pending.include_filters = list(self.include_filters)
+        pending.exclude_filters = [f for f in self.exclude_filters if id(f) not in self._applied]
+        return pending
+
+    def prepare(self, dataset: "CocoData | CocoView") -> None:
+        """
+        Prepare all filters, see ``BaseFilter.prepare``.
+
+        Parameters
+        ----------
+        dataset : CocoData or CocoView
+            The dataset being filtered.
+        """
+        for filter in self.include_filters + self.exclude_filters:
+            filter.prepare(dataset)
+
+    def mark_applied(self) -> None:
+        """Mark all filters as applied."""
+        self._applied.update(id(f) for f in self.include_filters + self.exclude_filters)
+
+    def stats(self, filter: BaseFilter) -> FilterStats:
+        """
+        Return the statistics of a filter.
+
+        Parameters
+        ----------
+        filter : BaseFilter
+            A filter of this container.
+
+        Returns
+        -------
+        FilterStats
+            The statistics observed so far.
+        """
+        return self._stats.setdefault(id(filter), FilterStats())
+
+    def report(self) -> list[dict]:
+        """
+        Report the statistics of the filters.
+
+        Returns
+        -------
+        list[dict]
+            One dictionary per filter with the keys ``filter`` (class name),
+            ``filter_type``, ``evaluated``, ``matched``, ``match_rate`` and ``seconds``.
+        """
+        rows = []
+        for filter in self.include_filters + self.exclude_filters:
+            stats = self.stats(filter)
+            rows.append(
+                {
+                    "filter": type(filter).__name__,
+                    "filter_type": filter.filter_type.name,
+                    "evaluated": stats.evaluated,
+                    "matched": stats.matched,
+                    "match_rate": stats.matched / stats.evaluated if stats.evaluated else None,
+                    "seconds": stats.seconds,
+                }
+            )
+        return rows
+
+    def passes(self, data: dict) -> bool:
+        """
+        Check whether data is kept by the filters.
+
+        Data is kept when it matches at least one inclusion filter (or there is
+        no inclusion filter) and matches no exclusion filter.
+
+        Parameters
+        ----------
+        data : dict
+            The data to check.
+
+        Returns
+        -------
+        bool
+            True if the data is kept, False otherwise.
+        """
+        if self.include_filters and not any(f.apply(data) for f in self.include_filters):
+            return False
+        return not any(f.apply(data) for f in self.exclude_filters)
+
+    def passes_batch(self, data: Sequence[dict], executor: Executor | None = None, workers: int = 1) -> list[bool]:
+        """
+        Check which data are kept by the filters, using ``BaseFilter.apply_batch``.
+
+        The inclusion and exclusion filters are evaluated in a single pass that
+        narrows down the undecided elements: each filter is only applied to the
+        elements that no previous filter has decided. Filters are ordered by
+        their observed cost and match rate (see ``FilterStats.rank``), and the
+        inclusion and exclusion phases are ordered so that the one expected to
+        keep fewer elements runs first. The statistics are updated on each call.
+
+        Filters that are not ``splittable`` compare the elements with each other,
+        so their result would depend on what the other filters left undecided.
+        They are evaluated first, on all the data at once, whatever the order
+        of the other filters.
+
+        With an executor, the data passed to each filter is split into chunks
+        that are evaluated in parallel; the results keep the original order.
+        For a ``ProcessPoolExecutor`` the filters must be picklable, a filter that
+        is not is evaluated in the calling process with a ``RuntimeWarning``.
+
+        Parameters
+        ----------
+        data : Sequence[dict]
+            The data to check.
+        executor : Executor or None, optional
+            Executor used to evaluate the filters in parallel, default is None (serial).
+        workers : int, optional
+            Number of workers of the executor, used to decide the number of chunks, default is 1.
+
+        Returns
+        -------
+        list[bool]
+            For each element, True if it is kept, False otherwise.
+        """
+        positions = list(range(len(data)))
+        # masks of the filters that are not splittable, on all the data
+        masks = {
+            id(f): self._evaluate(f, data, positions, executor, workers)
+            for f in self.include_filters + self.exclude_filters
+            if not f.splittable
+        }
+        include_pass_rate = 1.0
+        for f in self.include_filters:
+            include_pass_rate *= 1.0 - self.stats(f).match_rate
+        include_pass_rate = 1.0 - include_pass_rate if self.include_filters else 1.0
+        exclude_pass_rate = 1.0
+        for f in self.exclude_filters:
+            exclude_pass_rate *= 1.0 - self.stats(f).match_rate
+
+        phases = [(include_pass_rate, self._include), (exclude_pass_rate, self._exclude)]
+        for _, phase in sorted(phases, key=lambda p: p[0]):
+            positions = phase(data, positions, executor, workers, masks)
+
+        keep = [False] * len(data)
+        for position in positions:
+            keep[position] = True
+        return keep
+
+    def _evaluate(
+        self, filter: BaseFilter, data: Sequence[dict], positions: list[int], executor: Executor | None, workers: int
+    ) -> list[bool]:
+        """Apply a filter to the elements at the given positions and record its statistics."""
+        subset = data if len(positions) == len(data) else _take(data, positions)
+        start = time.perf_counter()
+        if executor is not None and isinstance(executor, ProcessPoolExecutor) and not _is_picklable(filter):
+            warnings.warn(
+                f"{type(filter).__name__} is not picklable and is evaluated in the main process.",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            executor = None
+        if executor is None or workers <= 1 or len(subset) < 2 or not filter.splittable:
+            mask = _to_list(filter.apply_batch(subset))
+        else:
+            # a few chunks per worker to balance uneven filter costs
+            chunk_size = -(-len(subset) // (workers * 4))
+            chunks = [subset[i : i + chunk_size] for i in range(0, len(subset), chunk_size)]
+            mask = [m for chunk_mask in executor.map(_apply_batch, [filter] * len(chunks), chunks) for m in chunk_mask]
+        elapsed = time.perf_counter() - start
+        stats = self.stats(filter)
+        stats.evaluated += len(positions)
+        stats.matched += sum(1 for m in mask if m)
+        stats.seconds += elapsed
+        return mask
+
+    def _ordered(self, filters: list[BaseFilter]) -> list[BaseFilter]:
+        """Order filters: those that are not splittable first, then the others by rank."""
+        fixed = [f for f in filters if not f.splittable]
+        return fixed + sorted((f for f in filters if f.splittable), key=lambda f: self.stats(f).rank())
+
+    def _mask(
+        self,
+        filter: BaseFilter,
+        data: Sequence[dict],
+        positions: list[int],
+        executor: Executor | None,
+        workers: int,
+        masks: dict[int, list[bool]],
+    ) -> list[bool]:
+        """Return the mask of a filter at the given positions, from ``masks`` if it was evaluated already."""
+        if id(filter) in masks:
+            mask = masks[id(filter)]
+            return mask if len(positions) == len(mask) else [mask[p] for p in positions]
+        return self._evaluate(filter, data, positions, executor, workers)
+
+    def _include(
+        self,
+        data: Sequence[dict],
+        positions: list[int],
+        executor: Executor | None,
+        workers: int,
+        masks: dict[int, list[bool]],
+    ) -> list[int]:
+        """Return the positions matched by at least one inclusion filter."""
+        if not self.include_filters:
+            return positions
+        accepted: list[int] = []
+        pending = positions
+        for f in self._ordered(self.include_filters):
+            if not pending:
+                break
+            mask = self._mask(f, data, pending, executor, workers, masks)
+            accepted.extend(p for p, m in zip(pending, mask) if m)
+            pending = [p for p, m in zip(pending, mask) if not m]
+        return sorted(accepted)
+
+    def _exclude(
+        self,
+        data: Sequence[dict],
+        positions: list[int],
+        executor: Executor | None,
+        workers: int,
+        masks: dict[int, list[bool]],
+    ) -> list[int]:
+        """Return the positions matched by no exclusion filter."""
+        for f in self._ordered(self.exclude_filters):
+            if not positions:
+                break
+            mask = self._mask(f, data, positions, executor, workers, masks)
+            positions = [p for p, m in zip(positions, mask) if not m]
+        return positions
+
+
+def _take(data: Sequence[dict], positions: list[int]) -> Sequence[dict]:
+    """Select the elements at the given positions."""
+    if isinstance(data, AnnotationColumns):
+        return data.take(positions)
+    return [data[p] for p in positions]
+
+
+class NameMatcher:
+    """
+    Match names against exact names, prefixes and patterns.
+
+    Exact names are stored in a frozenset. Prefixes are grouped by length, so a
+    name is checked with one set lookup per distinct prefix length. Glob and
+    regular expression patterns are compiled into a single regular expression.
+    The cost of a match therefore does not depend on the number of names.
+
+    Parameters
+    ----------
+    names : Iterable[str], optional
+        Exact names.
+    prefixes : Iterable[str], optional
+        Names starting with any of these prefixes match.
+    globs : Iterable[str], optional
+        Shell-style patterns (see ``fnmatch``) that must match the whole name.
+    regexes : Iterable[str], optional
+        Regular expressions that must match the whole name.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str] = (),
+        prefixes: Iterable[str] = (),
+        globs: Iterable[str] = (),
+        regexes: Iterable[str] = (),
+    ):
+        self.names: frozenset[str] = frozenset(names)
+        self.prefixes: frozenset[str] = frozenset(prefixes)
+        self._prefix_lengths: list[int] = sorted({len(prefix) for prefix in self.prefixes})
+        patterns = [fnmatch.translate(glob) for glob in globs] + [rf"(?:{regex})\Z" for regex in regexes]
+        self._pattern: re.Pattern[str] | None = (
+            re.compile("|".join(f"(?:{pattern})" for pattern in patterns)) if patterns else None
+        )
+
+    @property
+    def exact_only(self) -> bool:
+        """Whether only exact names are matched."""
+        return not self._prefix_lengths and self._pattern is None
+
+    def __call__(self, name: str) -> bool:
+        """
+        Check whether a name matches.
+
+        Parameters
+        ----------
+        name : str
+            The name to check.
+
+        Returns
+        -------
+        bool
+            True if the name matches an exact name, a prefix or a pattern.
+        """
+        if name in self.names:
+            return True
+        for length in self._prefix_lengths:
+            if name[:length] in self.prefixes:
+                return True
+        return self._pattern is not None and self._pattern.match(name) is not None
+
+    def match_batch(self, names: Iterable[str]) -> list[bool]:
+        """
+        Check whether each name matches.
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            The names to check.
+
+        Returns
+        -------
+        list[bool]
+            For each name, True if it matches.
+        """
+        if self.exact_only:
+            exact = self.names
+            return [name in exact for name in names]
+        return [self(name) for name in names]
+
 
 class ImageFileNameFilter(BaseFilter):
     """
@@ -136,13 +597,32 @@ class ImageFileNameFilter(BaseFilter):
         The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
         If ``FilterType.INCLUSION``, the images with the file names in the ``file_names`` are included.
         If ``FilterType.EXCLUSION``, the images with the file names in the ``file_names`` are excluded.
-    file_names : list[str]
-        List of file names to filter by.
+    file_names : Iterable[str], optional
+        File names to filter by.
+    prefixes : Iterable[str], optional
+        File name prefixes to filter by, e.g. ``"train/"``.
+    globs : Iterable[str], optional
+        Shell-style patterns to filter by, e.g. ``"*.png"``.
+    regexes : Iterable[str], optional
+        Regular expressions matching the whole file name to filter by.
+
+    Notes
+    -----
+    An image matches when its file name matches any of the names, prefixes or patterns.
+    Matching costs the same regardless of the number of file names, see ``NameMatcher``.
     """
 
-    def __init__(self, filter_type: FilterType, file_names: list[str]):
+    def __init__(
+        self,
+        filter_type: FilterType,
+        file_names: Iterable[str] = (),
+        prefixes: Iterable[str] = (),
+        globs: Iterable[str] = (),
+        regexes: Iterable[str] = (),
+    ):
         super().__init__(filter_type, TargetType.IMAGE)
-        self.file_names = file_names
+        self.matcher = NameMatcher(file_names, prefixes, globs, regexes)
+        self.file_names: frozenset[str] = self.matcher.names
 
     @override
     def apply(self, data: dict) -> bool:
@@ -157,10 +637,14 @@ class ImageFileNameFilter(BaseFilter):
         Returns
         -------
         bool
-            True if the image filename is in the filter's file_names list,
+            True if the image filename matches the filter's file names or patterns,
             False otherwise.
         """
-        return data["file_name"] in self.file_names
+        return self.matcher(data["file_name"])
+
+    @override
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        return self.matcher.match_batch(d["file_name"] for d in data)
 
 
 class CategoryNameFilter(BaseFilter):
@@ -173,15 +657,35 @@ class CategoryNameFilter(BaseFilter):
         The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
         If ``FilterType.INCLUSION``, the categories with the names in the `category_names` are included.
         If ``FilterType.EXCLUSION``, the categories with the names in the `category_names` are excluded.
+    category_names : Iterable[str], optional
+        Category names to filter by.
+    prefixes : Iterable[str], optional
+        Category name prefixes to filter by.
+    globs : Iterable[str], optional
+        Shell-style patterns to filter by.
+    regexes : Iterable[str], optional
+        Regular expressions matching the whole category name to filter by.
     """
 
-    def __init__(self, filter_type: FilterType, category_names: list[str]):
+    def __init__(
+        self,
+        filter_type: FilterType,
+        category_names: Iterable[str] = (),
+        prefixes: Iterable[str] = (),
+        globs: Iterable[str] = (),
+        regexes: Iterable[str] = (),
+    ):
         super().__init__(filter_type, TargetType.CATEGORY)
-        self.category_names = category_names
+        self.matcher = NameMatcher(category_names, prefixes, globs, regexes)
+        self.category_names: frozenset[str] = self.matcher.names
 
     @override
     def apply(self, data: dict) -> bool:
-        return data["name"] in self.category_names
+        return self.matcher(data["name"])
+
+    @override
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        return self.matcher.match_batch(d["name"] for d in data)
 
 
 class BoxAreaFilter(BaseFilter):
@@ -223,3 +727,649 @@ class BoxAreaFilter(BaseFilter):
         elif self.max_area is not None:
             return data["area"] <= self.max_area
         return True
+
+    @override
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        min_area = self.min_area
+        max_area = self.max_area
+        if isinstance(data, AnnotationColumns):
+            mask = np.ones(len(data), dtype=bool)
+            if min_area is not None:
+                mask &= data.area >= min_area
+            if max_area is not None:
+                mask &= data.area <= max_area
+            return mask
+        if min_area is not None and max_area is not None:
+            return [min_area <= d["area"] <= max_area for d in data]
+        elif min_area is not None:
+            return [min_area <= d["area"] for d in data]
+        elif max_area is not None:
+            return [d["area"] <= max_area for d in data]
+        return [True] * len(data)
+
+
+def _in_range(value: float, low: float | None, high: float | None) -> bool:
+    """Return whether a value is within the optional bounds, False for NaN."""
+    if value != value:
+        return False
+    return (low is None or low <= value) and (high is None or value <= high)
+
+
+def _range_mask(values: "np.ndarray", low: float | None, high: float | None) -> "np.ndarray":
+    """Vectorized ``_in_range``."""
+    mask = ~np.isnan(values)
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+class BoxSizeFilter(BaseFilter):
+    """
+    Filter annotations based on the width and height of the bounding box.
+
+    Parameters
+    ----------
+    filter_type : FilterType
+        The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
+        If ``FilterType.INCLUSION``, the annotations whose bbox width and height are in the ranges are included.
+        If ``FilterType.EXCLUSION``, the annotations whose bbox width and height are in the ranges are excluded.
+    min_width : float or None, optional
+        Minimum width, default is None.
+    max_width : float or None, optional
+        Maximum width, default is None.
+    min_height : float or None, optional
+        Minimum height, default is None.
+    max_height : float or None, optional
+        Maximum height, default is None.
+
+    Notes
+    -----
+    Unlike ``BoxAreaFilter``, the size is computed from ``bbox`` and not read from ``area``.
+    """
+
+    def __init__(
+        self,
+        filter_type: FilterType,
+        min_width: float | None = None,
+        max_width: float | None = None,
+        min_height: float | None = None,
+        max_height: float | None = None,
+    ):
+        super().__init__(filter_type, TargetType.ANNOTATION)
+        self.min_width = min_width
+        self.max_width = max_width
+        self.min_height = min_height
+        self.max_height = max_height
+
+    @override
+    def apply(self, data: dict) -> bool:
+        _, _, width, height = data["bbox"]
+        return _in_range(width, self.min_width, self.max_width) and _in_range(height, self.min_height, self.max_height)
+
+    @override
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        if np is None:
+            return super().apply_batch(data)
+        boxes = annotation_array(data, "bbox")
+        return _range_mask(boxes[:, 2], self.min_width, self.max_width) & _range_mask(
+            boxes[:, 3], self.min_height, self.max_height
+        )
+
+
+class AspectRatioFilter(BaseFilter):
+    """
+    Filter annotations based on the aspect ratio (width / height) of the bounding box.
+
+    Parameters
+    ----------
+    filter_type : FilterType
+        The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
+        If ``FilterType.INCLUSION``, the annotations whose aspect ratio is in the range are included.
+        If ``FilterType.EXCLUSION``, the annotations whose aspect ratio is in the range are excluded.
+    min_ratio : float or None, optional
+        Minimum aspect ratio, default is None.
+    max_ratio : float or None, optional
+        Maximum aspect ratio, default is None.
+
+    Notes
+    -----
+    A box of height 0 has an infinite aspect ratio, a box of width and height 0 matches no range.
+    """
+
+    def __init__(self, filter_type: FilterType, min_ratio: float | None = None, max_ratio: float | None = None):
+        super().__init__(filter_type, TargetType.ANNOTATION)
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+
+    @override
+    def apply(self, data: dict) -> bool:
+        _, _, width, height = data["bbox"]
+        if height:
+            ratio = width / height
+        else:
+            ratio = float("inf") if width else float("nan")
+        return _in_range(ratio, self.min_ratio, self.max_ratio)
+
+    @override
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        if np is None:
+            return super().apply_batch(data)
+        boxes = annotation_array(data, "bbox")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = boxes[:, 2] / boxes[:, 3]
+        return _range_mask(ratio, self.min_ratio, self.max_ratio)
+
+
+class _ImageSizeFilter(BaseFilter):
+    """Base class of annotation filters that compare the bounding box with the size of its image."""
+
+    streamable = False
+
+    def __init__(self, filter_type: FilterType):
+        super().__init__(filter_type, TargetType.ANNOTATION)
+        self._sizes: dict[Any, tuple[float, float]] | None = None
+        self._size_table: ImageSizes | None = None
+
+    @override
+    def prepare(self, dataset: "CocoData | CocoView") -> None:
+        images = dataset.images
+        self._sizes = {img["id"]: (img["width"], img["height"]) for img in images}
+        if np is not None:
+            self._size_table = ImageSizes(images)
+
+    def _check_prepared(self) -> None:
+        if self._sizes is None:
+            raise RuntimeError(
+                f"{type(self).__name__} needs the image sizes, apply it with CocoData.apply_filter or CocoView.filter."
+            )
+
+    def _image_size(self, image_id: Any) -> tuple[float, float]:
+        """Return the width and height of an image, NaN if it is unknown."""
+        self._check_prepared()
+        assert self._sizes is not None
+        return self._sizes.get(image_id, (float("nan"), float("nan")))
+
+    def _image_sizes(self, image_ids: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+        """Vectorized ``_image_size``."""
+        self._check_prepared()
+        assert self._size_table is not None
+        return self._size_table.lookup(image_ids)
+
+
+class RelativeBoxSizeFilter(_ImageSizeFilter):
+    """
+    Filter annotations based on the area of the bounding box relative to the area of its image.
+
+    Parameters
+    ----------
+    filter_type : FilterType
+        The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
+        If ``FilterType.INCLUSION``, the annotations whose relative area is in the range are included.
+        If ``FilterType.EXCLUSION``, the annotations whose relative area is in the range are excluded.
+    min_fraction : float or None, optional
+        Minimum fraction of the image area, default is None.
+    max_fraction : float or None, optional
+        Maximum fraction of the image area, default is None.
+
+    Notes
+    -----
+    The image sizes are looked up when the filter is applied with ``CocoData.apply_filter``
+    or ``CocoView.filter`` (see ``BaseFilter.prepare``). Annotations of unknown images
+    match no range.
+    """
+
+    def __init__(self, filter_type: FilterType, min_fraction: float | None = None, max_fraction: float | None = None):
+        super().__init__(filter_type)
+        self.min_fraction = min_fraction
+        self.max_fraction = max_fraction
+
+    @override
+    def apply(self, data: dict) -> bool:
+        _, _, width, height = data["bbox"]
+        image_width, image_height = self._image_size(data["image_id"])
+        image_area = image_width * image_height
+        fraction = width * height / image_area if image_area else float("nan")
+        return _in_range(fraction, self.min_fraction, self.max_fraction)
+
+    @override
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        if np is None:
+            return super().apply_batch(data)
+        boxes = annotation_array(data, "bbox")
+        image_width, image_height = self._image_sizes(annotation_array(data, "image_id"))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction = boxes[:, 2] * boxes[:, 3] / (image_width * image_height)
+        fraction[~np.isfinite(fraction)] = np.nan
+        return _range_mask(fraction, self.min_fraction, self.max_fraction)
+
+
+class TruncatedBoxFilter(_ImageSizeFilter):
+    """
+    Filter annotations whose bounding box touches or crosses a border of its image.
+
+    Parameters
+    ----------
+    filter_type : FilterType
+        The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
+        If ``FilterType.INCLUSION``, the truncated annotations are included.
+        If ``FilterType.EXCLUSION``, the truncated annotations are excluded.
+    margin : float, optional
+        Distance to a border under which a box counts as truncated, default is 0.
+
+    Notes
+    -----
+    The image sizes are looked up when the filter is applied with ``CocoData.apply_filter``
+    or ``CocoView.filter`` (see ``BaseFilter.prepare``). Annotations of unknown images
+    do not match.
+    """
+
+    def __init__(self, filter_type: FilterType, margin: float = 0.0):
+        super().__init__(filter_type)
+        self.margin = margin
+
+    @override
+    def apply(self, data: dict) -> bool:
+        x, y, width, height = data["bbox"]
+        image_width, image_height = self._image_size(data["image_id"])
+        if image_width != image_width:
+            # unknown image
+            return False
+        margin = self.margin
+        return x <= margin or y <= margin or x + width >= image_width - margin or y + height >= image_height - margin
+
+    @override
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        if np is None:
+            return super().apply_batch(data)
+        boxes = annotation_array(data, "bbox")
+        image_width, image_height = self._image_sizes(annotation_array(data, "image_id"))
+        margin = self.margin
+        truncated = (boxes[:, 0] <= margin) | (boxes[:, 1] <= margin)
+        truncated |= boxes[:, 0] + boxes[:, 2] >= image_width - margin
+        truncated |= boxes[:, 1] + boxes[:, 3] >= image_height - margin
+        return truncated & ~np.isnan(image_width)
+
+
+# groups with more boxes than this are compared one box at a time instead of pairwise at once
+_MAX_PAIRWISE_GROUP = 1024
+
+
+def _pairwise_iou(boxes: "np.ndarray") -> "np.ndarray":
+    """Return the IoU of every pair of boxes in each group, boxes (G, K, 4) as x1, y1, x2, y2 -> (G, K, K)."""
+    x1, y1, x2, y2 = (boxes[..., i] for i in range(4))
+    width = np.minimum(x2[:, :, None], x2[:, None, :]) - np.maximum(x1[:, :, None], x1[:, None, :])
+    height = np.minimum(y2[:, :, None], y2[:, None, :]) - np.maximum(y1[:, :, None], y1[:, None, :])
+    intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+    area = (x2 - x1) * (y2 - y1)
+    union = area[:, :, None] + area[:, None, :] - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, intersection / union, 0.0)
+
+
+def _duplicate_mask(boxes: "np.ndarray", keys: list["np.ndarray"], threshold: float) -> "np.ndarray":
+    """
+    Greedily mark boxes overlapping an earlier unmarked box of the same group.
+
+    Boxes (N, 4) are given as x, y, width and height, and grouped by equal ``keys``.
+    Groups of the same size are stacked and compared at once.
+    """
+    n = len(boxes)
+    duplicate = np.zeros(n, dtype=bool)
+    if n < 2:
+        return duplicate
+    corners = np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]], axis=1)
+    # lexsort is stable, so the boxes of a group keep their order
+    order = np.lexsort(keys[::-1])
+    change = np.zeros(n, dtype=bool)
+    change[0] = True
+    for key in keys:
+        sorted_key = key[order]
+        change[1:] |= sorted_key[1:] != sorted_key[:-1]
+    starts = np.flatnonzero(change)
+    sizes = np.diff(np.append(starts, n))
+    for size in np.unique(sizes[sizes > 1]).tolist():
+        members = order[starts[sizes == size][:, None] + np.arange(size)]
+        if size > _MAX_PAIRWISE_GROUP:
+            for group in members:
+                duplicate[group] = _duplicates_one_by_one(corners[group], threshold)
+            continue
+        # bound the (G, K, K) IoU arrays to a few million elements
+        step = max(1, (4 << 20) // (size * size))
+        for i in range(0, len(members), step):
+            group_members = members[i : i + step]
+            close = _pairwise_iou(corners[group_members]) >= threshold
+            group_duplicate = np.zeros(group_members.shape, dtype=bool)
+            for j in range(size - 1):
+                group_duplicate[:, j + 1 :] |= ~group_duplicate[:, j, None] & close[:, j, j + 1 :]
+            duplicate[group_members[group_duplicate]] = True
+    return duplicate
+
+
+def _duplicates_one_by_one(corners: "np.ndarray", threshold: float) -> "np.ndarray":
+    """``_duplicate_mask`` of a single large group, comparing one kept box with the following ones at a time."""
+    duplicate = np.zeros(len(corners), dtype=bool)
+    for j in range(len(corners) - 1):
+        if duplicate[j]:
+            continue
+        x1, y1, x2, y2 = corners[j]
+        others = corners[j + 1 :]
+        width = np.minimum(x2, others[:, 2]) - np.maximum(x1, others[:, 0])
+        height = np.minimum(y2, others[:, 3]) - np.maximum(y1, others[:, 1])
+        intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+        union = (x2 - x1) * (y2 - y1) + (others[:, 2] - others[:, 0]) * (others[:, 3] - others[:, 1]) - intersection
+        with np.errstate(divide="ignore", invalid="ignore"):
+            duplicate[j + 1 :] |= np.where(union > 0, intersection / union, 0.0) >= threshold
+    return duplicate
+
+
+class DuplicateBoxFilter(BaseFilter):
+    """
+    Filter annotations whose bounding box duplicates another one of the same image.
+
+    The annotations of each image are visited in order; an annotation matches when its
+    bounding box has an IoU of at least ``iou_threshold`` with an earlier annotation of
+    the same image that does not match itself, as in non-maximum suppression.
+    Requires NumPy.
+
+    Parameters
+    ----------
+    filter_type : FilterType
+        The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
+        If ``FilterType.INCLUSION``, only the duplicates are included.
+        If ``FilterType.EXCLUSION``, the duplicates are excluded and the first box of each cluster is kept.
+    iou_threshold : float, optional
+        Minimum intersection over union of duplicate boxes, in (0, 1], default is 0.9.
+    same_category : bool, optional
+        Whether only boxes of the same category are compared, default is True.
+
+    Raises
+    ------
+    ValueError
+        If ``iou_threshold`` is not in (0, 1].
+
+    Notes
+    -----
+    The filter compares the annotations with each other. ``apply_batch`` compares the
+    annotations it is given, which ``CocoData.apply_filter`` and ``CocoView.filter`` do
+    with all the annotations being filtered, before the other filters. ``apply`` needs the
+    annotations of the dataset, so the filter cannot be used with ``CocoData.from_stream``
+    or ``CocoData.sample_stream``.
+    """
+
+    splittable = False
+    streamable = False
+
+    def __init__(self, filter_type: FilterType, iou_threshold: float = 0.9, same_category: bool = True):
+        super().__init__(filter_type, TargetType.ANNOTATION)
+        if not 0 < iou_threshold <= 1:
+            raise ValueError(f"iou_threshold must be in (0, 1]. iou_threshold: {iou_threshold}")
+        require_numpy()
+        self.iou_threshold = iou_threshold
+        self.same_category = same_category
+        self._dataset: "CocoData | CocoView | None" = None
+        self._duplicate_ids: frozenset[Any] | None = None
+
+    @override
+    def prepare(self, dataset: "CocoData | CocoView") -> None:
+        # the duplicates of the dataset are only found if apply is called
+        self._dataset = dataset
+        self._duplicate_ids = None
+
+    @override
+    def apply(self, data: dict) -> bool:
+        if self._duplicate_ids is None:
+            if self._dataset is None:
+                raise RuntimeError(
+                    f"{type(self).__name__} needs the annotations, apply it with CocoData.apply_filter or CocoView.filter."
+                )
+            annotations = self._dataset.annotations
+            mask = self.apply_batch(annotations)
+            self._duplicate_ids = frozenset(ann["id"] for ann, duplicate in zip(annotations, mask) if duplicate)
+        return data["id"] in self._duplicate_ids
+
+    @override
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        keys = [annotation_array(data, "image_id")]
+        if self.same_category:
+            keys.append(annotation_array(data, "category_id"))
+        return _duplicate_mask(annotation_array(data, "bbox"), keys, self.iou_threshold)
+
+
+class RegionFilter(BaseFilter):
+    """
+    Filter annotations whose bounding box intersects or lies within a region.
+
+    Parameters
+    ----------
+    filter_type : FilterType
+        The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
+        If ``FilterType.INCLUSION``, the annotations in the region are included.
+        If ``FilterType.EXCLUSION``, the annotations in the region are excluded.
+    region : Sequence[float]
+        The region as ``[x, y, width, height]``.
+    normalized : bool, optional
+        Whether the region is in coordinates normalized by the image size, e.g.
+        ``[0, 0, 0.5, 0.5]`` for the top-left quadrant of every image. Default is False.
+    mode : str, optional
+        ``"intersects"`` for boxes that intersect or touch the region, ``"within"`` for
+        boxes that lie inside the region, default is ``"intersects"``.
+    grid_size : int or None, optional
+        Number of cells along each axis of the spatial index, default is None (see ``SpatialIndex``).
+
+    Raises
+    ------
+    ValueError
+        If ``mode`` is not supported.
+
+    Notes
+    -----
+    The annotations in the region are looked up in the spatial index of the dataset
+    (see ``CocoData.spatial_index``) when the filter is applied with ``CocoData.apply_filter``
+    or ``CocoView.filter``, and then matched by annotation ID, so the filter cannot be
+    used with ``CocoData.from_stream`` or ``CocoData.sample_stream``. Requires NumPy.
+    """
+
+    streamable = False
+
+    def __init__(
+        self,
+        filter_type: FilterType,
+        region: Sequence[float],
+        normalized: bool = False,
+        mode: str = "intersects",
+        grid_size: int | None = None,
+    ):
+        super().__init__(filter_type, TargetType.ANNOTATION)
+        if mode not in QUERY_MODES:
+            raise ValueError(f"Unknown query mode: {mode}. Use one of {QUERY_MODES}.")
+        require_numpy()
+        self.region = tuple(region)
+        self.normalized = normalized
+        self.mode = mode
+        self.grid_size = grid_size
+        self._ids: np.ndarray | None = None
+        self._id_set: frozenset[int] = frozenset()
+
+    @override
+    def prepare(self, dataset: "CocoData | CocoView") -> None:
+        index = dataset.spatial_index(self.normalized, self.grid_size)
+        self._ids = np.unique(index.annotation_ids[index.query(self.region, mode=self.mode)])
+        self._id_set = frozenset(self._ids.tolist())
+
+    def _check_prepared(self) -> None:
+        if self._ids is None:
+            raise RuntimeError(
+                f"{type(self).__name__} needs the spatial index, apply it with CocoData.apply_filter or CocoView.filter."
+            )
+
+    @override
+    def apply(self, data: dict) -> bool:
+        self._check_prepared()
+        return data["id"] in self._id_set
+
+    @override
+    def apply_batch(self, data: Sequence[dict]) -> Mask:
+        self._check_prepared()
+        assert self._ids is not None
+        return np.isin(annotation_array(data, "id"), self._ids)
+
+
+class _ImageAnnotationFilter(BaseFilter):
+    """Base class of image filters that aggregate the annotations of each image."""
+
+    # the images are streamed before their annotations are known
+    streamable = False
+
+    def __init__(self, filter_type: FilterType):
+        super().__init__(filter_type, TargetType.IMAGE)
+        self._stats: ImageAnnotationStats | None = None
+
+    @override
+    def prepare(self, dataset: "CocoData | CocoView") -> None:
+        self._stats = dataset.image_annotation_stats()
+
+    def _get_stats(self) -> ImageAnnotationStats:
+        """Return the statistics looked up by ``prepare``."""
+        if self._stats is None:
+            raise RuntimeError(
+                f"{type(self).__name__} needs the annotations, apply it with CocoData.apply_filter or CocoView.filter."
+            )
+        return self._stats
+
+
+class AnnotationCountFilter(_ImageAnnotationFilter):
+    """
+    Filter images based on the number of their annotations, optionally of some categories only.
+
+    Parameters
+    ----------
+    filter_type : FilterType
+        The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
+        If ``FilterType.INCLUSION``, the images whose number of annotations is in the range are included.
+        If ``FilterType.EXCLUSION``, the images whose number of annotations is in the range are excluded.
+    category_names : Iterable[str], optional
+        Only count annotations of the categories with these names.
+    category_ids : Iterable[int], optional
+        Only count annotations of these categories. If neither ``category_names`` nor
+        ``category_ids`` are given, all annotations are counted.
+    min_count : int or None, optional
+        Minimum number of annotations, default is None.
+    max_count : int or None, optional
+        Maximum number of annotations, default is None.
+
+    Notes
+    -----
+    The annotations are counted when the filter is applied with ``CocoData.apply_filter``
+    or ``CocoView.filter`` (see ``BaseFilter.prepare``), before the annotation filters
+    of the same call are applied. The filter cannot be used with ``CocoData.from_stream``
+    or ``CocoData.sample_stream``, which read the images before their annotations.
+    """
+
+    def __init__(
+        self,
+        filter_type: FilterType,
+        category_names: Iterable[str] = (),
+        category_ids: Iterable[int] = (),
+        min_count: int | None = None,
+        max_count: int | None = None,
+    ):
+        super().__init__(filter_type)
+        self.category_names: frozenset[str] = frozenset(category_names)
+        self.category_ids: frozenset[int] = frozenset(category_ids)
+        self.min_count = min_count
+        self.max_count = max_count
+        self._counted: frozenset[int] | None = None
+
+    @override
+    def prepare(self, dataset: "CocoData | CocoView") -> None:
+        super().prepare(dataset)
+        if self.category_names or self.category_ids:
+            named = {cat["id"] for cat in dataset.categories if cat["name"] in self.category_names}
+            self._counted = self.category_ids | named
+        else:
+            self._counted = None
+
+    @override
+    def apply(self, data: dict) -> bool:
+        return _in_range(self._get_stats().count(data["id"], self._counted), self.min_count, self.max_count)
+
+
+AREA_STATISTICS: tuple[str, ...] = ("min", "max")
+"""Supported values of the ``statistic`` argument of ``AnnotationAreaFilter``."""
+
+
+class AnnotationAreaFilter(_ImageAnnotationFilter):
+    """
+    Filter images based on the smallest or largest area of their annotations.
+
+    Parameters
+    ----------
+    filter_type : FilterType
+        The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
+        If ``FilterType.INCLUSION``, the images whose statistic is in the range are included.
+        If ``FilterType.EXCLUSION``, the images whose statistic is in the range are excluded.
+    min_area : float or None, optional
+        Minimum area, default is None.
+    max_area : float or None, optional
+        Maximum area, default is None.
+    statistic : str, optional
+        ``"min"`` for the smallest area or ``"max"`` for the largest area of the
+        annotations of an image, default is ``"max"``.
+
+    Raises
+    ------
+    ValueError
+        If ``statistic`` is not supported.
+
+    Notes
+    -----
+    The area is read from ``area``, as in ``BoxAreaFilter``. Images without annotations
+    do not match. See ``AnnotationCountFilter`` for when the annotations are aggregated.
+    """
+
+    def __init__(
+        self,
+        filter_type: FilterType,
+        min_area: float | None = None,
+        max_area: float | None = None,
+        statistic: str = "max",
+    ):
+        super().__init__(filter_type)
+        if statistic not in AREA_STATISTICS:
+            raise ValueError(f"Unknown statistic: {statistic}. Use one of {AREA_STATISTICS}.")
+        self.min_area = min_area
+        self.max_area = max_area
+        self.statistic = statistic
+
+    @override
+    def apply(self, data: dict) -> bool:
+        stats = self._get_stats()
+        areas = stats.min_area if self.statistic == "min" else stats.max_area
+        area = areas.get(data["id"])
+        return area is not None and _in_range(area, self.min_area, self.max_area)
+
+
+class CrowdFilter(_ImageAnnotationFilter):
+    """
+    Filter images that have a crowd annotation (``iscrowd`` set to 1).
+
+    Parameters
+    ----------
+    filter_type : FilterType
+        The type of the ``filter.FilterType.INCLUSION`` or ``FilterType.EXCLUSION``.
+        If ``FilterType.INCLUSION``, the images with a crowd annotation are included.
+        If ``FilterType.EXCLUSION``, the images with a crowd annotation are excluded.
+
+    Notes
+    -----
+    See ``AnnotationCountFilter`` for when the annotations are aggregated.
+    """
+
+    def __init__(self, filter_type: FilterType):
+        super().__init__(filter_type)
+
+    @override
+    def apply(self, data: dict) -> bool:
+        return data["id"] in self._get_stats().crowd_image_ids
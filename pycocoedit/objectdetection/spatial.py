@@ -0,0 +1,177 @@
+"""
+Spatial index over the bounding boxes of annotations.
+
+``SpatialIndex`` buckets bounding boxes into a uniform grid, per image, so that
+the annotations overlapping a region are found by looking up the cells the
+region covers instead of testing every annotation. Boxes are indexed either in
+pixel coordinates or in coordinates normalized by the size of their image, in
+which a region such as the top-left quadrant is the same for every image.
+Requires NumPy.
+"""
+
+from collections.abc import Iterable, Sequence
+
+from pycocoedit.objectdetection.columnar import ImageSizes, annotation_array, np, require_numpy
+
+QUERY_MODES: tuple[str, ...] = ("intersects", "within")
+"""Supported values of the ``mode`` argument of ``SpatialIndex.query``."""
+
+MAX_GRID_SIZE = 256
+"""Maximum number of cells along each axis of a ``SpatialIndex``."""
+
+
+class SpatialIndex:
+    """
+    Grid index over the bounding boxes of annotations.
+
+    The index covers the boxes with ``grid_size`` x ``grid_size`` cells. A box is
+    stored in every cell it overlaps, keyed by the cell and its image. The keys are
+    sorted, so the boxes of a cell, or of a cell of one image, are a contiguous range
+    found by binary search. A query gathers the boxes of the cells covered by the
+    region and tests only those against the region.
+
+    Small cells give fewer candidates per query but more cells per box. By default
+    the cells are about the size of the median box, so a typical box is stored in
+    up to four cells.
+
+    Parameters
+    ----------
+    annotations : Sequence[dict]
+        Annotation dictionaries or ``AnnotationColumns``.
+    images : Sequence[dict] or None, optional
+        Images of the annotations. When given, the boxes are indexed in coordinates
+        normalized by the width and height of their image, in [0, 1], and annotations
+        of unknown images are not indexed. Default is None (pixel coordinates).
+    grid_size : int or None, optional
+        Number of cells along each axis, at most ``MAX_GRID_SIZE``. Default is None
+        (chosen from the median box size).
+
+    Attributes
+    ----------
+    annotation_ids : np.ndarray
+        IDs of the annotations, in the order they were given.
+    normalized : bool
+        Whether the coordinates are normalized by the image size.
+
+    Raises
+    ------
+    ValueError
+        If ``grid_size`` is not between 1 and ``MAX_GRID_SIZE``.
+    """
+
+    def __init__(self, annotations: Sequence[dict], images: Sequence[dict] | None = None, grid_size: int | None = None):
+        if grid_size is not None and not 1 <= grid_size <= MAX_GRID_SIZE:
+            raise ValueError(f"grid_size must be between 1 and {MAX_GRID_SIZE}. grid_size: {grid_size}")
+        require_numpy()
+        self.normalized = images is not None
+        self.annotation_ids = annotation_array(annotations, "id")
+        image_ids = annotation_array(annotations, "image_id")
+        boxes = annotation_array(annotations, "bbox")
+        corners = np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]], axis=1)
+        if images is not None:
+            widths, heights = ImageSizes(images).lookup(image_ids)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                corners /= np.stack([widths, heights, widths, heights], axis=1)
+        positions = np.flatnonzero(np.isfinite(corners).all(axis=1))
+        self._corners = corners
+
+        if self.normalized:
+            extent = (1.0, 1.0)
+        else:
+            extent = (
+                float(corners[positions, 2].max(initial=0.0)) or 1.0,
+                float(corners[positions, 3].max(initial=0.0)) or 1.0,
+            )
+        if grid_size is None:
+            sizes = corners[positions, 2:] - corners[positions, :2]
+            median = np.median(sizes, axis=0) if len(sizes) else np.zeros(2)
+            cells_per_axis = [extent[axis] / median[axis] if median[axis] > 0 else 16.0 for axis in (0, 1)]
+            grid_size = int(np.clip(np.ceil(min(cells_per_axis)), 1, MAX_GRID_SIZE))
+        self.grid_size = grid_size
+        self._cell_size = (extent[0] / grid_size, extent[1] / grid_size)
+        self._image_keys, image_ranks = np.unique(image_ids, return_inverse=True)
+        image_ranks = image_ranks.reshape(-1)
+        # ordered by image, so that a stable sort by cell orders the entries by (cell, image)
+        positions = positions[np.argsort(image_ranks[positions], kind="stable")]
+
+        # one entry per (box, cell overlapped by the box)
+        x0, x1 = self._cells(corners[positions, 0], 0), self._cells(corners[positions, 2], 0)
+        y0, y1 = self._cells(corners[positions, 1], 1), self._cells(corners[positions, 3], 1)
+        columns = x1 - x0 + 1
+        counts = columns * (y1 - y0 + 1)
+        owner = np.repeat(np.arange(len(positions)), counts)
+        offset = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (y0[owner] + offset // columns[owner]) * grid_size + x0[owner] + offset % columns[owner]
+        # at most MAX_GRID_SIZE ** 2 cells: stable sorts of 16-bit integers are radix sorts
+        cells = cells.astype(np.uint16)
+        order = np.argsort(cells, kind="stable")
+        owner = owner[order]
+        self._positions = positions[owner]
+        self._keys = cells[order].astype(np.int64) * len(self._image_keys) + image_ranks[self._positions]
+
+    def _cells(self, values: "np.ndarray", axis: int) -> "np.ndarray":
+        """Return the cell index along an axis of coordinates, clipped to the grid."""
+        cells = np.floor(np.asarray(values, dtype=np.float64) / self._cell_size[axis])
+        return np.clip(cells, 0, self.grid_size - 1).astype(np.int64)
+
+    def query(
+        self, region: Sequence[float], image_ids: Iterable[int] | None = None, mode: str = "intersects"
+    ) -> "np.ndarray":
+        """
+        Find the annotations whose bounding box intersects or lies within a region.
+
+        Parameters
+        ----------
+        region : Sequence[float]
+            The region as ``[x, y, width, height]``, in normalized coordinates if the
+            index is ``normalized``.
+        image_ids : Iterable[int] or None, optional
+            Only find annotations of these images, default is None (all images).
+        mode : str, optional
+            ``"intersects"`` for boxes that intersect or touch the region, ``"within"`` for
+            boxes that lie inside the region, default is ``"intersects"``.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted positions of the found annotations in the annotations given to the index.
+
+        Raises
+        ------
+        ValueError
+            If ``mode`` is not supported.
+        """
+        if mode not in QUERY_MODES:
+            raise ValueError(f"Unknown query mode: {mode}. Use one of {QUERY_MODES}.")
+        x, y, width, height = region
+        x1, y1, x2, y2 = x, y, x + width, y + height
+        if len(self._keys) == 0 or x2 < x1 or y2 < y1:
+            return np.zeros(0, dtype=np.int64)
+
+        column_start, column_stop = self._cells(np.array([x1, x2]), 0).tolist()
+        row_start, row_stop = self._cells(np.array([y1, y2]), 1).tolist()
+        columns = np.arange(column_start, column_stop + 1)
+        rows = np.arange(row_start, row_stop + 1)
+        cells = (rows[:, None] * self.grid_size + columns[None, :]).reshape(-1)
+        num_images = len(self._image_keys)
+        if image_ids is None:
+            starts = cells * num_images
+            stops = starts + num_images
+        else:
+            wanted = np.unique(np.fromiter(image_ids, dtype=np.int64))
+            ranks = np.minimum(np.searchsorted(self._image_keys, wanted), num_images - 1)
+            ranks = ranks[self._image_keys[ranks] == wanted]
+            starts = (cells[:, None] * num_images + ranks[None, :]).reshape(-1)
+            stops = starts + 1
+        low = np.searchsorted(self._keys, starts)
+        lengths = np.searchsorted(self._keys, stops) - low
+        entries = np.repeat(low - (np.cumsum(lengths) - lengths), lengths) + np.arange(int(lengths.sum()))
+        # a box overlapping several of the cells has one entry in each
+        candidates = np.unique(self._positions[entries])
+
+        corners = self._corners[candidates]
+        if mode == "intersects":
+            keep = (corners[:, 0] <= x2) & (corners[:, 2] >= x1) & (corners[:, 1] <= y2) & (corners[:, 3] >= y1)
+        else:
+            keep = (corners[:, 0] >= x1) & (corners[:, 2] <= x2) & (corners[:, 1] >= y1) & (corners[:, 3] <= y2)
+        return candidates[keep]
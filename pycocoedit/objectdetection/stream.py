@@ -0,0 +1,462 @@
+"""
+Streaming JSON reader and writer for COCO datasets.
+
+This module provides an incremental reader and writer for COCO format JSON
+files. The elements of the large top-level arrays (``images``, ``annotations``
+and ``categories``) are decoded and encoded a few at a time, so a file can be
+processed without materializing the whole document in memory.
+
+``open_dataset`` opens plain or compressed (gzip, bz2, xz, zstd) files for
+these readers and writers.
+"""
+
+import bz2
+import gzip
+import importlib
+import importlib.util
+import io
+import json
+import lzma
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import IO, Any
+
+STREAMED_KEYS: tuple[str, ...] = ("images", "annotations", "categories")
+"""Top-level keys whose array elements are yielded one by one."""
+
+_WHITESPACE = " \t\n\r"
+
+
+class _Reader:
+    """
+    Buffered cursor over a text file for incremental JSON decoding.
+
+    Parameters
+    ----------
+    f : IO[str]
+        File object opened in text mode.
+    chunk_size : int
+        Number of characters to read at a time.
+    """
+
+    def __init__(self, f: IO[str], chunk_size: int):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._offset = 0  # number of characters dropped from the head of the buffer
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Read more data into the buffer, returning False at the end of the file."""
+        if self._eof:
+            return False
+        if self._pos > 0:
+            self._offset += self._pos
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        # grow the read size with the pending data so that large values are not re-parsed too often
+        data = self._f.read(max(self._chunk_size, len(self._buf)))
+        if not data:
+            self._eof = True
+            return False
+        self._buf += data
+        return True
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"{message} at offset {self._offset + self._pos}")
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it, or "" at the end of the file."""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def consume(self, expected: str) -> str:
+        """Consume the next non-whitespace character, which must be one of ``expected``."""
+        char = self.peek()
+        if char == "" or char not in expected:
+            raise self._error(f"Expected one of {list(expected)} but got {char!r}")
+        self._pos += 1
+        return char
+
+    def decode(self) -> Any:
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if not self._fill():
+                    raise self._error(f"Invalid JSON value ({e.msg})") from e
+                continue
+            # a number at the end of the buffer may continue in the next chunk
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_dataset(f: IO[str], chunk_size: int = 1 << 20) -> Iterator[tuple[str, Any]]:
+    """
+    Iterate over a COCO format JSON document incrementally.
+
+    For the keys in ``STREAMED_KEYS`` each element of the array is yielded
+    separately as ``(key, element)``. Every other top-level key is yielded
+    once as ``(key, value)``.
+
+    Parameters
+    ----------
+    f : IO[str]
+        File object opened in text mode.
+    chunk_size : int, optional
+        Number of characters to read at a time, default is 1M.
+
+    Yields
+    ------
+    tuple[str, Any]
+        Top-level key and an array element or the whole value.
+
+    Raises
+    ------
+    ValueError
+        If the document is not a JSON object or is malformed.
+    """
+    reader = _Reader(f, chunk_size)
+    reader.consume("{")
+    if reader.peek() == "}":
+        reader.consume("}")
+        return
+    while True:
+        key = reader.decode()
+        if not isinstance(key, str):
+            raise reader._error("Expected an object key")
+        reader.consume(":")
+        if key in STREAMED_KEYS and reader.peek() == "[":
+            reader.consume("[")
+            if reader.peek() == "]":
+                reader.consume("]")
+            else:
+                while True:
+                    yield key, reader.decode()
+                    if reader.consume(",]") == "]":
+                        break
+        else:
+            yield key, reader.decode()
+        if reader.consume(",}") == "}":
+            break
+    if reader.peek() != "":
+        raise reader._error("Extra data after the JSON document")
+
+
+ENCODERS: tuple[str, ...] = ("orjson", "ujson", "json")
+"""Supported JSON encoder backends, in the order they are tried by ``"auto"``."""
+
+
+def get_encoder(name: str = "auto") -> Callable[[Any], bytes]:
+    """
+    Return a function encoding a value to JSON bytes.
+
+    Parameters
+    ----------
+    name : str, optional
+        One of ``"orjson"``, ``"ujson"``, ``"json"`` or ``"auto"``, default is ``"auto"``.
+        ``"auto"`` uses the first backend of ``ENCODERS`` that is installed.
+
+    Returns
+    -------
+    Callable[[Any], bytes]
+        The encoding function.
+
+    Raises
+    ------
+    ValueError
+        If the name is not a supported encoder.
+    ImportError
+        If the requested backend is not installed.
+    """
+    if name == "auto":
+        for candidate in ENCODERS[:-1]:
+            if importlib.util.find_spec(candidate) is not None:
+                return get_encoder(candidate)
+        return get_encoder("json")
+    if name == "orjson":
+        orjson = importlib.import_module("orjson")
+        return orjson.dumps
+    if name == "ujson":
+        ujson = importlib.import_module("ujson")
+        return lambda value: ujson.dumps(value, ensure_ascii=False).encode("utf-8")
+    if name == "json":
+        # JSONEncoder.encode uses the C accelerated encoder, unlike json.dump which
+        # falls back to the pure Python iterative encoder
+        encode = json.JSONEncoder().encode
+        return lambda value: encode(value).encode("utf-8")
+    raise ValueError(f"Unknown encoder: {name}. Use one of {['auto', *ENCODERS]}.")
+
+
+def dump_dataset(
+    dataset: dict[str, Any], f: IO[bytes], chunk_size: int = 1000, encoder: str | Callable[[Any], bytes] = "json"
+) -> None:
+    """
+    Write a dataset as JSON, encoding the large arrays a chunk of elements at a time.
+
+    For the keys in ``STREAMED_KEYS`` the array is encoded ``chunk_size``
+    elements at a time and written to ``f`` immediately, so the encoded
+    document is never held in memory as a whole. With the ``"json"`` encoder
+    the output is identical to ``json.dump(dataset, f)``.
+
+    Parameters
+    ----------
+    dataset : dict[str, Any]
+        The dataset to write. The arrays may be any sequence of dictionaries, or an
+        iterator of dictionaries, which is consumed a chunk at a time.
+    f : IO[bytes]
+        File object opened in binary mode.
+    chunk_size : int, optional
+        Number of array elements encoded at a time, default is 1000.
+    encoder : str or Callable[[Any], bytes], optional
+        Encoder backend name passed to ``get_encoder`` or an encoding function, default is ``"json"``.
+
+    Raises
+    ------
+    ValueError
+        If chunk_size is not positive.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive. chunk_size: {chunk_size}")
+    encode = get_encoder(encoder) if isinstance(encoder, str) else encoder
+    write = f.write
+    write(b"{")
+    for i, (key, value) in enumerate(dataset.items()):
+        if i > 0:
+            write(b", ")
+        write(encode(key))
+        write(b": ")
+        if key in STREAMED_KEYS and isinstance(value, Iterator):
+            write(b"[")
+            separator = b""
+            while elements := list(islice(value, chunk_size)):
+                write(separator)
+                write(encode(elements)[1:-1])
+                separator = b", "
+            write(b"]")
+            continue
+        if key not in STREAMED_KEYS or not isinstance(value, Sequence) or isinstance(value, str):
+            write(encode(value))
+            continue
+        write(b"[")
+        for start in range(0, len(value), chunk_size):
+            if start > 0:
+                write(b", ")
+            chunk = value[start : start + chunk_size]
+            if not isinstance(chunk, list):
+                # e.g. columnar annotations, converted one chunk at a time
+                chunk = list(chunk)
+            # strip the brackets of the encoded chunk
+            write(encode(chunk)[1:-1])
+        write(b"]")
+    write(b"}")
+
+
+COMPRESSIONS: tuple[str, ...] = ("gzip", "bz2", "xz", "zstd")
+"""Supported compression formats. zstd requires the ``zstandard`` package."""
+
+_EXTENSIONS = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".lzma": "xz",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+}
+_MAGIC = [(b"\x1f\x8b", "gzip"), (b"BZh", "bz2"), (b"\xfd7zXZ\x00", "xz"), (b"\x28\xb5\x2f\xfd", "zstd")]
+_BLOCK_SIZE = 1 << 22
+
+
+def infer_compression(path: str) -> str | None:
+    """
+    Infer the compression format of a file from its extension.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+
+    Returns
+    -------
+    str or None
+        One of ``COMPRESSIONS``, or None for an uncompressed file.
+    """
+    for extension, compression in _EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return compression
+    return None
+
+
+def _sniff_compression(path: str) -> str | None:
+    """Detect the compression format of a file from its first bytes."""
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _zstandard() -> Any:
+    """Import the optional zstandard module."""
+    try:
+        return importlib.import_module("zstandard")
+    except ImportError:
+        raise ImportError("zstd compression requires zstandard. Install it with `pip install zstandard`.") from None
+
+
+class _ParallelCompressor(io.RawIOBase):
+    """
+    Writable stream compressing fixed-size blocks in a thread pool.
+
+    Each block is compressed independently into a complete stream (e.g. a gzip
+    member) and the streams are written in order. Concatenated gzip, bz2 and xz
+    streams are valid files that the standard modules decompress as a whole.
+    zlib, bz2 and lzma release the GIL while compressing, so blocks are
+    compressed in parallel.
+    """
+
+    def __init__(self, f: IO[bytes], compress: Callable[[bytes], bytes], threads: int):
+        super().__init__()
+        self._f = f
+        self._compress = compress
+        self._block_size = _BLOCK_SIZE
+        self._pool = ThreadPoolExecutor(max_workers=threads)
+        # bound the number of blocks in memory
+        self._max_pending = threads * 2
+        self._pending: deque[Future[bytes]] = deque()
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: Any) -> int:
+        self._buffer += b
+        while len(self._buffer) >= self._block_size:
+            self._submit(bytes(self._buffer[: self._block_size]))
+            del self._buffer[: self._block_size]
+        return len(b)
+
+    def _submit(self, block: bytes) -> None:
+        self._pending.append(self._pool.submit(self._compress, block))
+        while len(self._pending) > self._max_pending:
+            self._f.write(self._pending.popleft().result())
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buffer or not self._pending:
+                # an empty input still needs one (empty) compressed stream
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._f.write(self._pending.popleft().result())
+        finally:
+            self._pool.shutdown()
+            self._f.close()
+            super().close()
+
+
+def open_dataset(
+    path: str, mode: str = "r", compression: str | None = "infer", level: int | None = None, threads: int = 1
+) -> IO:
+    """
+    Open a dataset file, compressed or not.
+
+    Compressed files are decompressed and compressed on the fly, so no
+    decompressed copy is written to disk. Text modes use UTF-8.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+    mode : str, optional
+        ``"r"``, ``"rb"``, ``"w"`` or ``"wb"``, default is ``"r"``.
+    compression : str or None, optional
+        One of ``COMPRESSIONS``, None for no compression, or ``"infer"`` to detect it
+        from the first bytes of the file when reading and from the extension when writing,
+        default is ``"infer"``.
+    level : int or None, optional
+        Compression level, default is the default level of the format.
+    threads : int, optional
+        Number of threads compressing when writing, default is 1. gzip, bz2 and xz
+        files are then written as a sequence of independently compressed blocks.
+
+    Returns
+    -------
+    IO
+        The file object.
+
+    Raises
+    ------
+    ValueError
+        If mode or compression is not supported.
+    ImportError
+        If zstd is requested and zstandard is not installed.
+    """
+    if mode not in ("r", "rb", "w", "wb"):
+        raise ValueError(f"Unsupported mode: {mode}. Use 'r', 'rb', 'w' or 'wb'.")
+    reading = mode.startswith("r")
+    if compression == "infer":
+        compression = _sniff_compression(path) if reading else infer_compression(path)
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}. Use one of {COMPRESSIONS}, None or 'infer'.")
+
+    # the file objects of the compression modules have no common static type
+    f: Any
+    if compression is None:
+        f = open(path, "rb" if reading else "wb", buffering=1 << 20)
+    elif compression == "zstd":
+        zstandard = _zstandard()
+        if reading:
+            f = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+        else:
+            compressor = zstandard.ZstdCompressor(level=3 if level is None else level, threads=threads)
+            f = compressor.stream_writer(open(path, "wb"))
+    elif reading:
+        if compression == "gzip":
+            f = gzip.open(path, "rb")
+        elif compression == "bz2":
+            f = bz2.open(path, "rb")
+        else:
+            f = lzma.open(path, "rb")
+    elif threads <= 1:
+        if compression == "gzip":
+            f = gzip.open(path, "wb", compresslevel=9 if level is None else level)
+        elif compression == "bz2":
+            f = bz2.open(path, "wb", compresslevel=9 if level is None else level)
+        else:
+            f = lzma.open(path, "wb", preset=level)
+    else:
+        compress: Callable[[bytes], bytes]
+        if compression == "gzip":
+            compress = partial(gzip.compress, compresslevel=9 if level is None else level, mtime=0)
+        elif compression == "bz2":
+            compress = partial(bz2.compress, compresslevel=9 if level is None else level)
+        else:
+            compress = partial(lzma.compress, preset=level)
+        raw = _ParallelCompressor(open(path, "wb"), compress, threads)
+        f = io.BufferedWriter(raw, buffer_size=1 << 20)
+
+    if "b" in mode:
+        return f
+    return io.TextIOWrapper(f, encoding="utf-8")
@@ -0,0 +1,143 @@
+import pickle
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pycocoedit.objectdetection.binary import EncodedList, read_binary, write_binary  # noqa: E402
+from pycocoedit.objectdetection.columnar import AnnotationColumns  # noqa: E402
+from pycocoedit.objectdetection.data import CocoData  # noqa: E402
+from pycocoedit.objectdetection.filter import BoxAreaFilter, FilterType  # noqa: E402
+
+DATASET: dict = {
+    "info": {"description": "binary"},
+    "licenses": [{"id": 1, "name": "MIT", "url": ""}],
+    "images": [{"id": i, "file_name": f"{i}.jpg", "width": 10, "height": 10} for i in range(1, 4)],
+    "categories": [{"id": 1, "name": "cat", "supercategory": "animal"}],
+    "annotations": [
+        {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [[0, 0, 1, 1]], "area": 100, "bbox": [0, 0, 10, 10]},
+        {
+            "id": 2,
+            "image_id": 2,
+            "category_id": 1,
+            "segmentation": {"counts": "abc", "size": [10, 10]},
+            "area": 2.5,
+            "bbox": [5.5, 5, 5, 10],
+            "iscrowd": 1,
+            "score": 0.5,
+        },
+        {"id": 3, "image_id": 3, "category_id": 1, "segmentation": [], "area": 4, "bbox": [1, 2, 2, 2], "iscrowd": 0},
+    ],
+}
+
+
+def test_encoded_list():
+    values = [[1, 2], None, {"a": "b"}, "text"]
+    encoded = b'[1, 2]null{"a": "b"}"text"'
+    offsets = np.array([0, 6, 10, 20, 26])
+    lst = EncodedList(encoded, offsets)
+    assert len(lst) == 4
+    assert list(lst) == values
+    assert lst[-1] == "text"
+    assert list(lst[1:3]) == values[1:3]
+    assert list(pickle.loads(pickle.dumps(lst[1:3]))) == values[1:3]
+    assert lst[::2] == values[::2]
+    with pytest.raises(IndexError):
+        lst[4]
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_round_trip(tmp_path, use_mmap):
+    # given
+    path = tmp_path / "dataset.bin"
+    dataset = {**DATASET, "annotations": AnnotationColumns.from_records(DATASET["annotations"])}
+
+    # when
+    with open(path, "wb") as f:
+        write_binary(dataset, f)
+    loaded = read_binary(str(path), use_mmap=use_mmap)
+
+    # then
+    assert loaded["annotations"].to_records() == DATASET["annotations"]
+    assert {k: v for k, v in loaded.items() if k != "annotations"} == {
+        k: v for k, v in DATASET.items() if k != "annotations"
+    }
+    assert not loaded["annotations"].bbox.flags.writeable
+
+
+def test_empty(tmp_path):
+    path = tmp_path / "empty.bin"
+    CocoData({**DATASET, "annotations": []}).save_binary(str(path))
+    assert CocoData.load_binary(str(path)).annotations == []
+
+
+def test_not_binary(tmp_path):
+    path = tmp_path / "dataset.json"
+    path.write_text("{}")
+    with pytest.raises(ValueError):
+        read_binary(str(path))
+
+
+def test_coco_data(tmp_path):
+    # given
+    path = tmp_path / "dataset.bin"
+    CocoData(DATASET).save_binary(str(path))
+
+    # when
+    coco_data = CocoData.load_binary(str(path))
+
+    # then: filtering, correcting and saving work on the mapped columns
+    assert coco_data.is_columnar
+    coco_data.add_filter(BoxAreaFilter(FilterType.EXCLUSION, min_area=50)).apply_filter().correct()
+    assert [ann["id"] for ann in coco_data.annotation_columns] == [2, 3]
+    assert [img["id"] for img in coco_data.images] == [2, 3]
+
+    # a sliced dataset is written again without decoding the segmentations
+    sliced = tmp_path / "sliced.bin"
+    coco_data.save_binary(str(sliced))
+    assert CocoData.load_binary(str(sliced)).annotations == DATASET["annotations"][1:]
+
+
+def test_save_to_loaded_file(tmp_path):
+    # given: the columns are views of the mapped file
+    path = tmp_path / "dataset.bin"
+    CocoData(DATASET).save_binary(str(path))
+    coco_data = CocoData.load_binary(str(path))
+
+    # when
+    coco_data.save_binary(str(path))
+
+    # then
+    assert CocoData.load_binary(str(path)).annotations == DATASET["annotations"]
+    assert coco_data.annotations == DATASET["annotations"]
+    assert [p.name for p in tmp_path.iterdir()] == ["dataset.bin"]
+
+
+def test_exact_values_and_key_order(tmp_path):
+    # given: an integer area in a float column and keys in another order
+    annotations = [
+        {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [], "area": 5, "bbox": [0, 0, 1, 1.5]},
+        {"bbox": [0, 0, 1, 1], "area": 1.5, "id": 2, "image_id": 2, "category_id": 1, "segmentation": []},
+    ]
+    path = tmp_path / "dataset.bin"
+
+    # when
+    CocoData({**DATASET, "annotations": annotations}).save_binary(str(path))
+    loaded = CocoData.load_binary(str(path)).annotations
+
+    # then
+    assert [list(ann.items()) for ann in loaded] == [list(ann.items()) for ann in annotations]
+    assert isinstance(loaded[0]["area"], int) and isinstance(loaded[1]["bbox"][0], int)
+
+
+def test_parallel_filter_on_loaded_file(tmp_path):
+    # given: the columns of a loaded file are views of the mapped file
+    path = str(tmp_path / "dataset.bin")
+    CocoData(DATASET).save_binary(path)
+    coco_data = CocoData.load_binary(path)
+
+    # when: the annotations are sent to worker processes
+    coco_data.add_filter(BoxAreaFilter(FilterType.EXCLUSION, max_area=5)).apply_filter(workers=2)
+
+    # then
+    assert [ann["id"] for ann in coco_data.annotations] == [1]
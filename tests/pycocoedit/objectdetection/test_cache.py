@@ -0,0 +1,141 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pycocoedit.objectdetection.cache import DatasetCache  # noqa: E402
+from pycocoedit.objectdetection.columnar import AnnotationColumns  # noqa: E402
+from pycocoedit.objectdetection.data import CocoData  # noqa: E402
+
+DATASET: dict = {
+    "info": {},
+    "licenses": [],
+    "images": [{"id": i, "file_name": f"{i}.jpg", "width": 10, "height": 10} for i in range(1, 4)],
+    "annotations": [
+        {"id": i, "image_id": i, "category_id": 1, "segmentation": [], "area": i, "bbox": [0, 0, 1, i]}
+        for i in range(1, 4)
+    ],
+    "categories": [{"id": 1, "name": "cat", "supercategory": "animal"}],
+}
+
+
+def _write(path, dataset=DATASET):
+    path.write_text(json.dumps(dataset))
+    return str(path)
+
+
+@pytest.mark.parametrize("key", ["stat", "content"])
+def test_hit(tmp_path, key, monkeypatch):
+    # given
+    source = _write(tmp_path / "a.json")
+    cache = DatasetCache(str(tmp_path / "cache"), key=key)
+    first = CocoData(source, cache=cache)
+    assert first.get_dataset() == DATASET
+
+    # when: the JSON is not parsed again
+    def fail(*args, **kwargs):
+        raise AssertionError("parsed")
+
+    monkeypatch.setattr(json, "load", fail)
+    second = CocoData(source, cache=cache)
+
+    # then
+    assert second.is_columnar
+    assert second.get_dataset() == DATASET
+
+
+def test_miss_builds_columns_once(tmp_path, monkeypatch):
+    # given
+    source = _write(tmp_path / "a.json")
+    from_records = AnnotationColumns.from_records
+    calls = []
+
+    def counting(records):
+        calls.append(len(records))
+        return from_records(records)
+
+    monkeypatch.setattr(AnnotationColumns, "from_records", counting)
+
+    # when
+    coco_data = CocoData(source, cache=DatasetCache(str(tmp_path / "cache")))
+
+    # then
+    assert calls == [3]
+    assert coco_data.is_columnar
+    assert coco_data.get_dataset() == DATASET
+
+
+def test_cached_equals_plain_load(tmp_path):
+    # given: integers and floats in the same column
+    annotations = [dict(ann, area=area) for ann, area in zip(DATASET["annotations"], [1, 1.5, 2])]
+    source = _write(tmp_path / "a.json", {**DATASET, "annotations": annotations})
+    cache = DatasetCache(str(tmp_path / "cache"))
+
+    # when
+    miss = CocoData(source, cache=cache).annotations
+    hit = CocoData(source, cache=cache).annotations
+
+    # then
+    plain = CocoData(source).annotations
+    assert [repr(ann["area"]) for ann in miss] == [repr(ann["area"]) for ann in hit] == ["1", "1.5", "2"]
+    assert miss == hit == plain
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    # given
+    source = tmp_path / "a.json"
+    cache = DatasetCache(str(tmp_path / "cache"))
+    CocoData(_write(source), cache=cache)
+
+    # when
+    changed = {**DATASET, "images": DATASET["images"][:1]}
+    _write(source, changed)
+    os.utime(source, ns=(0, 0))
+
+    # then
+    assert CocoData(str(source), cache=cache).images == changed["images"]
+
+
+def test_validation_on_miss(tmp_path):
+    source = _write(tmp_path / "a.json", {**DATASET, "images": [{"id": 1}]})
+    cache = DatasetCache(str(tmp_path / "cache"))
+    with pytest.raises(KeyError):
+        CocoData(source, cache=cache)
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def test_lru_eviction(tmp_path):
+    # given: room for two entries
+    cache_dir = tmp_path / "cache"
+    sources = [_write(tmp_path / f"{i}.json") for i in range(3)]
+    probe = DatasetCache(str(cache_dir))
+    CocoData(sources[0], cache=probe)
+    entry_size = os.path.getsize(probe.entry_path(sources[0], "keys"))
+    cache = DatasetCache(str(cache_dir), max_bytes=entry_size * 2)
+
+    # when: the first entry is used after the second is added
+    CocoData(sources[1], cache=cache)
+    os.utime(cache.entry_path(sources[1], "keys"), ns=(1, 1))
+    CocoData(sources[0], cache=cache)
+    CocoData(sources[2], cache=cache)
+
+    # then: the least recently used entry is evicted
+    assert os.path.exists(cache.entry_path(sources[0], "keys"))
+    assert not os.path.exists(cache.entry_path(sources[1], "keys"))
+    assert os.path.exists(cache.entry_path(sources[2], "keys"))
+
+
+def test_clear(tmp_path):
+    cache = DatasetCache(str(tmp_path / "cache"))
+    CocoData(_write(tmp_path / "a.json"), cache=cache)
+    cache.clear()
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        DatasetCache(str(tmp_path), key="name")
+    with pytest.raises(ValueError):
+        DatasetCache(str(tmp_path), max_bytes=0)
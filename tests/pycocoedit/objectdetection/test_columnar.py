@@ -0,0 +1,110 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pycocoedit.objectdetection.columnar import AnnotationColumns  # noqa: E402
+
+ANNOTATIONS: list[dict] = [
+    {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [[0, 0, 1, 1]], "area": 100, "bbox": [0, 0, 10, 10]},
+    {
+        "id": 2,
+        "image_id": 1,
+        "category_id": 2,
+        "segmentation": {"counts": "abc", "size": [10, 10]},
+        "area": 50,
+        "bbox": [5, 5, 5, 10],
+        "iscrowd": 1,
+        "score": 0.5,
+    },
+    {"id": 3, "image_id": 2, "category_id": 1, "segmentation": [], "area": 4, "bbox": [1, 2, 2, 2], "iscrowd": 0},
+]
+
+
+def test_round_trip():
+    columns = AnnotationColumns.from_records(ANNOTATIONS)
+    assert len(columns) == 3
+    assert columns.to_records() == ANNOTATIONS
+    assert list(columns) == ANNOTATIONS
+
+
+def test_integer_types_are_kept():
+    records = AnnotationColumns.from_records(ANNOTATIONS).to_records()
+    assert isinstance(records[0]["area"], int)
+    assert isinstance(records[0]["bbox"][0], int)
+
+
+def test_float_values():
+    annotations = [dict(ANNOTATIONS[0], area=10.5, bbox=[0.5, 0, 1, 1])]
+    records = AnnotationColumns.from_records(annotations).to_records()
+    assert records == annotations
+
+
+MIXED: list[dict] = [
+    {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [], "area": 5, "bbox": [0, 0.5, 2, 3]},
+    {"bbox": [1, 2, 3, 4], "area": 1.5, "id": 2, "image_id": 1, "category_id": 1, "segmentation": [], "iscrowd": 0},
+    {"id": 3, "score": 0.5, "image_id": 2, "category_id": 1, "segmentation": [], "area": 2.0, "bbox": [1.0, 2, 3, 4]},
+]
+
+
+def _exact(records: list[dict]) -> list[tuple]:
+    """Keys in order and values with their types, which ``==`` does not compare."""
+    return [tuple((key, repr(value)) for key, value in record.items()) for record in records]
+
+
+def test_mixed_round_trip():
+    # given: integers and floats in the same column and keys in another order
+    columns = AnnotationColumns.from_records(MIXED)
+    assert columns.area.dtype == np.float64
+
+    # then: the values and the key order are restored exactly
+    assert _exact(columns.to_records()) == _exact(MIXED)
+    assert _exact(list(columns)) == _exact(MIXED)
+    assert _exact(columns.take([2, 0]).to_records()) == _exact([MIXED[2], MIXED[0]])
+    assert _exact(columns[1:].to_records()) == _exact(MIXED[1:])
+
+
+def test_mixed_concatenate():
+    parts = [AnnotationColumns.from_records(ANNOTATIONS), AnnotationColumns.from_records(MIXED)]
+    assert _exact(AnnotationColumns.concatenate(parts).to_records()) == _exact(ANNOTATIONS + MIXED)
+
+
+def test_columns():
+    columns = AnnotationColumns.from_records(ANNOTATIONS)
+    np.testing.assert_array_equal(columns.id, [1, 2, 3])
+    np.testing.assert_array_equal(columns.image_id, [1, 1, 2])
+    np.testing.assert_array_equal(columns.category_id, [1, 2, 1])
+    np.testing.assert_array_equal(columns.iscrowd, [-1, 1, 0])
+    assert columns.bbox.shape == (3, 4)
+    assert columns.extras == [None, {"score": 0.5}, None]
+    assert columns.nbytes > 0
+
+
+def test_indexing():
+    columns = AnnotationColumns.from_records(ANNOTATIONS)
+    assert columns[1] == ANNOTATIONS[1]
+    assert columns[-1] == ANNOTATIONS[2]
+    assert columns[1:].to_records() == ANNOTATIONS[1:]
+    assert columns.take([2, 0]).to_records() == [ANNOTATIONS[2], ANNOTATIONS[0]]
+    assert columns.take(np.array([True, False, True])).to_records() == [ANNOTATIONS[0], ANNOTATIONS[2]]
+    with pytest.raises(IndexError):
+        columns[3]
+
+
+def test_concatenate():
+    columns = AnnotationColumns.concatenate(
+        [AnnotationColumns.from_records(ANNOTATIONS[:1]), AnnotationColumns.from_records(ANNOTATIONS[1:])]
+    )
+    assert columns.to_records() == ANNOTATIONS
+
+
+def test_empty():
+    columns = AnnotationColumns.from_records([])
+    assert len(columns) == 0
+    assert columns.to_records() == []
+
+
+def test_invalid_bbox():
+    with pytest.raises(ValueError):
+        AnnotationColumns.from_records([dict(ANNOTATIONS[0], bbox=[0, 0, 1])])
+    with pytest.raises(ValueError):
+        AnnotationColumns.from_records([ANNOTATIONS[0], dict(ANNOTATIONS[0], bbox=[0, 0, 1])])
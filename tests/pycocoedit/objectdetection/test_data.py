@@ -1,8 +1,9 @@
 import json
+import random
 
 import pytest
 
-from pycocoedit.objectdetection.data import CocoData, _validate_keys
+from pycocoedit.objectdetection.data import CocoData, _validate_keys, validate_dataset
 from pycocoedit.objectdetection.filter import (
     BaseFilter,
     CategoryNameFilter,
@@ -60,6 +61,67 @@ def test_init(tmp_path):
     assert coco_data2.get_dataset() == dataset
 
 
+class TestCopyPolicy:
+    @staticmethod
+    def _make_dataset() -> dict:
+        return {
+            "info": {"year": 2020},
+            "licenses": [],
+            "images": [{"file_name": "image0.jpg", "id": 1, "height": 100, "width": 100}],
+            "annotations": [
+                {
+                    "id": 1,
+                    "image_id": 1,
+                    "category_id": 1,
+                    "segmentation": [[0, 0, 1, 1]],
+                    "area": 1,
+                    "bbox": [0, 0, 1, 1],
+                }
+            ],
+            "categories": [{"id": 1, "name": "category1", "supercategory": "category1"}],
+        }
+
+    @pytest.mark.parametrize("copy", ["deep", "shallow", "cow", "none"])
+    def test_equal(self, copy):
+        dataset = self._make_dataset()
+        assert CocoData(dataset, copy=copy).get_dataset() == dataset
+
+    def test_deep(self):
+        dataset = self._make_dataset()
+        coco_data = CocoData(dataset, copy="deep")
+        assert coco_data.annotations[0] is not dataset["annotations"][0]
+        assert coco_data.annotations[0]["bbox"] is not dataset["annotations"][0]["bbox"]
+
+    def test_shallow(self):
+        dataset = self._make_dataset()
+        coco_data = CocoData(dataset, copy="shallow")
+        assert coco_data.annotations is not dataset["annotations"]
+        assert coco_data.annotations[0] is not dataset["annotations"][0]
+        assert coco_data.annotations[0]["bbox"] is dataset["annotations"][0]["bbox"]
+        assert coco_data.info is not dataset["info"]
+
+    def test_cow(self):
+        dataset = self._make_dataset()
+        coco_data = CocoData(dataset, copy="cow")
+        assert coco_data.annotations is not dataset["annotations"]
+        assert coco_data.annotations[0] is dataset["annotations"][0]
+
+        # editing the lists does not affect the passed dataset
+        coco_data.add_filter(ImageFileNameFilter(FilterType.EXCLUSION, ["image0.jpg"])).correct()
+        assert coco_data.images == []
+        assert dataset == self._make_dataset()
+
+    def test_none(self):
+        dataset = self._make_dataset()
+        coco_data = CocoData(dataset, copy="none")
+        assert coco_data.images is dataset["images"]
+        assert coco_data.annotations is dataset["annotations"]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            CocoData(self._make_dataset(), copy="fast")
+
+
 class TestCorrect:
     def test_no_change(self):
         # given
@@ -87,6 +149,36 @@ class TestCorrect:
         # then
         assert coco_data.get_dataset() == dataset
 
+    def test_elements_replaced_in_place(self):
+        # given: the id indexes are built before an image and a category are replaced in place
+        dataset = {
+            "info": {},
+            "licenses": [],
+            "images": [
+                {"file_name": "image0.jpg", "id": 1, "height": 100, "width": 100},
+                {"file_name": "image1.jpg", "id": 2, "height": 200, "width": 200},
+            ],
+            "annotations": [
+                {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [], "area": 100, "bbox": [0, 0, 10, 10]},
+                {"id": 2, "image_id": 3, "category_id": 3, "segmentation": [], "area": 100, "bbox": [0, 0, 10, 10]},
+            ],
+            "categories": [
+                {"id": 1, "name": "category1", "supercategory": "category1"},
+                {"id": 2, "name": "category2", "supercategory": "category2"},
+            ],
+        }
+        coco_data = CocoData(dataset)
+        assert 3 not in coco_data.image_by_id and 3 not in coco_data.category_by_id
+
+        # when
+        coco_data.images[1] = {"file_name": "image3.jpg", "id": 3, "height": 300, "width": 300}
+        coco_data.categories[1] = {"id": 3, "name": "category3", "supercategory": "category3"}
+        coco_data.correct()
+
+        # then
+        assert [ann["id"] for ann in coco_data.annotations] == [1, 2]
+        assert [img["id"] for img in coco_data.images] == [1, 3]
+
     def test_remove_ann_with_no_category(self):
         # given
         dataset = {
@@ -480,6 +572,19 @@ def test_get_dataset():
     assert coco_data.get_dataset() == dataset
 
 
+def test_sample_follows_random_seed():
+    # given: no seed, the global generator of random is used as before seeds existed
+    random.seed(1)
+    expected = random.sample(images, 2)
+
+    # when
+    random.seed(1)
+    sampled = CocoData(dataset).sample(2, correct_image=False)
+
+    # then
+    assert sampled["images"] == expected
+
+
 def test_sample():
     # given
     num = 100
@@ -528,6 +633,147 @@ def test_sample():
     assert len(sampled.get("categories")) == 10
 
 
+class TestStratifiedSample:
+    @staticmethod
+    def _make_dataset():
+        # category 1 on 90 images, category 2 on 10 images and category 3 on 2 images
+        category_ids = [1] * 90 + [2] * 10 + [3] * 2
+        return {
+            "images": [{"id": i, "file_name": f"{i}.jpg", "width": 10, "height": 10} for i in range(len(category_ids))],
+            "annotations": [
+                {"id": i, "image_id": i, "category_id": c, "segmentation": [], "area": 1, "bbox": [0, 0, 1, 1]}
+                for i, c in enumerate(category_ids)
+            ],
+            "categories": [{"id": i, "name": f"c{i}", "supercategory": "c"} for i in (1, 2, 3)],
+        }
+
+    @staticmethod
+    def _category_counts(sampled):
+        counts = {}
+        for ann in sampled["annotations"]:
+            counts[ann["category_id"]] = counts.get(ann["category_id"], 0) + 1
+        return counts
+
+    def test_image_ids_by_category(self):
+        coco_data = CocoData(self._make_dataset())
+        assert coco_data.image_ids_by_category[3] == [100, 101]
+        assert len(coco_data.image_ids_by_category[1]) == 90
+
+    def test_balanced(self):
+        sampled = CocoData(self._make_dataset()).sample(12, seed=0, mode="balanced")
+        counts = self._category_counts(sampled)
+        assert len(sampled["images"]) == 12
+        # category 3 has only 2 images, the rest is drawn uniformly
+        assert counts[3] == 2
+        assert counts[2] >= 4
+
+    def test_proportional(self):
+        sampled = CocoData(self._make_dataset()).sample(51, seed=0, mode="proportional")
+        assert self._category_counts(sampled) == {1: 45, 2: 5, 3: 1}
+
+    def test_min_per_category(self):
+        sampled = CocoData(self._make_dataset()).sample(10, seed=0, mode="min_per_category", min_per_category=2)
+        counts = self._category_counts(sampled)
+        assert len(sampled["images"]) == 10
+        assert counts[2] >= 2
+        assert counts[3] == 2
+
+    @pytest.mark.parametrize("mode", ["uniform", "balanced", "proportional", "min_per_category"])
+    def test_seed(self, mode):
+        first = CocoData(self._make_dataset()).sample(20, seed=1, mode=mode)
+        second = CocoData(self._make_dataset()).sample(20, seed=1, mode=mode)
+        assert first == second
+        assert len({img["id"] for img in first["images"]}) == 20
+
+    def test_columnar(self):
+        pytest.importorskip("numpy")
+        sampled = CocoData(self._make_dataset()).to_columnar().sample(12, seed=0, mode="balanced")
+        expected = CocoData(self._make_dataset()).sample(12, seed=0, mode="balanced")
+        assert sampled == expected
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            CocoData(self._make_dataset()).sample(1, mode="systematic")
+
+
+class TestSplit:
+    @staticmethod
+    def _make_dataset(num=200):
+        return {
+            "images": [
+                {"id": i, "file_name": f"{i}.jpg", "width": 10, "height": 10, "video_id": i // 10} for i in range(num)
+            ],
+            "annotations": [
+                {
+                    "id": i,
+                    "image_id": i,
+                    "category_id": 1 + (i % 20 == 0),
+                    "segmentation": [],
+                    "area": 1,
+                    "bbox": [0, 0, 1, 1],
+                }
+                for i in range(num)
+            ],
+            "categories": [
+                {"id": 1, "name": "common", "supercategory": "c"},
+                {"id": 2, "name": "rare", "supercategory": "c"},
+            ],
+        }
+
+    def test_split(self):
+        # when
+        train, val = CocoData(self._make_dataset()).split([0.8, 0.2], seed=0)
+
+        # then: disjoint, complete and consistent
+        train_ids = {img["id"] for img in train.images}
+        val_ids = {img["id"] for img in val.images}
+        assert not train_ids & val_ids
+        assert train_ids | val_ids == set(range(200))
+        assert {ann["image_id"] for ann in train.annotations} == train_ids
+        assert {ann["image_id"] for ann in val.annotations} == val_ids
+        assert 120 < len(train_ids) < 190
+        assert train.categories == val.categories
+
+    def test_deterministic_and_order_independent(self):
+        data = self._make_dataset()
+        first = CocoData(data).split([0.5, 0.5], seed=3)
+        data["images"].reverse()
+        second = CocoData(data).split([0.5, 0.5], seed=3)
+        for a, b in zip(first, second):
+            assert sorted(img["id"] for img in a.images) == sorted(img["id"] for img in b.images)
+
+    def test_stable_when_images_are_added(self):
+        small = CocoData(self._make_dataset(100)).split([0.7, 0.3], seed=1)
+        large = CocoData(self._make_dataset(200)).split([0.7, 0.3], seed=1)
+        for a, b in zip(small, large):
+            assert {img["id"] for img in a.images} <= {img["id"] for img in b.images}
+
+    def test_group_by(self):
+        subsets = CocoData(self._make_dataset()).split([0.5, 0.3, 0.2], group_by="video_id")
+        videos = [{img["video_id"] for img in subset.images} for subset in subsets]
+        assert sum(len(v) for v in videos) == 20
+        assert not (videos[0] & videos[1]) and not (videos[0] & videos[2]) and not (videos[1] & videos[2])
+
+    def test_stratify(self):
+        train, val = CocoData(self._make_dataset()).split([0.5, 0.5], stratify=True)
+        # 10 images of the rare category, split evenly
+        assert sum(ann["category_id"] == 2 for ann in train.annotations) == 5
+        assert sum(ann["category_id"] == 2 for ann in val.annotations) == 5
+        assert len(train.images) == len(val.images) == 100
+
+    def test_columnar(self):
+        pytest.importorskip("numpy")
+        expected = CocoData(self._make_dataset()).split([0.8, 0.2])
+        subsets = CocoData(self._make_dataset()).to_columnar().split([0.8, 0.2])
+        assert all(subset.is_columnar for subset in subsets)
+        assert [s.annotations for s in subsets] == [s.annotations for s in expected]
+
+    @pytest.mark.parametrize("ratios", [[], [0, 0], [0.5, -0.1]])
+    def test_invalid_ratios(self, ratios):
+        with pytest.raises(ValueError):
+            CocoData(self._make_dataset()).split(ratios)
+
+
 class TestSave:
     @staticmethod
     def _make_base_dataset() -> dict:
@@ -604,6 +850,21 @@ class TestSave:
             loaded = json.load(f)
         assert {c["id"] for c in loaded["categories"]} == {1}  # isolated category removed
 
+    @pytest.mark.parametrize("encoder", ["json", "auto"])
+    def test_save_chunked(self, tmp_path, encoder):
+        # given
+        ds = self._make_base_dataset()
+        coco = CocoData(ds)
+        out_path = tmp_path / "out.json"
+
+        # when
+        coco.save(out_path.as_posix(), correct_image=False, chunk_size=1, encoder=encoder)
+
+        # then
+        with out_path.open() as f:
+            loaded = json.load(f)
+        assert loaded == ds
+
     def test_save_to_nonexistent_dir(self, tmp_path):
         # given
         ds = self._make_base_dataset()
@@ -613,3 +874,306 @@ class TestSave:
         # when / then
         with pytest.raises(FileNotFoundError):
             coco.save(out_path.as_posix())
+
+
+class TestIndexes:
+    @staticmethod
+    def _make_dataset() -> dict:
+        return {
+            "info": {},
+            "licenses": [],
+            "images": [
+                {"file_name": "img0.jpg", "id": 1, "height": 100, "width": 100},
+                {"file_name": "img1.jpg", "id": 2, "height": 200, "width": 200},
+            ],
+            "annotations": [
+                {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [], "area": 100, "bbox": [0, 0, 10, 10]},
+                {"id": 2, "image_id": 1, "category_id": 2, "segmentation": [], "area": 100, "bbox": [0, 0, 10, 10]},
+                {"id": 3, "image_id": 2, "category_id": 1, "segmentation": [], "area": 100, "bbox": [0, 0, 10, 10]},
+            ],
+            "categories": [
+                {"id": 1, "name": "cat", "supercategory": "animal"},
+                {"id": 2, "name": "dog", "supercategory": "animal"},
+            ],
+        }
+
+    def test_indexes(self):
+        # given
+        ds = self._make_dataset()
+
+        # when
+        coco = CocoData(ds)
+
+        # then
+        assert coco.image_by_id == {1: ds["images"][0], 2: ds["images"][1]}
+        assert coco.image_by_file_name == {"img0.jpg": ds["images"][0], "img1.jpg": ds["images"][1]}
+        assert coco.category_by_id == {1: ds["categories"][0], 2: ds["categories"][1]}
+        assert coco.annotations_by_image == {1: ds["annotations"][:2], 2: [ds["annotations"][2]]}
+        assert coco.annotations_by_category == {
+            1: [ds["annotations"][0], ds["annotations"][2]],
+            2: [ds["annotations"][1]],
+        }
+
+    def test_index_is_reused(self):
+        coco = CocoData(self._make_dataset())
+        assert coco.annotations_by_image is coco.annotations_by_image
+        # correct without changes keeps the indexes
+        index = coco.annotations_by_image
+        coco.correct()
+        assert coco.annotations_by_image is index
+
+    def test_index_is_rebuilt_on_reassign(self):
+        coco = CocoData(self._make_dataset())
+        index = coco.image_by_id
+        coco.images = coco.images[:1]
+        assert coco.image_by_id is not index
+        assert set(coco.image_by_id) == {1}
+
+    def test_index_is_rebuilt_on_append(self):
+        coco = CocoData(self._make_dataset())
+        assert set(coco.category_by_id) == {1, 2}
+        coco.categories.append({"id": 3, "name": "bird", "supercategory": "animal"})
+        assert set(coco.category_by_id) == {1, 2, 3}
+
+    def test_invalidate_indexes(self):
+        coco = CocoData(self._make_dataset())
+        assert set(coco.annotations_by_image) == {1, 2}
+        coco.annotations[2]["image_id"] = 1
+        coco.invalidate_indexes()
+        assert set(coco.annotations_by_image) == {1}
+
+    def test_index_after_filter(self):
+        coco = CocoData(self._make_dataset())
+        assert set(coco.annotations_by_category) == {1, 2}
+        coco.add_filter(CategoryNameFilter(FilterType.EXCLUSION, ["dog"])).apply_filter().correct()
+        assert set(coco.category_by_id) == {1}
+        assert set(coco.annotations_by_category) == {1}
+
+
+class TestFromStream:
+    def test_from_stream(self, tmp_path):
+        # given
+        path = tmp_path / "annotations.json"
+        path.write_text(json.dumps(dataset))
+
+        # when
+        coco_data = CocoData.from_stream(str(path), chunk_size=16)
+
+        # then
+        assert coco_data.get_dataset() == dataset
+        assert coco_data.filter_applied
+
+    def test_from_stream_with_filters(self, tmp_path):
+        # given
+        path = tmp_path / "annotations.json"
+        path.write_text(json.dumps(dataset))
+        image_filter = ImageFileNameFilter(FilterType.INCLUSION, ["image0.jpg", "image1.jpg"])
+        category_filter = CategoryNameFilter(FilterType.EXCLUSION, ["category0"])
+
+        # when
+        coco_data = CocoData.from_stream(str(path), filters=[image_filter, category_filter])
+
+        # then
+        assert coco_data.images == [images[0], images[1]]
+        assert coco_data.categories == [categories[1], categories[2]]
+        assert coco_data.annotations == annotations
+        assert coco_data.image_filters.include_filters == [image_filter]
+        assert coco_data.category_filters.exclude_filters == [category_filter]
+
+        # filters are already applied; correct removes the orphans only
+        coco_data.correct()
+        assert coco_data.images == [images[1]]
+        assert coco_data.annotations == [annotations[1]]
+
+    def test_from_stream_missing_keys(self, tmp_path):
+        path = tmp_path / "annotations.json"
+        path.write_text(json.dumps({"images": [{"id": 1}], "annotations": [], "categories": []}))
+        with pytest.raises(KeyError):
+            CocoData.from_stream(str(path))
+
+
+class TestSampleStream:
+    @staticmethod
+    def _write(tmp_path, num=50):
+        data = {
+            "info": {"description": "test"},
+            "images": [{"id": i, "file_name": f"{i}.jpg", "width": 10, "height": 10} for i in range(num)],
+            "annotations": [
+                {"id": i, "image_id": i // 2, "category_id": 1, "segmentation": [], "area": 1, "bbox": [0, 0, 1, 1]}
+                for i in range(num * 2)
+            ],
+            "categories": [{"id": 1, "name": "cat", "supercategory": "animal"}],
+        }
+        path = tmp_path / "annotations.json"
+        path.write_text(json.dumps(data))
+        return str(path)
+
+    def test_sample_stream(self, tmp_path):
+        # when
+        coco_data = CocoData.sample_stream(self._write(tmp_path), 5, seed=0, chunk_size=64)
+
+        # then
+        image_ids = [img["id"] for img in coco_data.images]
+        assert len(image_ids) == 5
+        assert image_ids == sorted(image_ids)
+        assert sorted(ann["image_id"] for ann in coco_data.annotations) == sorted(image_ids * 2)
+        assert coco_data.info == {"description": "test"}
+        assert coco_data.categories == [{"id": 1, "name": "cat", "supercategory": "animal"}]
+
+    def test_seed(self, tmp_path):
+        path = self._write(tmp_path)
+        first = CocoData.sample_stream(path, 10, seed=1)
+        second = CocoData.sample_stream(path, 10, seed=1)
+        assert first.get_dataset() == second.get_dataset()
+
+    def test_uniform(self, tmp_path):
+        # every image is drawn with probability n / N
+        path = self._write(tmp_path, num=10)
+        counts = [0] * 10
+        for seed in range(200):
+            for img in CocoData.sample_stream(path, 3, seed=seed).images:
+                counts[img["id"]] += 1
+        assert all(30 < count < 90 for count in counts)
+
+    def test_with_filters(self, tmp_path):
+        image_filter = ImageFileNameFilter(FilterType.INCLUSION, ["1.jpg", "2.jpg", "3.jpg"])
+        coco_data = CocoData.sample_stream(self._write(tmp_path), 3, filters=[image_filter])
+        assert [img["id"] for img in coco_data.images] == [1, 2, 3]
+        assert coco_data.filter_applied
+
+    def test_too_many(self, tmp_path):
+        with pytest.raises(ValueError):
+            CocoData.sample_stream(self._write(tmp_path, num=3), 4)
+
+
+class TestValidation:
+    @staticmethod
+    def _make_dataset():
+        return {
+            "images": [{"id": 1, "file_name": "a.jpg", "width": 10, "height": 10}],
+            "annotations": [
+                {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [], "area": 4, "bbox": [0, 0, 2, 2]}
+            ],
+            "categories": [{"id": 1, "name": "cat", "supercategory": "animal"}],
+        }
+
+    def test_validate_dataset_valid(self):
+        assert validate_dataset(self._make_dataset()) == []
+
+    def test_validate_dataset_collects_all_errors(self):
+        # given
+        data = self._make_dataset()
+        data["images"].append({"id": 1, "file_name": "b.jpg", "width": "10", "height": 10})
+        data["categories"].append({"id": True, "name": "dog", "supercategory": "animal"})
+        data["annotations"] += [
+            {"id": 2, "image_id": 9, "category_id": 5, "segmentation": None, "area": 1, "bbox": [0, 0, -1, 2]},
+            {"id": 3, "image_id": 1, "category_id": 1, "segmentation": {}, "area": 1, "bbox": [0, 0, 1]},
+            {"id": 4, "image_id": 1, "category_id": 1},
+        ]
+
+        # when
+        errors = validate_dataset(data)
+
+        # then
+        assert errors == [
+            "Duplicate image ID: 1",
+            "image width and height must be numbers in image with ID: 1",
+            "category ID must be an integer: True",
+            "annotation with ID: 2 refers to a missing image ID: 9",
+            "annotation with ID: 2 refers to a missing category ID: 5",
+            "annotation bbox width and height must not be negative in annotation with ID: 2",
+            "annotation segmentation must be a list or a dictionary in annotation with ID: 2",
+            "annotation bbox must be a list of 4 numbers in annotation with ID: 3",
+            "Missing keys ['bbox', 'area', 'segmentation'] in annotation with ID: 4",
+        ]
+
+    def test_full(self):
+        data = self._make_dataset()
+        assert CocoData(data, validate="full").get_dataset()["annotations"] == data["annotations"]
+        data["annotations"][0]["image_id"] = 2
+        with pytest.raises(ValueError, match="1 error"):
+            CocoData(data, validate="full")
+
+    def test_lazy(self):
+        # given
+        data = self._make_dataset()
+        del data["images"][0]["width"]
+
+        # when: construction does not validate
+        coco_data = CocoData(data, validate="lazy")
+
+        # then: the first operation does
+        with pytest.raises(KeyError, match="Missing keys"):
+            coco_data.apply_filter()
+
+    def test_none(self):
+        data = self._make_dataset()
+        del data["images"][0]["width"]
+        coco_data = CocoData(data, validate="none")
+        assert coco_data.images == data["images"]
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            CocoData(self._make_dataset(), validate="strict")
+
+
+class TestColumnar:
+    @pytest.fixture(autouse=True)
+    def _numpy(self):
+        pytest.importorskip("numpy")
+
+    def test_to_columnar(self):
+        coco_data = CocoData(dataset).to_columnar()
+        assert coco_data.is_columnar
+        assert len(coco_data.annotation_columns) == 3
+        assert coco_data.get_dataset() == dataset
+        # reading the annotations does not change the storage
+        assert coco_data.is_columnar
+        assert coco_data.annotations is coco_data.annotations
+
+    def test_reading_keeps_views_and_indexes(self):
+        # given
+        coco_data = CocoData(dataset).to_columnar()
+        view = coco_data.view()
+        by_image = coco_data.annotations_by_image
+
+        # when
+        coco_data.get_dataset()
+        coco_data.annotations_by_category
+
+        # then
+        assert view.images == images
+        assert coco_data.annotations_by_image is by_image
+        assert by_image[images[0]["id"]][0] is coco_data.annotations[0]
+        assert coco_data.is_columnar
+
+    def test_assign_converted_annotations(self):
+        coco_data = CocoData(dataset).to_columnar()
+        coco_data.annotations = coco_data.annotations[:1]
+        assert not coco_data.is_columnar
+        assert coco_data.annotations == annotations[:1]
+
+    def test_annotation_columns_is_cached(self):
+        coco_data = CocoData(dataset)
+        columns = coco_data.annotation_columns
+        assert not coco_data.is_columnar
+        assert coco_data.annotation_columns is columns
+        coco_data.annotations = coco_data.annotations[:1]
+        assert len(coco_data.annotation_columns) == 1
+
+    def test_correct(self):
+        coco_data = CocoData(dataset).to_columnar()
+        coco_data.add_filter(ImageFileNameFilter(FilterType.EXCLUSION, ["image0.jpg"]))
+        coco_data.correct(correct_category=True)
+        assert coco_data.is_columnar
+        assert coco_data.images == images[1:]
+        assert coco_data.categories == categories[1:]
+        assert coco_data.annotations == annotations[1:]
+
+    def test_save(self, tmp_path):
+        coco_data = CocoData(dataset).to_columnar()
+        out_path = tmp_path / "out.json"
+        coco_data.save(out_path.as_posix(), chunk_size=2)
+        assert coco_data.is_columnar
+        with out_path.open() as f:
+            assert json.load(f) == dataset
@@ -5,7 +5,7 @@ test for ``pycocoedit.objectdetection.data.CocoData.apply_filter``
 import pytest
 
 from pycocoedit.objectdetection.data import CocoData
-from pycocoedit.objectdetection.filter import BaseFilter, FilterType, TargetType
+from pycocoedit.objectdetection.filter import BaseFilter, BoxAreaFilter, FilterType, ImageFileNameFilter, TargetType
 
 
 class AnnotationExcludeDummyFilter(BaseFilter):
@@ -158,3 +158,232 @@ def test_include_combination(filter1: BaseFilter, filter2: BaseFilter, is_keep_d
     kept = len(filtered.annotations) == 1
 
     assert kept == is_keep_data
+
+
+def test_include_and_exclude_in_one_pass() -> None:
+    """Inclusion and exclusion filters added before a single apply_filter are both applied."""
+    # given
+    coco_data = {
+        "images": [
+            {"id": 1, "file_name": "a.jpg", "width": 640, "height": 480},
+            {"id": 2, "file_name": "b.jpg", "width": 640, "height": 480},
+            {"id": 3, "file_name": "c.jpg", "width": 640, "height": 480},
+        ],
+        "annotations": [],
+        "categories": [],
+    }
+    coco = (
+        CocoData(coco_data)
+        .add_filter(ImageFileNameFilter(FilterType.INCLUSION, ["a.jpg", "b.jpg"]))
+        .add_filter(ImageFileNameFilter(FilterType.EXCLUSION, ["b.jpg"]))
+    )
+
+    # when
+    coco.apply_filter()
+
+    # then
+    assert [img["file_name"] for img in coco.images] == ["a.jpg"]
+
+
+def test_apply_filter_columnar() -> None:
+    """Annotation filters are applied to columnar annotations without converting them."""
+    pytest.importorskip("numpy")
+    # given
+    coco = CocoData(COCO_DATA).to_columnar()
+    coco.add_filter(BoxAreaFilter(FilterType.EXCLUSION, min_area=50))
+
+    # when
+    coco.apply_filter()
+
+    # then
+    assert coco.is_columnar
+    assert len(coco.annotation_columns) == 0
+
+
+def test_filter_report() -> None:
+    # given
+    coco = CocoData(COCO_DATA).add_filter(ImageFileNameFilter(FilterType.EXCLUSION, ["drop.jpg"]))
+
+    # when
+    coco.apply_filter()
+
+    # then
+    (row,) = coco.filter_report()
+    assert row["target"] == "image"
+    assert row["filter"] == "ImageFileNameFilter"
+    assert row["evaluated"] == 1
+    assert row["matched"] == 0
+
+
+class ImageIdCountingFilter(BaseFilter):
+    """Image filter matching the given ids and recording the evaluated ids."""
+
+    def __init__(self, filter_type: FilterType, ids: set[int]) -> None:
+        super().__init__(filter_type, TargetType.IMAGE)
+        self.ids = ids
+        self.evaluated: list[int] = []
+
+    def apply(self, data: dict) -> bool:
+        self.evaluated.append(data["id"])
+        return data["id"] in self.ids
+
+
+INCREMENTAL_DATA: dict = {
+    "images": [{"id": i, "file_name": f"{i}.jpg", "width": 10, "height": 10} for i in range(5)],
+    "annotations": [],
+    "categories": [],
+}
+
+
+class TestIncrementalApplyFilter:
+    def test_only_new_filter_is_evaluated(self) -> None:
+        # given
+        first = ImageIdCountingFilter(FilterType.EXCLUSION, {0, 1})
+        second = ImageIdCountingFilter(FilterType.EXCLUSION, {2})
+        coco = CocoData(INCREMENTAL_DATA).add_filter(first).apply_filter()
+
+        # when
+        coco.add_filter(second).apply_filter()
+
+        # then
+        assert first.evaluated == [0, 1, 2, 3, 4]
+        assert second.evaluated == [2, 3, 4]
+        assert [img["id"] for img in coco.images] == [3, 4]
+
+    def test_new_inclusion_filter_after_inclusion_filter(self) -> None:
+        # given: the remaining images already match an inclusion filter
+        first = ImageIdCountingFilter(FilterType.INCLUSION, {0, 1})
+        second = ImageIdCountingFilter(FilterType.INCLUSION, {2})
+        coco = CocoData(INCREMENTAL_DATA).add_filter(first).apply_filter()
+
+        # when
+        coco.add_filter(second).apply_filter()
+
+        # then
+        assert second.evaluated == []
+        assert [img["id"] for img in coco.images] == [0, 1]
+
+    def test_first_inclusion_filter_after_exclusion_filter(self) -> None:
+        # given
+        coco = CocoData(INCREMENTAL_DATA).add_filter(ImageIdCountingFilter(FilterType.EXCLUSION, {0})).apply_filter()
+        include = ImageIdCountingFilter(FilterType.INCLUSION, {0, 1, 2})
+
+        # when
+        coco.add_filter(include).apply_filter()
+
+        # then
+        assert include.evaluated == [1, 2, 3, 4]
+        assert [img["id"] for img in coco.images] == [1, 2]
+
+    def test_reassigned_list(self) -> None:
+        # given
+        exclude = ImageIdCountingFilter(FilterType.EXCLUSION, {0})
+        include = ImageIdCountingFilter(FilterType.INCLUSION, {0, 1, 2})
+        coco = CocoData(INCREMENTAL_DATA).add_filter(exclude).add_filter(include).apply_filter()
+        assert [img["id"] for img in coco.images] == [1, 2]
+
+        # when: the images are replaced with unfiltered data
+        coco.images = list(INCREMENTAL_DATA["images"])
+        assert not coco.filter_applied
+        coco.apply_filter()
+
+        # then: all the image filters apply to the new list
+        assert [img["id"] for img in coco.images] == [1, 2]
+        assert include.evaluated == [0, 1, 2, 3, 4, 0, 1, 2, 3, 4]
+
+    def test_internal_changes_keep_filters_applied(self) -> None:
+        # given
+        exclude = ImageIdCountingFilter(FilterType.EXCLUSION, {0})
+        coco = CocoData(INCREMENTAL_DATA).add_filter(exclude).apply_filter()
+
+        # when: the images are sampled
+        coco.sample(2, seed=0, correct_image=False)
+        coco.apply_filter()
+
+        # then
+        assert exclude.evaluated == [0, 1, 2, 3, 4]
+
+    def test_failed_filter_is_retried(self) -> None:
+        # given: a filter that raises on its first evaluation
+        class FailingOnceFilter(ImageIdCountingFilter):
+            def apply(self, data: dict) -> bool:
+                if not self.evaluated:
+                    self.evaluated.append(-1)
+                    raise KeyboardInterrupt
+                return super().apply(data)
+
+        exclude = ImageIdCountingFilter(FilterType.EXCLUSION, {0})
+        failing = FailingOnceFilter(FilterType.EXCLUSION, {1})
+        coco = CocoData(INCREMENTAL_DATA).add_filter(exclude).apply_filter().add_filter(failing)
+        with pytest.raises(KeyboardInterrupt):
+            coco.apply_filter()
+        assert not coco.filter_applied
+
+        # when
+        coco.apply_filter()
+
+        # then: the failed filter is evaluated again, the other one is not
+        assert [img["id"] for img in coco.images] == [2, 3, 4]
+        assert exclude.evaluated == [0, 1, 2, 3, 4]
+
+    def test_reapply(self) -> None:
+        # given
+        exclude = ImageIdCountingFilter(FilterType.EXCLUSION, {0})
+        coco = CocoData(INCREMENTAL_DATA).add_filter(exclude).apply_filter()
+
+        # when
+        coco.apply_filter(reapply=True)
+
+        # then
+        assert exclude.evaluated == [0, 1, 2, 3, 4, 1, 2, 3, 4]
+        assert [img["id"] for img in coco.images] == [1, 2, 3, 4]
+
+
+PARALLEL_DATA: dict = {
+    "images": [{"id": i, "file_name": f"{i}.jpg", "width": 10, "height": 10} for i in range(20)],
+    "annotations": [
+        {"id": i, "image_id": i, "category_id": 1, "segmentation": [], "area": i, "bbox": [0, 0, 1, i]}
+        for i in range(20)
+    ],
+    "categories": [{"id": 1, "name": "cat", "supercategory": "animal"}],
+}
+
+
+class TestParallelApplyFilter:
+    @pytest.mark.parametrize("executor", ["process", "thread"])
+    def test_parallel(self, executor: str) -> None:
+        # given
+        coco = (
+            CocoData(PARALLEL_DATA)
+            .add_filter(ImageFileNameFilter(FilterType.EXCLUSION, ["3.jpg", "15.jpg"]))
+            .add_filter(BoxAreaFilter(FilterType.INCLUSION, min_area=5))
+        )
+
+        # when
+        coco.apply_filter(workers=2, executor=executor)
+
+        # then: same result and order as the serial evaluation
+        assert [img["id"] for img in coco.images] == [i for i in range(20) if i not in (3, 15)]
+        assert [ann["id"] for ann in coco.annotations] == list(range(5, 20))
+
+    def test_not_picklable_filter(self) -> None:
+        # given: a filter defined in a function cannot be pickled
+        class LocalFilter(BaseFilter):
+            def __init__(self) -> None:
+                super().__init__(FilterType.EXCLUSION, TargetType.IMAGE)
+
+            def apply(self, data: dict) -> bool:
+                return data["id"] % 2 == 0
+
+        coco = CocoData(PARALLEL_DATA).add_filter(LocalFilter())
+
+        # when
+        with pytest.warns(RuntimeWarning, match="not picklable"):
+            coco.apply_filter(workers=2, executor="process")
+
+        # then
+        assert [img["id"] for img in coco.images] == list(range(1, 20, 2))
+
+    def test_invalid_executor(self) -> None:
+        with pytest.raises(ValueError):
+            CocoData(PARALLEL_DATA).apply_filter(workers=2, executor="gpu")
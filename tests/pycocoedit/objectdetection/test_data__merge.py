@@ -0,0 +1,151 @@
+"""
+test for ``pycocoedit.objectdetection.data.CocoData.merge`` and ``CocoData.merge_files``
+"""
+
+import json
+
+import pytest
+
+from pycocoedit.objectdetection.data import CocoData
+from pycocoedit.objectdetection.filter import FilterType, ImageFileNameFilter
+from pycocoedit.objectdetection.merge import CocoMerger
+
+DATASET_A: dict = {
+    "info": {"description": "a"},
+    "licenses": [{"id": 1, "name": "MIT", "url": "m"}],
+    "images": [
+        {"id": 1, "file_name": "shared.jpg", "width": 10, "height": 10, "license": 1},
+        {"id": 2, "file_name": "a.jpg", "width": 10, "height": 10, "license": 1},
+    ],
+    "annotations": [
+        {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [], "area": 1, "bbox": [0, 0, 1, 1]},
+        {"id": 2, "image_id": 2, "category_id": 2, "segmentation": [], "area": 2, "bbox": [0, 0, 1, 2]},
+    ],
+    "categories": [
+        {"id": 1, "name": "cat", "supercategory": "animal"},
+        {"id": 2, "name": "dog", "supercategory": "animal"},
+    ],
+}
+
+DATASET_B: dict = {
+    "info": {"description": "b"},
+    "licenses": [{"id": 7, "name": "CC", "url": "c"}, {"id": 8, "name": "MIT", "url": "m"}],
+    "images": [
+        {"id": 1, "file_name": "b.jpg", "width": 10, "height": 10, "license": 7},
+        {"id": 2, "file_name": "shared.jpg", "width": 10, "height": 10, "license": 8},
+    ],
+    "annotations": [
+        {"id": 1, "image_id": 1, "category_id": 5, "segmentation": [], "area": 3, "bbox": [0, 0, 1, 3]},
+        {"id": 2, "image_id": 2, "category_id": 1, "segmentation": [], "area": 4, "bbox": [0, 0, 1, 4]},
+    ],
+    "categories": [
+        {"id": 1, "name": "bird", "supercategory": "animal"},
+        {"id": 5, "name": "dog", "supercategory": "animal"},
+    ],
+}
+
+EXPECTED: dict = {
+    "info": {"description": "a"},
+    "licenses": [{"id": 1, "name": "MIT", "url": "m"}, {"id": 2, "name": "CC", "url": "c"}],
+    "images": [
+        {"id": 1, "file_name": "shared.jpg", "width": 10, "height": 10, "license": 1},
+        {"id": 2, "file_name": "a.jpg", "width": 10, "height": 10, "license": 1},
+        {"id": 3, "file_name": "b.jpg", "width": 10, "height": 10, "license": 2},
+    ],
+    "categories": [
+        {"id": 1, "name": "cat", "supercategory": "animal"},
+        {"id": 2, "name": "dog", "supercategory": "animal"},
+        {"id": 3, "name": "bird", "supercategory": "animal"},
+    ],
+    "annotations": [
+        {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [], "area": 1, "bbox": [0, 0, 1, 1]},
+        {"id": 2, "image_id": 2, "category_id": 2, "segmentation": [], "area": 2, "bbox": [0, 0, 1, 2]},
+        {"id": 3, "image_id": 3, "category_id": 2, "segmentation": [], "area": 3, "bbox": [0, 0, 1, 3]},
+        {"id": 4, "image_id": 1, "category_id": 3, "segmentation": [], "area": 4, "bbox": [0, 0, 1, 4]},
+    ],
+}
+
+
+def test_merge():
+    # when
+    merged = CocoData.merge([DATASET_A, CocoData(DATASET_B)])
+
+    # then
+    assert merged.get_dataset() == EXPECTED
+    # the inputs are not modified
+    assert DATASET_B["images"][0]["id"] == 1
+
+
+def test_merge_without_dedupe():
+    merged = CocoData.merge([DATASET_A, DATASET_B], dedupe=None)
+    assert [img["id"] for img in merged.images] == [1, 2, 3, 4]
+    assert [ann["image_id"] for ann in merged.annotations] == [1, 2, 3, 4]
+
+
+def test_merge_applies_pending_filters():
+    coco_b = CocoData(DATASET_B).add_filter(ImageFileNameFilter(FilterType.EXCLUSION, ["b.jpg"]))
+    merged = CocoData.merge([DATASET_A, coco_b])
+    assert [img["file_name"] for img in merged.images] == ["shared.jpg", "a.jpg"]
+    assert len(merged.annotations) == 3
+
+
+def test_merge_does_not_apply_filters_to_inputs():
+    # given
+    coco_b = CocoData(DATASET_B).add_filter(ImageFileNameFilter(FilterType.EXCLUSION, ["b.jpg"]))
+
+    # when
+    merged = CocoData.merge([DATASET_A, coco_b])
+
+    # then: the input still has all its data and its filters are still pending
+    assert len(merged.images) == 2
+    assert coco_b.get_dataset() == DATASET_B
+    assert not coco_b.filter_applied
+    assert [img["file_name"] for img in coco_b.apply_filter().images] == ["shared.jpg"]
+
+
+def test_merge_by_content(tmp_path):
+    # given: same content under different file names
+    dir_a = tmp_path / "a"
+    dir_b = tmp_path / "b"
+    dir_a.mkdir()
+    dir_b.mkdir()
+    for directory, names in [(dir_a, ["shared.jpg", "a.jpg"]), (dir_b, ["b.jpg", "shared.jpg"])]:
+        for name in names:
+            (directory / name).write_bytes(b"same" if name in ("a.jpg", "b.jpg") else name.encode())
+
+    # when
+    merged = CocoData.merge([DATASET_A, DATASET_B], dedupe="content", image_dirs=[str(dir_a), str(dir_b)])
+
+    # then: b.jpg has the content of a.jpg; the two shared.jpg files are identical too
+    assert [img["file_name"] for img in merged.images] == ["shared.jpg", "a.jpg"]
+    assert [ann["image_id"] for ann in merged.annotations] == [1, 2, 2, 1]
+
+
+def test_merge_invalid_dedupe():
+    with pytest.raises(ValueError):
+        CocoData.merge([DATASET_A], dedupe="pixels")
+    with pytest.raises(ValueError):
+        CocoData.merge([DATASET_A], dedupe="content")
+
+
+def test_merger_drops_dangling_annotations():
+    merger = CocoMerger()
+    source = merger.add_source(DATASET_A["images"], DATASET_A["categories"])
+    assert merger.remap_annotation(source, {"id": 1, "image_id": 9, "category_id": 1}) is None
+
+
+@pytest.mark.parametrize("chunk_size", [16, 1 << 20])
+def test_merge_files(tmp_path, chunk_size):
+    # given
+    paths = []
+    for name, dataset in [("a.json", DATASET_A), ("b.json", DATASET_B)]:
+        path = tmp_path / name
+        path.write_text(json.dumps(dataset))
+        paths.append(str(path))
+    output = tmp_path / "merged.json"
+
+    # when
+    CocoData.merge_files(paths, str(output), chunk_size=chunk_size)
+
+    # then
+    assert json.loads(output.read_text()) == EXPECTED
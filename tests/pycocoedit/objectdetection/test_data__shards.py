@@ -0,0 +1,210 @@
+"""
+test for ``pycocoedit.objectdetection.data.CocoData.save_shards`` and ``CocoData.load_shards``
+"""
+
+import json
+import os
+
+import pytest
+
+from pycocoedit.objectdetection.data import MANIFEST_FORMAT, CocoData
+
+DATASET: dict = {
+    "info": {"description": "shards"},
+    "licenses": [],
+    "images": [{"id": i, "file_name": f"{i}.jpg", "width": 10, "height": 10} for i in range(30)],
+    "annotations": [
+        {"id": i, "image_id": i % 30, "category_id": 1, "segmentation": [], "area": 1, "bbox": [0, 0, 1, 1]}
+        for i in range(60)
+    ],
+    "categories": [{"id": 1, "name": "cat", "supercategory": "animal"}],
+}
+
+
+def _read_shards(manifest_path: str) -> tuple[dict, list[dict]]:
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    shards = []
+    for shard in manifest["shards"]:
+        with open(os.path.join(os.path.dirname(manifest_path), shard["path"])) as f:
+            shards.append(json.load(f))
+    return manifest, shards
+
+
+def _assert_complete(shards: list[dict]) -> None:
+    images = [img for shard in shards for img in shard["images"]]
+    annotations = [ann for shard in shards for ann in shard["annotations"]]
+    assert images == DATASET["images"]
+    assert sorted(annotations, key=lambda ann: ann["id"]) == DATASET["annotations"]
+    for shard in shards:
+        assert shard["categories"] == DATASET["categories"]
+        assert {ann["image_id"] for ann in shard["annotations"]} == {img["id"] for img in shard["images"]}
+
+
+def test_num_shards(tmp_path):
+    # when
+    manifest_path = CocoData(DATASET).save_shards(str(tmp_path), num_shards=3)
+
+    # then
+    manifest, shards = _read_shards(manifest_path)
+    _assert_complete(shards)
+    assert manifest["format"] == MANIFEST_FORMAT
+    assert (manifest["images"], manifest["annotations"], manifest["categories"]) == (30, 60, 1)
+    assert [shard["images"] for shard in manifest["shards"]] == [10, 10, 10]
+    assert [shard["bytes"] for shard in manifest["shards"]] == [
+        os.path.getsize(tmp_path / shard["path"]) for shard in manifest["shards"]
+    ]
+
+
+def test_max_images(tmp_path):
+    manifest_path = CocoData(DATASET).save_shards(str(tmp_path), max_images=8)
+    manifest, shards = _read_shards(manifest_path)
+    _assert_complete(shards)
+    assert [shard["images"] for shard in manifest["shards"]] == [8, 8, 8, 6]
+
+
+def test_max_bytes(tmp_path):
+    # given
+    full = tmp_path / "full.json"
+    CocoData(DATASET).save(str(full))
+    max_bytes = os.path.getsize(full) // 3
+
+    # when
+    manifest_path = CocoData(DATASET).save_shards(str(tmp_path / "shards"), max_bytes=max_bytes)
+
+    # then: the size limit is estimated, allow a small error
+    manifest, shards = _read_shards(manifest_path)
+    _assert_complete(shards)
+    assert len(shards) >= 3
+    assert all(shard["bytes"] <= max_bytes * 1.1 for shard in manifest["shards"])
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_workers(tmp_path, executor):
+    serial = _read_shards(CocoData(DATASET).save_shards(str(tmp_path / "serial"), num_shards=4))
+    parallel = _read_shards(
+        CocoData(DATASET).save_shards(str(tmp_path / "parallel"), num_shards=4, workers=2, executor=executor)
+    )
+    assert parallel == serial
+
+
+def test_columnar(tmp_path):
+    pytest.importorskip("numpy")
+    expected = _read_shards(CocoData(DATASET).save_shards(str(tmp_path / "list"), num_shards=2))
+    coco_data = CocoData(DATASET).to_columnar()
+    assert _read_shards(coco_data.save_shards(str(tmp_path / "columnar"), num_shards=2)) == expected
+    assert coco_data.is_columnar
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_more_shards_than_images(tmp_path, columnar):
+    if columnar:
+        pytest.importorskip("numpy")
+    coco_data = CocoData({**DATASET, "images": DATASET["images"][:3]})
+    if columnar:
+        coco_data.to_columnar()
+    manifest, shards = _read_shards(coco_data.save_shards(str(tmp_path), num_shards=10))
+    assert [shard["images"] for shard in manifest["shards"]] == [1, 1, 1]
+    assert [[ann["id"] for ann in shard["annotations"]] for shard in shards] == [[0, 30], [1, 31], [2, 32]]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_large_image_leaves_no_empty_shard(tmp_path, columnar):
+    # given: the first image has most of the annotations
+    if columnar:
+        pytest.importorskip("numpy")
+    annotations = [dict(ann, image_id=0 if ann["id"] < 50 else ann["id"] % 2 + 1) for ann in DATASET["annotations"]]
+    coco_data = CocoData({**DATASET, "images": DATASET["images"][:3], "annotations": annotations})
+    if columnar:
+        coco_data.to_columnar()
+
+    # when
+    manifest, shards = _read_shards(coco_data.save_shards(str(tmp_path), num_shards=3))
+
+    # then
+    assert [shard["images"] for shard in manifest["shards"]] == [1, 2]
+    assert [ann for shard in shards for ann in shard["annotations"]] == annotations
+    assert sorted(os.listdir(tmp_path)) == ["manifest.json", "shard-00000.json", "shard-00001.json"]
+
+
+def test_empty_dataset(tmp_path):
+    manifest, shards = _read_shards(
+        CocoData({**DATASET, "images": [], "annotations": []}).save_shards(str(tmp_path), num_shards=3)
+    )
+    assert [shard["images"] for shard in manifest["shards"]] == [0]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"num_shards": 2, "max_images": 2},
+        {"num_shards": 0},
+        {"max_bytes": -1},
+        {"num_shards": 2, "executor": "gpu"},
+    ],
+)
+def test_invalid_arguments(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        CocoData(DATASET).save_shards(str(tmp_path), **kwargs)
+
+
+class TestLoadShards:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_manifest(self, tmp_path, workers):
+        # given
+        manifest_path = CocoData(DATASET).save_shards(str(tmp_path), num_shards=3)
+
+        # when
+        coco_data = CocoData.load_shards(manifest_path, workers=workers)
+
+        # then
+        assert coco_data.images == DATASET["images"]
+        assert sorted(coco_data.annotations, key=lambda ann: ann["id"]) == DATASET["annotations"]
+        assert coco_data.categories == DATASET["categories"]
+        assert coco_data.info == DATASET["info"]
+
+    def test_paths_columnar(self, tmp_path):
+        pytest.importorskip("numpy")
+        manifest_path = CocoData(DATASET).save_shards(str(tmp_path), max_images=7)
+        manifest, _ = _read_shards(manifest_path)
+        paths = [str(tmp_path / shard["path"]) for shard in manifest["shards"]]
+
+        coco_data = CocoData.load_shards(paths, workers=2, columnar=True)
+
+        assert coco_data.is_columnar
+        assert coco_data.get_dataset() == CocoData.load_shards(paths).get_dataset()
+
+    def test_union_of_categories(self, tmp_path):
+        # given
+        first = {**DATASET, "images": DATASET["images"][:1], "annotations": []}
+        second = {
+            **DATASET,
+            "images": DATASET["images"][1:2],
+            "annotations": [],
+            "categories": [*DATASET["categories"], {"id": 2, "name": "dog", "supercategory": "animal"}],
+        }
+        paths = [str(tmp_path / "a.json"), str(tmp_path / "b.json")]
+        for path, data in zip(paths, [first, second]):
+            with open(path, "w") as f:
+                json.dump(data, f)
+
+        # when
+        coco_data = CocoData.load_shards(paths)
+
+        # then
+        assert [cat["id"] for cat in coco_data.categories] == [1, 2]
+
+        # given: the same category ID with another name
+        second["categories"] = [{"id": 1, "name": "dog", "supercategory": "animal"}]
+        with open(paths[1], "w") as f:
+            json.dump(second, f)
+        with pytest.raises(ValueError):
+            CocoData.load_shards(paths)
+
+    def test_missing_keys(self, tmp_path):
+        path = tmp_path / "shard.json"
+        path.write_text(json.dumps({**DATASET, "images": [{"id": 1}]}))
+        with pytest.raises(KeyError):
+            CocoData.load_shards([str(path)])
+        assert len(CocoData.load_shards([str(path)], validate="none").images) == 1
@@ -0,0 +1,120 @@
+"""
+test for ``pycocoedit.objectdetection.data.CocoView``
+"""
+
+import json
+import random
+
+import pytest
+
+from pycocoedit.objectdetection.data import CocoData, CocoView
+from pycocoedit.objectdetection.filter import BoxAreaFilter, CategoryNameFilter, FilterType, ImageFileNameFilter
+
+DATASET: dict = {
+    "info": {"year": 2020},
+    "licenses": [],
+    "images": [{"id": i, "file_name": f"image{i}.jpg", "width": 100, "height": 100} for i in range(1, 5)],
+    "annotations": [
+        {"id": 1, "image_id": 1, "category_id": 1, "segmentation": [], "area": 10, "bbox": [0, 0, 2, 5]},
+        {"id": 2, "image_id": 2, "category_id": 2, "segmentation": [], "area": 20, "bbox": [0, 0, 4, 5]},
+        {"id": 3, "image_id": 3, "category_id": 1, "segmentation": [], "area": 30, "bbox": [0, 0, 6, 5]},
+        {"id": 4, "image_id": 3, "category_id": 2, "segmentation": [], "area": 40, "bbox": [0, 0, 8, 5]},
+    ],
+    "categories": [
+        {"id": 1, "name": "cat", "supercategory": "animal"},
+        {"id": 2, "name": "dog", "supercategory": "animal"},
+    ],
+}
+
+
+def test_full_view():
+    coco = CocoData(DATASET)
+    view = coco.view()
+    assert isinstance(view, CocoView)
+    assert view.get_dataset() == DATASET
+    assert view.images[0] is coco.images[0]
+
+
+def test_filter_does_not_modify_base():
+    # given
+    coco = CocoData(DATASET)
+    view = coco.view()
+
+    # when
+    cats = view.filter(CategoryNameFilter(FilterType.INCLUSION, ["cat"])).correct()
+    large = view.filter(BoxAreaFilter(FilterType.INCLUSION, min_area=25)).correct()
+
+    # then
+    assert [img["id"] for img in cats.images] == [1, 3]
+    assert [ann["id"] for ann in cats.annotations] == [1, 3]
+    assert [cat["id"] for cat in cats.categories] == [1]
+    assert [img["id"] for img in large.images] == [3]
+    assert [ann["id"] for ann in large.annotations] == [3, 4]
+    assert view.get_dataset() == DATASET
+    assert coco.get_dataset() == DATASET
+
+
+def test_chained_filters():
+    view = (
+        CocoData(DATASET)
+        .view()
+        .filter(ImageFileNameFilter(FilterType.EXCLUSION, ["image1.jpg"]))
+        .filter(CategoryNameFilter(FilterType.EXCLUSION, ["dog"]))
+        .correct(correct_category=True)
+    )
+    assert [img["id"] for img in view.images] == [3]
+    assert [ann["id"] for ann in view.annotations] == [3]
+    assert [cat["id"] for cat in view.categories] == [1]
+
+
+def test_sample():
+    view = CocoData(DATASET).view()
+    sampled = view.sample(2, seed=0, correct_image=False)
+    assert len(sampled.images) == 2
+    assert sampled.images == view.sample(2, seed=0, correct_image=False).images
+    assert {ann["image_id"] for ann in sampled.annotations} <= {img["id"] for img in sampled.images}
+    with pytest.raises(ValueError):
+        view.sample(5)
+
+
+def test_sample_follows_random_seed():
+    view = CocoData(DATASET).view()
+    random.seed(3)
+    first = view.sample(2, correct_image=False).images
+    random.seed(3)
+    assert view.sample(2, correct_image=False).images == first
+
+
+def test_to_coco_data():
+    coco = CocoData(DATASET)
+    materialized = coco.view().filter(ImageFileNameFilter(FilterType.INCLUSION, ["image2.jpg"])).to_coco_data()
+    materialized.correct()
+    assert [img["id"] for img in materialized.images] == [2]
+    assert [ann["id"] for ann in materialized.annotations] == [2]
+    assert coco.get_dataset() == DATASET
+
+
+def test_save(tmp_path):
+    out_path = tmp_path / "view.json"
+    CocoData(DATASET).view().filter(CategoryNameFilter(FilterType.EXCLUSION, ["cat"])).save(out_path.as_posix())
+    with out_path.open() as f:
+        saved = json.load(f)
+    assert [img["id"] for img in saved["images"]] == [2, 3]
+    assert [ann["id"] for ann in saved["annotations"]] == [2, 4]
+
+
+def test_modified_base():
+    coco = CocoData(DATASET)
+    view = coco.view()
+    coco.add_filter(ImageFileNameFilter(FilterType.EXCLUSION, ["image1.jpg"])).apply_filter()
+    with pytest.raises(RuntimeError):
+        view.images
+
+
+def test_columnar_base():
+    pytest.importorskip("numpy")
+    coco = CocoData(DATASET).to_columnar()
+    view = coco.view().filter(BoxAreaFilter(FilterType.EXCLUSION, max_area=25)).correct()
+    assert [ann["id"] for ann in view.annotations] == [3, 4]
+    assert view.to_coco_data().is_columnar
+    assert coco.is_columnar
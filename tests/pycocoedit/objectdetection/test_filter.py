@@ -7,6 +7,7 @@ from pycocoedit.objectdetection.filter import (
     Filters,
     FilterType,
     ImageFileNameFilter,
+    NameMatcher,
     TargetType,
 )
 
@@ -106,6 +107,57 @@ def test_category_exclude_filter(category_names, data, expected):
     assert category_filter.apply(data) == expected
 
 
+class TestNameMatcher:
+    def test_exact(self) -> None:
+        matcher = NameMatcher(iter(["a.jpg", "b.jpg"]))
+        assert matcher.exact_only
+        assert matcher.names == frozenset(["a.jpg", "b.jpg"])
+        assert matcher("a.jpg")
+        assert not matcher("c.jpg")
+
+    def test_prefixes(self) -> None:
+        matcher = NameMatcher(prefixes=["train/", "val/2017"])
+        assert not matcher.exact_only
+        assert matcher("train/a.jpg")
+        assert matcher("val/2017/a.jpg")
+        assert not matcher("val/2018/a.jpg")
+        assert not matcher("test/train/a.jpg")
+
+    def test_globs(self) -> None:
+        matcher = NameMatcher(globs=["*.png", "img_??.jpg"])
+        assert matcher("a.png")
+        assert matcher("img_01.jpg")
+        assert not matcher("img_001.jpg")
+        assert not matcher("a.png.jpg")
+
+    def test_regexes(self) -> None:
+        matcher = NameMatcher(regexes=[r"\d+\.jpg", "cat|dog"])
+        assert matcher("0001.jpg")
+        assert matcher("dog")
+        assert not matcher("a0001.jpg")
+        assert not matcher("doge")
+
+    def test_match_batch(self) -> None:
+        names = ["a.jpg", "b.png", "train/c.jpg", "d.jpg"]
+        matcher = NameMatcher(["a.jpg"], prefixes=["train/"], globs=["*.png"])
+        assert matcher.match_batch(names) == [True, True, True, False]
+        assert matcher.match_batch(names) == [matcher(name) for name in names]
+
+
+def test_image_file_name_filter_patterns():
+    image_filter = ImageFileNameFilter(FilterType.INCLUSION, {"a.jpg"}, prefixes=["train/"], globs=["*.png"])
+    data = [{"file_name": name} for name in ["a.jpg", "train/b.jpg", "c.png", "d.jpg"]]
+    assert [image_filter.apply(d) for d in data] == [True, True, True, False]
+    assert image_filter.apply_batch(data) == [True, True, True, False]
+
+
+def test_category_name_filter_patterns():
+    category_filter = CategoryNameFilter(FilterType.EXCLUSION, regexes=["vehicle_.*"])
+    data = [{"name": "vehicle_car"}, {"name": "person"}]
+    assert [category_filter.apply(d) for d in data] == [True, False]
+    assert category_filter.apply_batch(data) == [True, False]
+
+
 # BoxAreaFilterのテスト
 @pytest.mark.parametrize(
     "min_area, max_area, data, expected",
@@ -162,3 +214,122 @@ def test_filters_add():
     filters.add(MockExclusionFilter())
     assert len(filters.include_filters) == 2
     assert len(filters.exclude_filters) == 1
+
+
+class TestApplyBatch:
+    def test_default_apply_batch(self) -> None:
+        class EvenIdFilter(BaseFilter):
+            def __init__(self) -> None:
+                super().__init__(FilterType.INCLUSION, TargetType.IMAGE)
+
+            def apply(self, data: dict) -> bool:
+                return data["id"] % 2 == 0
+
+        assert EvenIdFilter().apply_batch([{"id": 1}, {"id": 2}, {"id": 4}]) == [False, True, True]
+
+    def test_image_file_name_filter(self) -> None:
+        data = [{"file_name": "image1.jpg"}, {"file_name": "image3.jpg"}]
+        image_filter = ImageFileNameFilter(FilterType.INCLUSION, ["image1.jpg", "image2.jpg"])
+        assert image_filter.apply_batch(data) == [image_filter.apply(d) for d in data]
+
+    def test_category_name_filter(self) -> None:
+        data = [{"name": "bird"}, {"name": "cat"}]
+        category_filter = CategoryNameFilter(FilterType.EXCLUSION, ["cat", "dog"])
+        assert category_filter.apply_batch(data) == [category_filter.apply(d) for d in data]
+
+    @pytest.mark.parametrize("min_area, max_area", [(100, 200), (None, 200), (100, None), (None, None)])
+    def test_box_area_filter(self, min_area, max_area) -> None:
+        data = [{"area": area} for area in [99, 100, 150, 200, 201]]
+        box_filter = BoxAreaFilter(FilterType.INCLUSION, min_area=min_area, max_area=max_area)
+        assert box_filter.apply_batch(data) == [box_filter.apply(d) for d in data]
+
+    @pytest.mark.parametrize("min_area, max_area", [(100, 200), (None, 200), (100, None), (None, None)])
+    def test_box_area_filter_columns(self, min_area, max_area) -> None:
+        pytest.importorskip("numpy")
+        from pycocoedit.objectdetection.columnar import AnnotationColumns
+
+        data = [
+            {"id": i, "image_id": 1, "category_id": 1, "segmentation": [], "area": area, "bbox": [0, 0, 1, 1]}
+            for i, area in enumerate([99, 100, 150, 200, 201])
+        ]
+        box_filter = BoxAreaFilter(FilterType.INCLUSION, min_area=min_area, max_area=max_area)
+        mask = box_filter.apply_batch(AnnotationColumns.from_records(data))
+        assert mask.tolist() == [box_filter.apply(d) for d in data]
+
+
+def test_filters_passes_batch():
+    filters = Filters()
+    filters.add(ImageFileNameFilter(FilterType.INCLUSION, ["a.jpg", "b.jpg"]))
+    filters.add(ImageFileNameFilter(FilterType.INCLUSION, ["c.jpg"]))
+    filters.add(ImageFileNameFilter(FilterType.EXCLUSION, ["b.jpg"]))
+    data = [{"file_name": name} for name in ["a.jpg", "b.jpg", "c.jpg", "d.jpg"]]
+    assert filters.passes_batch(data) == [True, False, True, False]
+    assert filters.passes_batch(data) == [filters.passes(d) for d in data]
+
+
+class CountingFilter(BaseFilter):
+    """Filter matching the ids in ``ids`` and counting the evaluated elements."""
+
+    def __init__(self, filter_type: FilterType, ids: set[int]) -> None:
+        super().__init__(filter_type, TargetType.IMAGE)
+        self.ids = ids
+        self.evaluated: list[int] = []
+
+    def apply(self, data: dict) -> bool:
+        self.evaluated.append(data["id"])
+        return data["id"] in self.ids
+
+
+class TestPassesBatch:
+    def test_exclusion_filters_see_only_survivors(self) -> None:
+        data = [{"id": i} for i in range(10)]
+        first = CountingFilter(FilterType.EXCLUSION, set(range(8)))
+        second = CountingFilter(FilterType.EXCLUSION, {9})
+        filters = Filters()
+        filters.add(first)
+        filters.add(second)
+
+        assert filters.passes_batch(data) == [False] * 8 + [True, False]
+        assert first.evaluated == list(range(10))
+        assert second.evaluated == [8, 9]
+
+    def test_inclusion_filters_see_only_undecided(self) -> None:
+        data = [{"id": i} for i in range(4)]
+        first = CountingFilter(FilterType.INCLUSION, {0, 1})
+        second = CountingFilter(FilterType.INCLUSION, {2})
+        filters = Filters()
+        filters.add(first)
+        filters.add(second)
+
+        assert filters.passes_batch(data) == [True, True, True, False]
+        assert second.evaluated == [2, 3]
+
+    def test_filters_are_reordered_by_statistics(self) -> None:
+        data = [{"id": i} for i in range(10)]
+        rare = CountingFilter(FilterType.EXCLUSION, {0})
+        frequent = CountingFilter(FilterType.EXCLUSION, set(range(1, 9)))
+        filters = Filters()
+        filters.add(rare)
+        filters.add(frequent)
+
+        filters.passes_batch(data)
+        rare.evaluated.clear()
+        frequent.evaluated.clear()
+        assert filters.passes_batch(data) == [False] * 9 + [True]
+        # the frequent filter now runs first, so the rare one sees only two elements
+        assert frequent.evaluated == list(range(10))
+        assert rare.evaluated == [0, 9]
+
+    def test_report(self) -> None:
+        data = [{"id": i} for i in range(4)]
+        filters = Filters()
+        filters.add(CountingFilter(FilterType.EXCLUSION, {0}))
+        filters.passes_batch(data)
+
+        (row,) = filters.report()
+        assert row["filter"] == "CountingFilter"
+        assert row["filter_type"] == "EXCLUSION"
+        assert row["evaluated"] == 4
+        assert row["matched"] == 1
+        assert row["match_rate"] == 0.25
+        assert row["seconds"] >= 0
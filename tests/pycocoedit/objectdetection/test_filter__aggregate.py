@@ -0,0 +1,169 @@
+"""
+test for the annotation aggregation filters of ``pycocoedit.objectdetection.filter``
+"""
+
+import json
+
+import pytest
+
+from pycocoedit.objectdetection.aggregate import ImageAnnotationStats
+from pycocoedit.objectdetection.data import CocoData
+from pycocoedit.objectdetection.filter import (
+    AnnotationAreaFilter,
+    AnnotationCountFilter,
+    BoxAreaFilter,
+    CrowdFilter,
+    FilterType,
+)
+
+# image 1: 3 persons; image 2: 3 persons and a crowd; image 3: 1 person and 2 dogs; image 4: no annotations
+ANNOTATIONS: list[tuple[int, int, float, int]] = [
+    (1, 1, 10, 0),
+    (1, 1, 50, 0),
+    (1, 1, 30, 0),
+    (2, 1, 20, 0),
+    (2, 1, 20, 0),
+    (2, 1, 500, 1),
+    (3, 2, 5, 0),
+    (3, 1, 100, 0),
+    (3, 2, 7, 0),
+]
+
+DATASET: dict = {
+    "images": [{"id": i, "file_name": f"{i}.jpg", "width": 100, "height": 100} for i in range(1, 5)],
+    "annotations": [
+        {
+            "id": i,
+            "image_id": image_id,
+            "category_id": category_id,
+            "segmentation": [],
+            "area": area,
+            "bbox": [0, 0, 1, 1],
+            "iscrowd": iscrowd,
+        }
+        for i, (image_id, category_id, area, iscrowd) in enumerate(ANNOTATIONS)
+    ],
+    "categories": [
+        {"id": 1, "name": "person", "supercategory": "person"},
+        {"id": 2, "name": "dog", "supercategory": "animal"},
+    ],
+}
+
+
+def _image_ids(*filters, columnar=False) -> list[int]:
+    coco_data = CocoData(DATASET)
+    if columnar:
+        coco_data.to_columnar()
+    for f in filters:
+        coco_data.add_filter(f)
+    return [img["id"] for img in coco_data.apply_filter().images]
+
+
+def test_stats():
+    stats = ImageAnnotationStats(DATASET["annotations"])
+    assert stats.category_counts == {1: {1: 3}, 2: {1: 3}, 3: {1: 1, 2: 2}}
+    assert stats.min_area == {1: 10, 2: 20, 3: 5}
+    assert stats.max_area == {1: 50, 2: 500, 3: 100}
+    assert stats.crowd_image_ids == {2}
+    assert stats.count(3) == 3
+    assert stats.count(3, frozenset([2])) == 2
+    assert stats.count(4) == 0
+
+
+def test_stats_columns():
+    pytest.importorskip("numpy")
+    from pycocoedit.objectdetection.columnar import AnnotationColumns
+
+    expected = ImageAnnotationStats(DATASET["annotations"])
+    stats = ImageAnnotationStats(AnnotationColumns.from_records(DATASET["annotations"]))
+    assert stats.category_counts == expected.category_counts
+    assert stats.min_area == expected.min_area
+    assert stats.max_area == expected.max_area
+    assert stats.crowd_image_ids == expected.crowd_image_ids
+    assert ImageAnnotationStats(AnnotationColumns.from_records([])).category_counts == {}
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_persons_without_crowd(columnar):
+    if columnar:
+        pytest.importorskip("numpy")
+    filters = [
+        AnnotationCountFilter(FilterType.INCLUSION, category_names=["person"], min_count=3),
+        CrowdFilter(FilterType.EXCLUSION),
+    ]
+    assert _image_ids(*filters, columnar=columnar) == [1]
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({"min_count": 3}, [1, 2, 3]),
+        ({"max_count": 0}, [4]),
+        ({"category_ids": [2], "min_count": 1}, [3]),
+        ({"category_names": ["person"], "category_ids": [2], "min_count": 3, "max_count": 3}, [1, 2, 3]),
+        ({"category_names": ["cat"], "max_count": 0}, [1, 2, 3, 4]),
+    ],
+)
+def test_annotation_count_filter(kwargs, expected):
+    assert _image_ids(AnnotationCountFilter(FilterType.INCLUSION, **kwargs)) == expected
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({"max_area": 50}, [2, 3, 4]),
+        ({"min_area": 100}, [1, 4]),
+        ({"statistic": "min", "max_area": 10}, [2, 4]),
+    ],
+)
+def test_annotation_area_filter(kwargs, expected):
+    # images without annotations never match, so they are kept by an exclusion filter
+    assert _image_ids(AnnotationAreaFilter(FilterType.EXCLUSION, **kwargs)) == expected
+
+
+def test_stats_follow_the_annotations():
+    # given
+    coco_data = CocoData(DATASET)
+    count_filter = AnnotationCountFilter(FilterType.INCLUSION, min_count=3)
+    coco_data.add_filter(count_filter).apply_filter()
+    assert [img["id"] for img in coco_data.images] == [1, 2, 3]
+
+    # when: annotations are removed, the statistics are computed again
+    coco_data.add_filter(BoxAreaFilter(FilterType.EXCLUSION, max_area=10)).apply_filter()
+    coco_data.add_filter(AnnotationCountFilter(FilterType.EXCLUSION, max_count=2)).apply_filter()
+
+    # then
+    assert [img["id"] for img in coco_data.images] == [2]
+
+
+def test_view():
+    view = CocoData(DATASET).view().filter(BoxAreaFilter(FilterType.INCLUSION, max_area=20))
+    view = view.filter(AnnotationCountFilter(FilterType.INCLUSION, min_count=2))
+    assert [img["id"] for img in view.images] == [2, 3]
+
+
+def test_needs_prepare():
+    with pytest.raises(RuntimeError):
+        CrowdFilter(FilterType.EXCLUSION).apply(DATASET["images"][0])
+
+
+def test_invalid_statistic():
+    with pytest.raises(ValueError):
+        AnnotationAreaFilter(FilterType.INCLUSION, statistic="mean")
+
+
+@pytest.mark.parametrize(
+    "image_filter",
+    [
+        AnnotationCountFilter(FilterType.INCLUSION, min_count=1),
+        AnnotationAreaFilter(FilterType.EXCLUSION, max_area=10),
+        CrowdFilter(FilterType.EXCLUSION),
+    ],
+)
+def test_not_streamable(tmp_path, image_filter):
+    path = tmp_path / "dataset.json"
+    path.write_text(json.dumps(DATASET))
+    with pytest.raises(ValueError, match="streaming"):
+        CocoData.from_stream(str(path), filters=[image_filter])
+    with pytest.raises(ValueError, match="streaming"):
+        CocoData.sample_stream(str(path), 1, filters=[image_filter])
@@ -0,0 +1,254 @@
+"""
+test for the bounding box geometry filters of ``pycocoedit.objectdetection.filter``
+"""
+
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pycocoedit.objectdetection.columnar import AnnotationColumns  # noqa: E402
+from pycocoedit.objectdetection.data import CocoData  # noqa: E402
+from pycocoedit.objectdetection.filter import (  # noqa: E402
+    AspectRatioFilter,
+    BoxAreaFilter,
+    BoxSizeFilter,
+    DuplicateBoxFilter,
+    FilterType,
+    ImageFileNameFilter,
+    RelativeBoxSizeFilter,
+    TruncatedBoxFilter,
+)
+
+IMAGES: list[dict] = [
+    {"id": 1, "file_name": "1.jpg", "width": 100, "height": 100},
+    {"id": 2, "file_name": "2.jpg", "width": 200, "height": 50},
+]
+
+BOXES: list[tuple[int, list[float]]] = [
+    (1, [10, 10, 20, 20]),
+    (1, [0, 30, 10, 40]),
+    (1, [50, 50, 50, 10]),
+    (2, [10, 10, 0, 0]),
+    (2, [150, 10, 50, 30]),
+    (3, [10, 10, 10, 10]),
+]
+
+
+def _annotations(boxes=BOXES, category_ids=None) -> list[dict]:
+    category_ids = category_ids or [1] * len(boxes)
+    return [
+        {
+            "id": i,
+            "image_id": image_id,
+            "category_id": category_id,
+            "segmentation": [],
+            "area": bbox[2] * bbox[3],
+            "bbox": bbox,
+        }
+        for i, ((image_id, bbox), category_id) in enumerate(zip(boxes, category_ids))
+    ]
+
+
+def _dataset(annotations: list[dict]) -> dict:
+    return {
+        "images": IMAGES,
+        "annotations": annotations,
+        "categories": [
+            {"id": 1, "name": "cat", "supercategory": "animal"},
+            {"id": 2, "name": "dog", "supercategory": "animal"},
+        ],
+    }
+
+
+def _check(box_filter, expected: list[bool]) -> None:
+    """Check apply, apply_batch on dictionaries and apply_batch on columns against the expected mask."""
+    annotations = _annotations()
+    box_filter.prepare(CocoData(_dataset(annotations)))
+    assert [box_filter.apply(ann) for ann in annotations] == expected
+    assert list(box_filter.apply_batch(annotations)) == expected
+    assert box_filter.apply_batch(AnnotationColumns.from_records(annotations)).tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({"min_width": 20}, [True, False, True, False, True, False]),
+        ({"max_height": 20}, [True, False, True, True, False, True]),
+        ({"min_width": 10, "max_width": 20, "min_height": 10}, [True, True, False, False, False, True]),
+        ({}, [True] * 6),
+    ],
+)
+def test_box_size_filter(kwargs, expected):
+    _check(BoxSizeFilter(FilterType.INCLUSION, **kwargs), expected)
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({"min_ratio": 2}, [False, False, True, False, False, False]),
+        ({"max_ratio": 1}, [True, True, False, False, False, True]),
+        ({"min_ratio": 1, "max_ratio": 1}, [True, False, False, False, False, True]),
+    ],
+)
+def test_aspect_ratio_filter(kwargs, expected):
+    _check(AspectRatioFilter(FilterType.INCLUSION, **kwargs), expected)
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        # fractions: 0.04, 0.04, 0.05, 0, 0.15 and an unknown image
+        ({"min_fraction": 0.05}, [False, False, True, False, True, False]),
+        ({"max_fraction": 0.04}, [True, True, False, True, False, False]),
+    ],
+)
+def test_relative_box_size_filter(kwargs, expected):
+    _check(RelativeBoxSizeFilter(FilterType.INCLUSION, **kwargs), expected)
+
+
+@pytest.mark.parametrize(
+    "margin, expected",
+    [
+        (0, [False, True, True, False, True, False]),
+        (10, [True, True, True, True, True, False]),
+    ],
+)
+def test_truncated_box_filter(margin, expected):
+    _check(TruncatedBoxFilter(FilterType.INCLUSION, margin=margin), expected)
+
+
+def test_image_size_filter_needs_prepare():
+    annotation = _annotations()[0]
+    with pytest.raises(RuntimeError):
+        TruncatedBoxFilter(FilterType.EXCLUSION).apply(annotation)
+    with pytest.raises(RuntimeError):
+        RelativeBoxSizeFilter(FilterType.EXCLUSION).apply_batch([annotation])
+
+
+class TestDuplicateBoxFilter:
+    BOXES = [
+        (1, [0, 0, 10, 10]),
+        (1, [0, 0, 10, 9.5]),  # IoU 0.95 with the first box
+        (1, [0, 0, 10, 9]),  # IoU 0.9 with the first box
+        (2, [0, 0, 10, 10]),  # another image
+        (1, [50, 50, 10, 10]),
+        (1, [50, 50, 10, 10]),  # another category
+        (1, [0, 0, 10, 10]),
+    ]
+    CATEGORY_IDS = [1, 1, 1, 1, 1, 2, 1]
+
+    @pytest.mark.parametrize(
+        "kwargs, expected",
+        [
+            ({"iou_threshold": 0.9}, [False, True, True, False, False, False, True]),
+            ({"iou_threshold": 0.92}, [False, True, False, False, False, False, True]),
+            ({"iou_threshold": 0.9, "same_category": False}, [False, True, True, False, False, True, True]),
+        ],
+    )
+    def test_apply_batch(self, kwargs, expected):
+        annotations = _annotations(self.BOXES, self.CATEGORY_IDS)
+        box_filter = DuplicateBoxFilter(FilterType.INCLUSION, **kwargs)
+        assert box_filter.apply_batch(annotations).tolist() == expected
+        assert box_filter.apply_batch(AnnotationColumns.from_records(annotations)).tolist() == expected
+
+    def test_greedy_suppression(self):
+        # the third box overlaps the second but not the first, the second is suppressed by the first
+        boxes = [(1, [0, 0, 10, 10]), (1, [1, 0, 10, 10]), (1, [2, 0, 10, 10])]
+        box_filter = DuplicateBoxFilter(FilterType.EXCLUSION, iou_threshold=0.8)
+        assert box_filter.apply_batch(_annotations(boxes)).tolist() == [False, True, False]
+
+    def test_large_group(self, monkeypatch):
+        # given: random boxes on few images, some of them copied
+        rng = np.random.default_rng(0)
+        corners = rng.uniform(0, 100, size=(300, 2))
+        boxes = [(int(rng.integers(1, 3)), [*xy, 20.0, 20.0]) for xy in corners.tolist()]
+        boxes += [(image_id, [x + 0.1, y, w, h]) for image_id, (x, y, w, h) in boxes[::3]]
+        annotations = _annotations(boxes)
+        box_filter = DuplicateBoxFilter(FilterType.EXCLUSION, iou_threshold=0.5)
+        expected = box_filter.apply_batch(annotations).tolist()
+        assert sum(expected) >= 100
+
+        # when: the groups are compared one box at a time
+        monkeypatch.setattr("pycocoedit.objectdetection.filter._MAX_PAIRWISE_GROUP", 1)
+
+        # then
+        assert box_filter.apply_batch(annotations).tolist() == expected
+
+    def test_apply_filter(self):
+        # given
+        annotations = _annotations(self.BOXES, self.CATEGORY_IDS)
+        coco_data = CocoData(_dataset(annotations))
+
+        # when: evaluated in parallel, the filter still sees all annotations of an image
+        coco_data.add_filter(DuplicateBoxFilter(FilterType.EXCLUSION)).apply_filter(workers=2, executor="thread")
+
+        # then
+        assert [ann["id"] for ann in coco_data.annotations] == [0, 3, 4, 5]
+
+    @pytest.mark.parametrize("first", [False, True])
+    def test_independent_of_other_filters(self, first):
+        # given: the area filter excludes the first box, which the others duplicate
+        annotations = _annotations(self.BOXES, self.CATEGORY_IDS)
+        annotations[0]["area"] = 1000
+        filters = [DuplicateBoxFilter(FilterType.EXCLUSION), BoxAreaFilter(FilterType.EXCLUSION, min_area=500)]
+        coco_data = CocoData(_dataset(annotations))
+        for f in filters if first else filters[::-1]:
+            coco_data.add_filter(f)
+
+        # when: the area filter was the cheapest one so far
+        coco_data.annotation_filters.stats(filters[1]).evaluated = 1
+        coco_data.apply_filter()
+
+        # then: the duplicates are found among all the annotations
+        assert [ann["id"] for ann in coco_data.annotations] == [3, 4, 5]
+
+    def test_apply(self):
+        # given
+        annotations = _annotations(self.BOXES, self.CATEGORY_IDS)
+        box_filter = DuplicateBoxFilter(FilterType.INCLUSION)
+        with pytest.raises(RuntimeError):
+            box_filter.apply(annotations[0])
+
+        # when
+        box_filter.prepare(CocoData(_dataset(annotations)))
+
+        # then
+        assert [box_filter.apply(ann) for ann in annotations] == box_filter.apply_batch(annotations).tolist()
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            DuplicateBoxFilter(FilterType.EXCLUSION, iou_threshold=0)
+
+
+def test_apply_filter_after_image_filter():
+    # given: the truncation filter looks up the images remaining after the image filters
+    coco_data = CocoData(_dataset(_annotations()))
+    coco_data.add_filter(ImageFileNameFilter(FilterType.EXCLUSION, ["2.jpg"]))
+    coco_data.add_filter(TruncatedBoxFilter(FilterType.INCLUSION))
+
+    # when
+    coco_data.apply_filter()
+
+    # then
+    assert [ann["id"] for ann in coco_data.annotations] == [1, 2]
+    view = CocoData(_dataset(_annotations())).view().filter(TruncatedBoxFilter(FilterType.INCLUSION))
+    assert [ann["id"] for ann in view.annotations] == [1, 2, 4]
+
+
+@pytest.mark.parametrize(
+    "box_filter",
+    [
+        DuplicateBoxFilter(FilterType.EXCLUSION),
+        RelativeBoxSizeFilter(FilterType.INCLUSION, min_fraction=0.1),
+        TruncatedBoxFilter(FilterType.EXCLUSION),
+    ],
+)
+def test_not_streamable(tmp_path, box_filter):
+    path = tmp_path / "dataset.json"
+    path.write_text(json.dumps(_dataset(_annotations())))
+    with pytest.raises(ValueError, match="streaming"):
+        CocoData.from_stream(str(path), filters=[box_filter])
+    with pytest.raises(ValueError, match="streaming"):
+        CocoData.sample_stream(str(path), 1, filters=[box_filter])
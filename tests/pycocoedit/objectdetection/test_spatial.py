@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pycocoedit.objectdetection.columnar import AnnotationColumns  # noqa: E402
+from pycocoedit.objectdetection.data import CocoData  # noqa: E402
+from pycocoedit.objectdetection.filter import FilterType, RegionFilter  # noqa: E402
+from pycocoedit.objectdetection.spatial import SpatialIndex  # noqa: E402
+
+DATASET: dict = {
+    "images": [
+        {"id": 1, "file_name": "1.jpg", "width": 100, "height": 100},
+        {"id": 2, "file_name": "2.jpg", "width": 200, "height": 200},
+    ],
+    "annotations": [
+        {"id": 10, "image_id": 1, "category_id": 1, "segmentation": [], "area": 1, "bbox": [0, 0, 10, 10]},
+        {"id": 11, "image_id": 1, "category_id": 1, "segmentation": [], "area": 1, "bbox": [60, 60, 30, 30]},
+        {"id": 12, "image_id": 2, "category_id": 1, "segmentation": [], "area": 1, "bbox": [60, 60, 30, 30]},
+        {"id": 13, "image_id": 2, "category_id": 1, "segmentation": [], "area": 1, "bbox": [0, 0, 200, 200]},
+        {"id": 14, "image_id": 3, "category_id": 1, "segmentation": [], "area": 1, "bbox": [0, 0, 1, 1]},
+    ],
+    "categories": [{"id": 1, "name": "cat", "supercategory": "animal"}],
+}
+
+
+def _brute_force(annotations, region, image_ids=None, mode="intersects"):
+    x1, y1, x2, y2 = region[0], region[1], region[0] + region[2], region[1] + region[3]
+    found = []
+    for position, ann in enumerate(annotations):
+        bx, by, bw, bh = ann["bbox"]
+        if image_ids is not None and ann["image_id"] not in image_ids:
+            continue
+        if mode == "intersects":
+            hit = bx <= x2 and bx + bw >= x1 and by <= y2 and by + bh >= y1
+        else:
+            hit = bx >= x1 and bx + bw <= x2 and by >= y1 and by + bh <= y2
+        if hit:
+            found.append(position)
+    return found
+
+
+@pytest.mark.parametrize("grid_size", [1, 4, 16])
+@pytest.mark.parametrize("mode", ["intersects", "within"])
+def test_matches_brute_force(grid_size, mode):
+    # given
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(-10, 500, size=(500, 2))
+    wh = rng.exponential(40, size=(500, 2))
+    annotations = [
+        {"id": i, "image_id": int(rng.integers(0, 5)), "bbox": [*xy[i].tolist(), *wh[i].tolist()]} for i in range(500)
+    ]
+    index = SpatialIndex(annotations, grid_size=grid_size)
+
+    # then
+    for region in [[0, 0, 100, 100], [250, 100, 5, 300], [450, 450, 1000, 1000], [30, 30, 0, 0], [-50, -50, 10, 10]]:
+        assert index.query(region, mode=mode).tolist() == _brute_force(annotations, region, mode=mode)
+        assert index.query(region, image_ids=[1, 3, 99], mode=mode).tolist() == _brute_force(
+            annotations, region, {1, 3}, mode
+        )
+
+
+def test_normalized():
+    # given
+    index = SpatialIndex(DATASET["annotations"], DATASET["images"], grid_size=4)
+
+    # then: the top-left quadrant of every image, the annotation of an unknown image is not indexed
+    assert index.query([0, 0, 0.5, 0.5]).tolist() == [0, 2, 3]
+    assert index.query([0, 0, 0.5, 0.5], mode="within").tolist() == [0, 2]
+    assert index.annotation_ids[index.query([0.5, 0.5, 0.5, 0.5], mode="within")].tolist() == [11]
+
+
+def test_empty():
+    index = SpatialIndex(AnnotationColumns.from_records([]))
+    assert index.query([0, 0, 1, 1]).tolist() == []
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        SpatialIndex(DATASET["annotations"], grid_size=0)
+    with pytest.raises(ValueError):
+        SpatialIndex(DATASET["annotations"]).query([0, 0, 1, 1], mode="contains")
+    with pytest.raises(ValueError):
+        RegionFilter(FilterType.INCLUSION, [0, 0, 1, 1], mode="contains")
+
+
+class TestCocoData:
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_query_region(self, columnar):
+        coco_data = CocoData(DATASET)
+        if columnar:
+            coco_data.to_columnar()
+        found = coco_data.query_region([0, 0, 0.5, 0.5], normalized=True)
+        assert [ann["id"] for ann in found] == [10, 12, 13]
+        found = coco_data.query_region([50, 50, 10, 10], image_ids=[2])
+        assert [ann["id"] for ann in found] == [12, 13]
+
+    def test_index_is_cached_and_rebuilt(self):
+        # given
+        coco_data = CocoData(DATASET)
+        index = coco_data.spatial_index()
+        assert coco_data.spatial_index() is index
+
+        # when
+        coco_data.annotations = coco_data.annotations[:2]
+
+        # then
+        assert coco_data.spatial_index() is not index
+        assert [ann["id"] for ann in coco_data.query_region([0, 0, 1000, 1000])] == [10, 11]
+
+    def test_region_filter(self):
+        coco_data = CocoData(DATASET)
+        coco_data.add_filter(RegionFilter(FilterType.EXCLUSION, [0.5, 0.5, 0.5, 0.5], normalized=True, mode="within"))
+        coco_data.apply_filter()
+        assert [ann["id"] for ann in coco_data.annotations] == [10, 12, 13, 14]
+
+    def test_view(self):
+        # given
+        view = CocoData(DATASET).view().filter(RegionFilter(FilterType.INCLUSION, [0, 0, 20, 20]))
+        assert [ann["id"] for ann in view.annotations] == [10, 13, 14]
+
+        # then: queries on a view only return its annotations
+        assert [ann["id"] for ann in view.query_region([0, 0, 0.5, 0.5], normalized=True)] == [10, 13]
+
+    def test_region_filter_needs_prepare(self):
+        with pytest.raises(RuntimeError):
+            RegionFilter(FilterType.INCLUSION, [0, 0, 1, 1]).apply(DATASET["annotations"][0])
+
+    def test_region_filter_is_not_streamable(self, tmp_path):
+        path = tmp_path / "dataset.json"
+        path.write_text(json.dumps(DATASET))
+        region_filter = RegionFilter(FilterType.INCLUSION, [0, 0, 1, 1])
+        with pytest.raises(ValueError, match="streaming"):
+            CocoData.from_stream(str(path), filters=[region_filter])
+        with pytest.raises(ValueError, match="streaming"):
+            CocoData.sample_stream(str(path), 1, filters=[region_filter])
@@ -0,0 +1,175 @@
+import io
+import json
+
+import pytest
+
+from pycocoedit.objectdetection import stream
+from pycocoedit.objectdetection.data import CocoData
+from pycocoedit.objectdetection.stream import (
+    ENCODERS,
+    dump_dataset,
+    get_encoder,
+    infer_compression,
+    iter_dataset,
+    open_dataset,
+)
+
+DATASET: dict = {
+    "info": {"description": "test", "year": 2020},
+    "images": [
+        {"file_name": "image0.jpg", "id": 1, "height": 100, "width": 100},
+        {"file_name": "画像1.jpg", "id": 2, "height": 200, "width": 200},
+    ],
+    "annotations": [
+        {
+            "id": 1,
+            "image_id": 1,
+            "category_id": 1,
+            "segmentation": [[0.5, 1, 2]],
+            "area": 1.5e2,
+            "bbox": [0, 0, 10, 15],
+        },
+    ],
+    "categories": [],
+    "licenses": [{"id": 1, "name": "License", "url": ""}],
+    "version": 123456789,
+}
+
+
+def _collect(text: str, chunk_size: int) -> dict:
+    result: dict = {"images": [], "annotations": [], "categories": []}
+    for key, value in iter_dataset(io.StringIO(text), chunk_size=chunk_size):
+        if key in ("images", "annotations", "categories"):
+            result[key].append(value)
+        else:
+            result[key] = value
+    return result
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_dataset(chunk_size, indent):
+    text = json.dumps(DATASET, indent=indent, ensure_ascii=False)
+    assert _collect(text, chunk_size) == DATASET
+
+
+def test_iter_dataset_yields_elements():
+    text = json.dumps(DATASET)
+    keys = [key for key, _ in iter_dataset(io.StringIO(text))]
+    assert keys == ["info", "images", "images", "annotations", "licenses", "version"]
+
+
+def test_iter_dataset_empty_object():
+    assert list(iter_dataset(io.StringIO(" {} "))) == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "[]",
+        '{"images": [{"id": 1}',
+        '{"images": [{"id": 1} {"id": 2}]}',
+        '{"images": []',
+        '{"images": []} x',
+        "{1: 2}",
+    ],
+)
+def test_iter_dataset_invalid(text):
+    with pytest.raises(ValueError):
+        list(iter_dataset(io.StringIO(text), chunk_size=4))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+def test_dump_dataset_matches_json_dump(chunk_size):
+    f = io.BytesIO()
+    dump_dataset(DATASET, f, chunk_size=chunk_size)
+    assert f.getvalue().decode("utf-8") == json.dumps(DATASET)
+
+
+@pytest.mark.parametrize("encoder", ["auto", *ENCODERS])
+def test_dump_dataset_encoders(encoder):
+    if encoder != "auto":
+        pytest.importorskip(encoder)
+    f = io.BytesIO()
+    dump_dataset(DATASET, f, chunk_size=1, encoder=encoder)
+    assert json.loads(f.getvalue()) == DATASET
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+def test_dump_dataset_iterators(chunk_size):
+    dataset = {**DATASET, "images": iter(DATASET["images"]), "categories": iter([])}
+    f = io.BytesIO()
+    dump_dataset(dataset, f, chunk_size=chunk_size)
+    assert f.getvalue().decode("utf-8") == json.dumps(DATASET)
+
+
+def test_dump_dataset_empty_arrays():
+    f = io.BytesIO()
+    dump_dataset({"images": [], "annotations": [], "categories": []}, f)
+    assert json.loads(f.getvalue()) == {"images": [], "annotations": [], "categories": []}
+
+
+def test_dump_dataset_invalid_arguments():
+    with pytest.raises(ValueError):
+        dump_dataset(DATASET, io.BytesIO(), chunk_size=0)
+    with pytest.raises(ValueError):
+        get_encoder("pickle")
+
+
+@pytest.mark.parametrize("compression", ["gzip", "bz2", "xz", "zstd"])
+@pytest.mark.parametrize("threads", [1, 3])
+def test_open_dataset_compressed(tmp_path, monkeypatch, compression, threads):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    # small blocks so that the parallel compressor writes several streams
+    monkeypatch.setattr(stream, "_BLOCK_SIZE", 64)
+    path = str(tmp_path / "dataset.json")
+
+    # when
+    with open_dataset(path, "wb", compression=compression, threads=threads) as f:
+        dump_dataset(DATASET, f, chunk_size=1)
+
+    # then: the format is detected from the content
+    with open(path, "rb") as f:
+        assert f.read(2) != b"{"
+    with open_dataset(path) as f:
+        assert json.load(f) == DATASET
+    with open_dataset(path) as f:
+        assert _collect(f.read(), chunk_size=16) == _collect(json.dumps(DATASET), chunk_size=16)
+
+
+def test_open_dataset_empty_parallel(tmp_path):
+    path = str(tmp_path / "empty.gz")
+    with open_dataset(path, "wb", threads=2):
+        pass
+    with open_dataset(path, "rb") as f:
+        assert f.read() == b""
+
+
+def test_infer_compression():
+    assert infer_compression("a.json.gz") == "gzip"
+    assert infer_compression("a.json.BZ2") == "bz2"
+    assert infer_compression("a.json.xz") == "xz"
+    assert infer_compression("a.json.zst") == "zstd"
+    assert infer_compression("a.json") is None
+
+
+def test_open_dataset_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        open_dataset(str(tmp_path / "a.json"), "a")
+    with pytest.raises(ValueError):
+        open_dataset(str(tmp_path / "a.json"), "w", compression="rar")
+
+
+def test_coco_data_compressed(tmp_path):
+    # given
+    dataset = {k: v for k, v in DATASET.items() if k != "version"}
+    dataset["categories"] = [{"id": 1, "name": "cat", "supercategory": "animal"}]
+    path = str(tmp_path / "annotations.json.gz")
+
+    # when
+    CocoData(dataset).save(path, threads=2)
+
+    # then
+    assert CocoData(path).annotations == dataset["annotations"]
+    assert CocoData.from_stream(path).annotations == dataset["annotations"]